@@ -0,0 +1,52 @@
+"""Measures how much autoescaping adds to rendering a large table, compared to escaping each cell with chained
+str.replace() calls beforehand. Run with:
+
+python -m benchmarks.escape
+"""
+from timeit import repeat
+
+from githubmarkdownui.blocks.table import table
+from githubmarkdownui.escape import autoescape
+
+ROW_COUNT = 50000
+
+
+def build_content(dirty_every):
+    header = ['test', 'status', 'duration', 'info']
+    rows = [[f'test_case_{index}' if index % dirty_every else f'test_case<{index}>', 'passed', f'{index % 60}s',
+             'retried once' if index % 3 else ''] for index in range(ROW_COUNT)]
+    return [header] + rows
+
+
+def replace_escape(text):
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;') \
+        .replace("'", '&#39;').replace('|', '&#124;')
+
+
+def render_escaped_with_replace(content):
+    return table([[replace_escape(cell) for cell in row] for row in content])
+
+
+def render_autoescaped(content):
+    with autoescape():
+        return table(content)
+
+
+def best_time(function, content):
+    return min(repeat(lambda: function(content), number=1, repeat=5))
+
+
+def main():
+    for description, dirty_every in (('no cells need escaping', ROW_COUNT + 1), ('1 in 100 rows need escaping', 100)):
+        content = build_content(dirty_every)
+        baseline = best_time(table, content)
+        print(f'{ROW_COUNT} rows, {description}:')
+        print(f'  {"no escaping":<28}{baseline * 1000:.1f}ms')
+
+        for function in (render_autoescaped, render_escaped_with_replace):
+            elapsed = best_time(function, content)
+            print(f'  {function.__name__:<28}{elapsed * 1000:.1f}ms ({(elapsed / baseline - 1) * 100:+.0f}%)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""Synthetic inputs for the benchmarks. Every generator is seeded, so the same size always produces the same input."""
+from random import Random
+from typing import List, Tuple, Union
+
+from githubmarkdownui.blocks.lists import OrderedList, UnorderedList
+from githubmarkdownui.ci import CIJob, CIJobMetadata, CIStatus, CITask, CITaskBatch, CITaskMetadata
+
+SEED = 2020
+
+
+def make_table(rows: int, columns: int = 4) -> List[List[str]]:
+    """A table with a header and the given number of rows, where each row is a test result."""
+    random = Random(SEED)
+    header = ['test', 'status', 'duration', 'info'][:columns] + [f'column {index}' for index in range(4, columns)]
+    statuses = [CIStatus.SUCCEEDED.value] * 9 + [CIStatus.FAILED.value]
+
+    return [header] + [
+        [f'test_case_{index}', random.choice(statuses), f'{random.randint(1, 600)}s', 'N/A'][:columns] +
+        [str(random.random()) for _ in range(4, columns)]
+        for index in range(rows)
+    ]
+
+
+def make_wide_list(items: int) -> UnorderedList:
+    """A list with the given number of items, where every hundredth item is followed by a short nested list."""
+    return UnorderedList([
+        OrderedList([f'detail {index}', 'more detail']) if index % 100 == 99 else f'item {index}' for index in range(items)
+    ])
+
+
+def make_deep_list(depth: int) -> UnorderedList:
+    """A list nested to the given depth, where each level has one item followed by the next level."""
+    html_list = UnorderedList(['leaf'])
+    for level in range(depth):
+        html_list = (OrderedList if level % 2 else UnorderedList)([f'level {depth - level}', html_list])
+
+    return html_list
+
+
+def make_task_list_items(items: int) -> List[Tuple[str, bool]]:
+    """The given number of (item, checked) pairs, where roughly a third of the items are checked off."""
+    random = Random(SEED)
+
+    return [(f'release step {index}', random.random() < 0.3) for index in range(items)]
+
+
+def make_ci_job(tasks: int, tasks_per_job: int = 100, children_per_job: int = 10) -> CIJob:
+    """A pipeline whose jobs hold the given number of tasks between them. Each job has up to tasks_per_job tasks and up to
+    children_per_job child jobs, so the job hierarchy is several levels deep for larger sizes.
+    """
+    random = Random(SEED)
+    job_count = max(1, tasks // tasks_per_job)
+    jobs: List[CIJob] = [None] * job_count
+
+    # Job i has jobs i * children_per_job + 1 onwards as its child jobs, so build the jobs from the last one backwards so
+    # the child jobs of each job already exist.
+    for index in reversed(range(job_count)):
+        first_child = index * children_per_job + 1
+        child_jobs = jobs[first_child:first_child + children_per_job]
+        job_tasks = [_make_task(random, f'job {index} task {task_index}') for task_index in range(tasks_per_job)]
+        status = CIStatus.FAILED if any(task.metadata.status == CIStatus.FAILED for task in job_tasks) or \
+            any(job.metadata.status == CIStatus.FAILED for job in child_jobs) else CIStatus.SUCCEEDED
+        jobs[index] = CIJob(CIJobMetadata(status, f'job {index}', random.randint(60, 3600)), job_tasks, child_jobs or None)
+
+    return jobs[0]
+
+
+def make_wide_ci_job(tasks: int, tasks_per_job: int = 100) -> CIJob:
+    """A pipeline whose child jobs hold the given number of tasks between them, so every task is displayed in a job tree
+    with the default max_depth of 1.
+    """
+    return make_ci_job(tasks, tasks_per_job, max(1, tasks // tasks_per_job))
+
+
+def make_flat_ci_job(tasks: int) -> CIJob:
+    """A single job with the given number of tasks."""
+    random = Random(SEED)
+
+    return CIJob(CIJobMetadata(CIStatus.FAILED, 'job'), [_make_task(random, f'task {index}') for index in range(tasks)])
+
+
+def make_flat_ci_job_batch(tasks: int) -> CIJob:
+    """A single job with the given number of tasks stored in a CITaskBatch, with the same tasks as make_flat_ci_job."""
+    random = Random(SEED)
+    batch = CITaskBatch(_make_task(random, f'task {index}').metadata for index in range(tasks))
+
+    return CIJob(CIJobMetadata(CIStatus.FAILED, 'job'), batch)
+
+
+def make_ci_tasks(tasks: int) -> List[CITask]:
+    """The given number of tasks, to be added to a job one at a time."""
+    random = Random(SEED)
+
+    return [_make_task(random, f'task {index}') for index in range(tasks)]
+
+
+def make_ci_child_jobs(jobs: int, tasks_per_job: int = 5) -> List[CIJob]:
+    """The given number of jobs with a few tasks each, to be added to a job one at a time."""
+    random = Random(SEED)
+
+    return [CIJob(CIJobMetadata(CIStatus.SUCCEEDED, f'job {index}'),
+                  [_make_task(random, f'job {index} task {task_index}') for task_index in range(tasks_per_job)])
+            for index in range(jobs)]
+
+
+def make_task_batch_rows(tasks: int) -> List[Tuple[CIStatus, str, int]]:
+    """The status, name and duration of the given number of tasks, to be added to a CITaskBatch one at a time."""
+    random = Random(SEED)
+
+    return [(task.metadata.status, task.metadata.name, random.randint(1, 600))
+            for task in (_make_task(random, f'task {index}') for index in range(tasks))]
+
+
+def make_junit_xml(testcases: int, testcases_per_suite: int = 100) -> bytes:
+    """A JUnit XML report with the given number of testcases, split into testsuites of testcases_per_suite each. Failed
+    testcases have a failure with a stack trace, and every testcase has some captured output.
+    """
+    random = Random(SEED)
+    parts = [b'<?xml version="1.0" encoding="utf-8"?>\n<testsuites name="tests">']
+
+    for suite in range(max(1, testcases // testcases_per_suite)):
+        parts.append(b'<testsuite name="suite %d" time="%d">' % (suite, random.randint(60, 3600)))
+        for index in range(testcases_per_suite):
+            parts.append(b'<testcase classname="tests.suite_%d" name="test_%d" time="%.3f">' %
+                         (suite, index, random.random() * 600))
+            if random.random() < 0.05:
+                parts.append(b'<failure type="AssertionError" message="expected 1 but got 2">' +
+                             b'Traceback (most recent call last):\n  File "test.py", line 1\n' * 5 + b'</failure>')
+            parts.append(b'<system-out>captured output</system-out></testcase>')
+        parts.append(b'</testsuite>')
+
+    parts.append(b'</testsuites>')
+
+    return b''.join(parts)
+
+
+def make_live_events(events: int, tasks_per_job: int = 100) -> Tuple[CIJob, List[Tuple[CITask, CIStatus]]]:
+    """A pipeline of pending tasks, and the given number of status events that start each task and then finish it, in the
+    order the tasks run.
+    """
+    random = Random(SEED)
+    tasks = [CITask(CITaskMetadata(CIStatus.PENDING, f'task {index}')) for index in range(max(1, events // 2))]
+    job = CIJob(CIJobMetadata(CIStatus.RUNNING, 'pipeline'), [], [
+        CIJob(CIJobMetadata(CIStatus.RUNNING, f'job {start // tasks_per_job}'), tasks[start:start + tasks_per_job])
+        for start in range(0, len(tasks), tasks_per_job)
+    ])
+    finished = [CIStatus.FAILED if random.random() < 0.05 else CIStatus.SUCCEEDED for _ in tasks]
+
+    return job, [event for task, status in zip(tasks, finished) for event in ((task, CIStatus.RUNNING), (task, status))]
+
+
+def make_live_add_events(events: int) -> Tuple[CIJob, List[Tuple[CIJob, Union[CIJob, CITask]]]]:
+    """A pipeline with an empty job, and the given number of events that add tasks to that job, where every thousandth event
+    adds another job to the pipeline instead. Each event is the job to add to and the job or task to add.
+    """
+    random = Random(SEED)
+    job = CIJob(CIJobMetadata(CIStatus.RUNNING, 'job 0'), [])
+    pipeline = CIJob(CIJobMetadata(CIStatus.RUNNING, 'pipeline'), [], [job])
+
+    return pipeline, [
+        (pipeline, CIJob(CIJobMetadata(CIStatus.PENDING, f'job {index // 1000 + 1}'), [])) if index % 1000 == 999 else
+        (job, _make_task(random, f'task {index}'))
+        for index in range(events)
+    ]
+
+
+def make_shortcode_text(lines: int) -> str:
+    """Log output with the given number of lines, where some lines start with a shortcode such as :x: and some have
+    colons that are not shortcodes, such as times.
+    """
+    random = Random(SEED)
+    shortcodes = [':white_check_mark:', ':x:', ':warning:', ':hourglass_flowing_sand:', ':not_a_shortcode:']
+
+    return '\n'.join(
+        f'{random.choice(shortcodes)} step {index} finished' if random.random() < 0.2 else
+        f'12:{index % 60:02}:{random.randint(0, 59):02} step {index} running'
+        for index in range(lines)
+    )
+
+
+def _make_task(random: Random, name: str) -> CITask:
+    status = CIStatus.FAILED if random.random() < 0.05 else CIStatus.SUCCEEDED
+    info = 'see the logs for details' if status == CIStatus.FAILED else None
+
+    return CITask(CITaskMetadata(status, name, random.randint(1, 600), info))
@@ -0,0 +1,42 @@
+"""Measures the memory taken by a job with a large number of tasks, stored as a list of CITasks and as a CITaskBatch, and
+how long each takes to render as a task list. Run with:
+
+python -m benchmarks.memory
+"""
+import tracemalloc
+from time import perf_counter
+
+from benchmarks import generators
+
+TASK_COUNT = 200000
+
+
+def measure(build):
+    tracemalloc.start()
+    try:
+        build(TASK_COUNT)
+        memory = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+    seconds = []
+    for _ in range(3):
+        job = build(TASK_COUNT)
+        start = perf_counter()
+        job.ci_task_list()
+        seconds.append(perf_counter() - start)
+
+    return memory, min(seconds)
+
+
+def main():
+    print(f'{TASK_COUNT} tasks:')
+
+    for description, build in (('list of CITasks', generators.make_flat_ci_job),
+                               ('CITaskBatch', generators.make_flat_ci_job_batch)):
+        memory, seconds = measure(build)
+        print(f'  {description:<20}{memory / TASK_COUNT:>8.0f} bytes per task{seconds * 1000:>10.1f}ms to render')
+
+
+if __name__ == '__main__':
+    main()
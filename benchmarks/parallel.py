@@ -0,0 +1,59 @@
+"""Compares rendering huge tables and job trees with a single worker against rendering them with several workers. Run with:
+
+python -m benchmarks.parallel [--workers N] [--size N]
+
+The timings with several workers include starting the worker processes, so they can only come out ahead when there are at
+least that many cores, and the output is only rendered in parallel when it is at least githubmarkdownui.parallel's
+_MIN_PARALLEL_SIZE rows or lines.
+"""
+import argparse
+import os
+from time import perf_counter
+
+from benchmarks import generators
+from githubmarkdownui.blocks.table import table
+
+SIZE = 500000
+
+
+def best_time(setup, render, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        # Jobs cache their output, so each run renders a new one.
+        render_input = setup()
+        start = perf_counter()
+        output = render(render_input)
+        best = min(best, perf_counter() - start)
+
+    return best, output
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='the number of workers to compare against one')
+    parser.add_argument('--size', type=int, default=SIZE, help='the number of rows or lines to render')
+    parser.add_argument('--repeat', type=int, default=3, help='the number of runs to take the best time of')
+    args = parser.parse_args(arguments)
+
+    benchmarks = {
+        'table': (lambda: generators.make_table(args.size),
+                  lambda content, table_workers: table(content, workers=table_workers)),
+        'child_ci_job_tree': (lambda: generators.make_wide_ci_job(args.size),
+                              lambda job, job_workers: job.child_ci_job_tree(workers=job_workers)),
+        'ci_task_list_batch': (lambda: generators.make_flat_ci_job_batch(args.size),
+                               lambda job, job_workers: job.ci_task_list(workers=job_workers)),
+    }
+
+    print(f'{os.cpu_count()} cores')
+    for name, (setup, render) in benchmarks.items():
+        single_seconds, single_output = best_time(setup, lambda render_input: render(render_input, 1), args.repeat)
+        parallel_seconds, parallel_output = best_time(setup, lambda render_input: render(render_input, args.workers),
+                                                      args.repeat)
+        assert parallel_output == single_output
+
+        print(f'{name:<20}{args.size} rows  1 worker {single_seconds * 1000:8.1f}ms  {args.workers} workers '
+              f'{parallel_seconds * 1000:8.1f}ms  speedup {single_seconds / parallel_seconds:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""Compares the size of tables and lists rendered with and without compact HTML, and of tables rendered as Markdown. Run
+with:
+
+python -m benchmarks.sizes
+"""
+from benchmarks import generators
+from githubmarkdownui.blocks.table import TableAlignment, TableFormat, table
+
+SIZE = 10000
+
+
+def main():
+    content = generators.make_table(SIZE)
+    html_list = generators.make_wide_list(SIZE)
+    outputs = {
+        'table': [
+            ('html', table(content)),
+            ('html compact', table(content, compact=True)),
+            ('markdown', table(content, table_format=TableFormat.MARKDOWN)),
+        ],
+        'aligned table': [
+            ('html', table(content, [TableAlignment.LEFT] * 4)),
+            ('html compact', table(content, [TableAlignment.LEFT] * 4, compact=True)),
+            ('markdown', table(content, [TableAlignment.LEFT] * 4, table_format=TableFormat.MARKDOWN)),
+        ],
+        'list': [
+            ('html', html_list.render()),
+            ('html compact', html_list.render(compact=True)),
+        ],
+    }
+
+    for name, renderings in outputs.items():
+        full_size = len(renderings[0][1].encode())
+        for rendering_name, text in renderings:
+            size = len(text.encode())
+            print(f'{name:<16}{rendering_name:<14}{size:>10} bytes {size / full_size:>7.1%}')
+
+
+if __name__ == '__main__':
+    main()
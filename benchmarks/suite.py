@@ -0,0 +1,283 @@
+"""Runs each benchmark at several input sizes, reporting the time and peak memory at each size and the scaling exponent
+fitted to the times, and compares the results against a stored baseline. Run with:
+
+python -m benchmarks.suite                      # compare against benchmarks/baseline.json
+python -m benchmarks.suite --update-baseline    # store the results as the new baseline
+python -m benchmarks.suite --scale large        # run at up to 1M rows, items and tasks
+
+The run fails when a benchmark scales worse than its expected complexity allows, when its scaling exponent grows past the
+baseline, or when it is slower than the baseline by more than the threshold at any size. Times depend on the machine, so
+the baseline should be updated on the machine the suite runs on.
+"""
+import argparse
+import json
+import sys
+import tracemalloc
+from dataclasses import dataclass
+from io import BytesIO
+from itertools import count
+from math import log
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Sequence, Tuple, Union
+
+from benchmarks import generators
+from githubmarkdownui.blocks.lists import task_list
+from githubmarkdownui.blocks.table import TableFormat, table
+from githubmarkdownui.ci import CIJob, CIJobMetadata, CIStatus, CITask, CITaskBatch
+from githubmarkdownui.emoji import expand_shortcodes
+from githubmarkdownui.junit import parse_junit_xml
+from githubmarkdownui.live import LiveReport
+from githubmarkdownui.parse import parse_child_ci_job_tree, parse_ci_task_list, parse_table
+
+BASELINE_PATH = Path(__file__).with_name('baseline.json')
+# How much larger a scaling exponent can be than the baseline before it counts as a regression. The fit is noisy, so this
+# catches an algorithm going from linear to quadratic rather than small changes.
+EXPONENT_TOLERANCE = 0.25
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    name: str
+    # Builds the input for a given size. This is not timed.
+    setup: Callable[[int], Any]
+    # Renders the input built by setup, or builds a job from it.
+    run: Callable[[Any], Any]
+    sizes: Sequence[int]
+    large_sizes: Sequence[int]
+    # The largest scaling exponent that is acceptable. Timings of linear algorithms still curve upwards a little as the
+    # input outgrows the CPU caches, so this leaves some room above 1 while still catching anything quadratic.
+    max_exponent: float = 1.4
+
+
+BENCHMARKS = [
+    Benchmark('table', generators.make_table, table, [10000, 30000, 100000], [100000, 300000, 1000000]),
+    Benchmark('table_markdown', generators.make_table, lambda content: table(content, table_format=TableFormat.MARKDOWN),
+              [10000, 30000, 100000], [100000, 300000, 1000000]),
+    Benchmark('table_auto', generators.make_table, lambda content: table(content, table_format=TableFormat.AUTO),
+              [10000, 30000, 100000], [100000, 300000, 1000000]),
+    Benchmark('table_compact', generators.make_table, lambda content: table(content, compact=True),
+              [10000, 30000, 100000], [100000, 300000, 1000000]),
+    Benchmark('html_list_wide', generators.make_wide_list, str, [10000, 30000, 100000], [100000, 300000, 1000000]),
+    Benchmark('html_list_wide_compact', generators.make_wide_list, lambda html_list: html_list.render(compact=True),
+              [10000, 30000, 100000], [100000, 300000, 1000000]),
+    Benchmark('html_list_deep', generators.make_deep_list, str, [3000, 10000, 30000], [30000, 100000, 300000]),
+    Benchmark('task_list', generators.make_task_list_items, task_list, [30000, 100000, 300000], [100000, 300000, 1000000]),
+    Benchmark('ci_task_list', generators.make_flat_ci_job, lambda job: job.ci_task_list(), [10000, 30000, 100000],
+              [100000, 300000, 1000000]),
+    Benchmark('ci_task_list_batch', generators.make_flat_ci_job_batch, lambda job: job.ci_task_list(),
+              [10000, 30000, 100000], [100000, 300000, 1000000]),
+    Benchmark('child_ci_job_tree', generators.make_ci_job, lambda job: job.child_ci_job_tree(max_depth=None),
+              [10000, 30000, 100000], [100000, 300000, 1000000]),
+    Benchmark('parse_table', lambda size: table(generators.make_table(size)), parse_table, [10000, 30000, 100000],
+              [100000, 300000, 1000000]),
+    Benchmark('parse_ci_task_list', lambda size: generators.make_flat_ci_job(size).ci_task_list(), parse_ci_task_list,
+              [10000, 30000, 100000], [100000, 300000, 1000000]),
+    Benchmark('parse_child_ci_job_tree', lambda size: generators.make_wide_ci_job(size).child_ci_job_tree(),
+              parse_child_ci_job_tree, [10000, 30000, 100000], [100000, 300000, 1000000]),
+    Benchmark('parse_junit_xml', generators.make_junit_xml, lambda xml: parse_junit_xml(BytesIO(xml), batch=True),
+              [10000, 30000, 100000], [100000, 300000, 1000000]),
+    Benchmark('parse_junit_xml_failures', generators.make_junit_xml,
+              lambda xml: parse_junit_xml(BytesIO(xml), only_failures=True, max_tasks=1000),
+              [10000, 30000, 100000], [100000, 300000, 1000000]),
+    Benchmark('live_report', generators.make_live_events, lambda job_and_events: replay_live_events(*job_and_events),
+              [3000, 10000, 30000], [30000, 100000, 300000]),
+    Benchmark('live_report_add', generators.make_live_add_events,
+              lambda job_and_events: replay_live_add_events(*job_and_events), [10000, 30000, 100000],
+              [100000, 300000, 1000000]),
+    Benchmark('failure_report', lambda size: parse_junit_xml(BytesIO(generators.make_junit_xml(size)), only_failures=True),
+              lambda job: job.failure_report(), [30000, 100000, 300000], [300000, 1000000, 3000000]),
+    Benchmark('ci_job_add_task', generators.make_ci_tasks, lambda tasks: add_tasks(tasks), [10000, 30000, 100000],
+              [100000, 300000, 1000000]),
+    Benchmark('ci_job_add_child_job', generators.make_ci_child_jobs, lambda jobs: add_child_jobs(jobs),
+              [3000, 10000, 30000], [30000, 100000, 300000]),
+    Benchmark('ci_task_batch_add', generators.make_task_batch_rows, lambda rows: add_batch_tasks(rows),
+              [10000, 30000, 100000], [100000, 300000, 1000000]),
+    Benchmark('expand_shortcodes', generators.make_shortcode_text, expand_shortcodes, [30000, 100000, 300000],
+              [300000, 1000000, 3000000]),
+]
+
+
+def replay_live_events(job: CIJob, events: Sequence[Tuple[CITask, CIStatus]]) -> int:
+    """Applies status events to a live report, with each reading of the clock 10ms after the last, and returns the number
+    of bodies it emitted.
+    """
+    bodies = []
+    clock = count(step=0.01)
+    report = LiveReport(job, bodies.append, interval=1, clock=lambda: next(clock))
+
+    for task, status in events:
+        report.update_task(task, status=status)
+    report.flush()
+
+    return len(bodies)
+
+
+def replay_live_add_events(job: CIJob, events: Sequence[Tuple[CIJob, Union[CIJob, CITask]]]) -> int:
+    """Applies events that add child jobs and tasks to a live report, with each reading of the clock 10ms after the last,
+    and returns the number of bodies it emitted.
+    """
+    bodies = []
+    clock = count(step=0.01)
+    report = LiveReport(job, bodies.append, interval=1, clock=lambda: next(clock))
+
+    for parent, item in events:
+        if isinstance(item, CIJob):
+            report.add_child_job(parent, item)
+        else:
+            report.add_task(parent, item)
+    report.flush()
+
+    return len(bodies)
+
+
+def add_tasks(tasks: Sequence[CITask]) -> CIJob:
+    """Builds a job below a pipeline by adding the given tasks to it one at a time, and returns the pipeline."""
+    job = CIJob(CIJobMetadata(CIStatus.RUNNING, 'job'), [])
+    pipeline = CIJob(CIJobMetadata(CIStatus.RUNNING, 'pipeline'), [], [job])
+
+    for task in tasks:
+        job.add_task(task)
+
+    return pipeline
+
+
+def add_child_jobs(jobs: Sequence[CIJob]) -> CIJob:
+    """Builds a job below a pipeline by adding the given child jobs to it one at a time, and returns the pipeline."""
+    job = CIJob(CIJobMetadata(CIStatus.RUNNING, 'job'), [])
+    pipeline = CIJob(CIJobMetadata(CIStatus.RUNNING, 'pipeline'), [], [job])
+
+    for child_job in jobs:
+        job.add_child_job(child_job)
+
+    return pipeline
+
+
+def add_batch_tasks(rows: Sequence[Tuple[CIStatus, str, int]]) -> CIJob:
+    """Builds a job below a pipeline by adding tasks to its CITaskBatch one at a time, and returns the pipeline."""
+    batch = CITaskBatch()
+    pipeline = CIJob(CIJobMetadata(CIStatus.RUNNING, 'pipeline'), [], [CIJob(CIJobMetadata(CIStatus.RUNNING, 'job'), batch)])
+
+    for status, name, seconds in rows:
+        batch.add(status, name, seconds)
+
+    return pipeline
+
+
+def measure(benchmark: Benchmark, size: int, repeat: int) -> Dict[str, float]:
+    """Returns the best time out of the given number of runs, and the peak memory allocated by a single run. Each run gets
+    a freshly built input, so output cached by an earlier run is never reused.
+    """
+    seconds = []
+    for _ in range(repeat):
+        value = benchmark.setup(size)
+        start = perf_counter()
+        benchmark.run(value)
+        seconds.append(perf_counter() - start)
+
+    # Tracing memory slows the run down, so it is measured separately from the time.
+    value = benchmark.setup(size)
+    tracemalloc.start()
+    try:
+        benchmark.run(value)
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {'seconds': round(min(seconds), 6), 'peak_bytes': peak_bytes}
+
+
+def scaling_exponent(sizes: Sequence[int], seconds: Sequence[float]) -> float:
+    """Fits seconds = c * size ** k with least squares on a log-log scale and returns k, so 1 is linear and 2 is
+    quadratic.
+    """
+    xs = [log(size) for size in sizes]
+    ys = [log(max(value, 1e-9)) for value in seconds]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / sum((x - mean_x) ** 2 for x in xs)
+
+
+def run_suite(benchmarks: Sequence[Benchmark], large: bool, repeat: int) -> Dict[str, Dict[str, Any]]:
+    results = {}
+
+    for benchmark in benchmarks:
+        sizes = benchmark.large_sizes if large else benchmark.sizes
+        measurements = {}
+
+        for size in sizes:
+            measurements[str(size)] = measure(benchmark, size, repeat)
+            print(f'{benchmark.name:<20}{size:>10}{measurements[str(size)]["seconds"] * 1000:>12.1f}ms'
+                  f'{measurements[str(size)]["peak_bytes"] / 1024 / 1024:>10.1f}MiB')
+
+        exponent = scaling_exponent(sizes, [measurements[str(size)]['seconds'] for size in sizes])
+        print(f'{benchmark.name:<20}{"exponent":>10}{exponent:>14.2f}')
+        results[benchmark.name] = {'exponent': round(exponent, 3), 'sizes': measurements}
+
+    return results
+
+
+def find_regressions(benchmarks: Sequence[Benchmark], results: Dict[str, Dict[str, Any]],
+                     baseline: Dict[str, Dict[str, Any]], threshold: float) -> List[str]:
+    """Returns a description of each regression found in the results."""
+    regressions = []
+
+    for benchmark in benchmarks:
+        result = results[benchmark.name]
+
+        if result['exponent'] > benchmark.max_exponent:
+            regressions.append(f'{benchmark.name} scales with exponent {result["exponent"]:.2f}, but at most '
+                               f'{benchmark.max_exponent} is expected')
+
+        if benchmark.name not in baseline:
+            continue
+
+        # A baseline exponent below 1 comes from noise in the fit rather than from anything faster than linear.
+        if result['exponent'] > max(baseline[benchmark.name]['exponent'], 1) + EXPONENT_TOLERANCE:
+            regressions.append(f'{benchmark.name} scales with exponent {result["exponent"]:.2f}, up from '
+                               f'{baseline[benchmark.name]["exponent"]:.2f}')
+
+        for size, measurement in result['sizes'].items():
+            baseline_measurement = baseline[benchmark.name]['sizes'].get(size)
+
+            if baseline_measurement and measurement['seconds'] > baseline_measurement['seconds'] * (1 + threshold):
+                regressions.append(f'{benchmark.name} takes {measurement["seconds"] * 1000:.1f}ms at size {size}, up from '
+                                   f'{baseline_measurement["seconds"] * 1000:.1f}ms')
+
+    return regressions
+
+
+def main(arguments: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', choices=['small', 'large'], default='small',
+                        help='the input sizes to run at, where large goes up to 1M items')
+    parser.add_argument('--only', action='append', choices=[benchmark.name for benchmark in BENCHMARKS],
+                        help='only run the given benchmark, which can be repeated')
+    parser.add_argument('--repeat', type=int, default=5, help='the number of runs to take the best time of')
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PATH, help='the baseline file to compare against')
+    parser.add_argument('--threshold', type=float, default=1.0,
+                        help='how much slower than the baseline a benchmark can be, where 1 means twice as slow')
+    parser.add_argument('--update-baseline', action='store_true', help='store the results as the new baseline')
+    args = parser.parse_args(arguments)
+
+    benchmarks = [benchmark for benchmark in BENCHMARKS if not args.only or benchmark.name in args.only]
+    results = run_suite(benchmarks, args.scale == 'large', args.repeat)
+
+    baselines = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+
+    if args.update_baseline:
+        baselines.setdefault(args.scale, {}).update(results)
+        args.baseline.write_text(json.dumps(baselines, indent=2, sort_keys=True) + '\n')
+        print(f'Updated the baseline in {args.baseline}')
+        return 0
+
+    regressions = find_regressions(benchmarks, results, baselines.get(args.scale, {}), args.threshold)
+    for regression in regressions:
+        print(f'REGRESSION: {regression}')
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
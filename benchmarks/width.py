@@ -0,0 +1,51 @@
+"""Compares aligning a task list by display width against aligning it by len(), both for whole lines with emojis, tags
+and a few wide characters, and for plain ASCII task names, which are measured all at once. Run with:
+
+python -m benchmarks.width
+"""
+from timeit import repeat
+
+from githubmarkdownui.ci import CIStatus
+from githubmarkdownui.width import display_width, display_widths, pad_to_width
+
+LINE_COUNT = 50000
+
+
+def build_names():
+    return [f'test_case_{index % 5000}' for index in range(LINE_COUNT)]
+
+
+def build_lines():
+    # Mostly ASCII task names with a few wide characters, which is what most CI output looks like.
+    names = [f'test_case_{index % 5000}' if index % 50 else f'测试_{index % 5000}' for index in range(LINE_COUNT)]
+    return [f'{CIStatus.SUCCEEDED.value if index % 7 else CIStatus.FAILED.value}  {name} <strong>(15s)</strong>'
+            for index, name in enumerate(names)]
+
+
+def align_by_length(lines):
+    width = max(map(len, lines))
+    return [f'{line:<{width}}' for line in lines]
+
+
+def align_by_display_width(lines):
+    width = max(map(display_width, lines))
+    return [pad_to_width(line, width) for line in lines]
+
+
+def align_by_display_widths(lines):
+    widths = display_widths(lines)
+    width = max(widths)
+    return [f'{line}{" " * (width - line_width)}' for line, line_width in zip(lines, widths)]
+
+
+def main():
+    for description, lines in (('whole lines', build_lines()), ('ASCII task names', build_names())):
+        print(f'{LINE_COUNT} {description}:')
+
+        for function in (align_by_length, align_by_display_width, align_by_display_widths):
+            best = min(repeat(lambda: function(lines), number=1, repeat=5))
+            print(f'  {function.__name__:<24}{best * 1000:.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,27 +1,31 @@
 from typing import Optional
 
-from githubmarkdownui.constants import HEADING_MAX_LEVEL, HEADING_MIN_LEVEL
+from githubmarkdownui.constants import CODE_BLOCK_CLOSING_TAGS, CODE_BLOCK_OPENING_TAGS, HEADING_MAX_LEVEL, HEADING_MIN_LEVEL
+from githubmarkdownui.escape import Markup, escape_if_enabled
+from githubmarkdownui.instrumentation import instrumented
 
 
-def thematic_break() -> str:
+def thematic_break() -> Markup:
     """Returns a <hr> tag, used to create a thematic break. Equivalent to --- in Markdown."""
-    return '<hr>'
+    return Markup('<hr>')
 
 
-def code_block(text: str, language: Optional[str] = None) -> str:
+@instrumented('code_block')
+def code_block(text: str, language: Optional[str] = None) -> Markup:
     """Creates a code block using HTML syntax. If language is given, then the code block will be
     created using Markdown syntax, but it cannot be used inside a table.
 
-    :param text: The text inside the code block
+    :param text: The text inside the code block. This is never escaped, since a code block using Markdown syntax displays
+    its text as is, so use githubmarkdownui.escape.escape for text inside a code block using HTML syntax
     :param language: The language to use for syntax highlighting
     """
     if language:
-        return f'```{language}\n{text}\n```'
+        return Markup(f'```{language}\n{text}\n```')
 
-    return f'<pre><code>{text}</code></pre>'
+    return Markup(f'{CODE_BLOCK_OPENING_TAGS}{text}{CODE_BLOCK_CLOSING_TAGS}')
 
 
-def heading(text: str, level: int) -> str:
+def heading(text: str, level: int) -> Markup:
     """Returns a heading with the given text, by wrapping the text with a corresponding <h1> to <h6> tag. 1 is the biggest
     heading while 6 is the smallest heading. The level must be between 1 and 6 inclusive.
 
@@ -33,4 +37,4 @@ def heading(text: str, level: int) -> str:
     if not HEADING_MIN_LEVEL <= level <= HEADING_MAX_LEVEL:
         raise Exception(f'Level must be between {HEADING_MIN_LEVEL} and {HEADING_MAX_LEVEL} inclusive')
 
-    return f'<h{level}>{text}</h{level}>'
+    return Markup(f'<h{level}>{escape_if_enabled(text)}</h{level}>')
@@ -1,33 +1,181 @@
 from __future__ import annotations
-from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import Optional, List, Union
+from abc import ABC
+from dataclasses import dataclass, fields
+from typing import Any, Iterable, Iterator, Optional, List, Sequence, Sized, TextIO, Tuple, Union
+
+from githubmarkdownui.budget import paginate, render_pages, render_within_budget
+from githubmarkdownui.constants import GITHUB_COMMENT_MAX_LENGTH
+from githubmarkdownui.emitter import closing_tag, resolve_compact
+from githubmarkdownui.escape import Markup, autoescape_enabled, escape
+from githubmarkdownui.fingerprint import fingerprint_values
+from githubmarkdownui.instrumentation import instrumented
 
 
 @dataclass
 class HtmlList(ABC):
     """Abstract class for a HTML list. Any HtmlLists inside this one will be displayed as a sublist of the element before it.
 
-    Any child classes must override __str__ to output the list in HTML syntax.
+    The items can come from any iterable, such as a generator, in which case they are only consumed when the list is
+    rendered and the list can only be rendered once. Nested lists can be built from generators in the same way.
+
+    Child classes override opening_tag and closing_tag to output the list in HTML syntax, which default to the tags of an
+    unordered list. A child class that overrides __str__ instead, as child classes had to before these methods existed, is
+    still output by its own __str__ wherever it is nested in another list.
+
+    Each method that outputs the list takes a compact parameter, which leaves out the </li> closing tags when it is True. If
+    it is not given, this is enabled inside githubmarkdownui.emitter.compact_html().
     """
-    items: List[Union[str, HtmlList]]
+    items: Iterable[Union[str, HtmlList]]
 
-    def build_list_contents(self) -> str:
+    def build_list_contents(self, compact: Optional[bool] = None) -> str:
         """Constructs the contents of the list by building the <li> tags or any nested lists."""
-        list_body = ''
+        return ''.join(self._iter_list_items(compact=compact))
+
+    def iter_fragments(self, compact: Optional[bool] = None) -> Iterator[str]:
+        """Outputs this HtmlList in HTML list syntax one fragment at a time, starting with the opening tag, then each item or
+        nested list, and ending with the closing tag.
+
+        Nested lists are walked with an explicit stack instead of recursion, so lists can be nested to any depth.
+        """
+        escaping = autoescape_enabled()
+        compact = resolve_compact(compact)
+        item_closing_tag = closing_tag('li', compact)
+        yield self.opening_tag()
+        # Each entry is a list that is being rendered, along with the iterator over its remaining items.
+        stack = [(self, iter(self.items))]
+        # Whether the last fragment was an item whose closing tag was left out.
+        item_open = False
+
+        while stack:
+            html_list, items = stack[-1]
+
+            for item in items:
+                if isinstance(item, HtmlList):
+                    item_was_open = item_open
+                    item_open = False
+                    if item._outputs_itself():
+                        yield f'</li>{item}' if item_was_open else str(item)
+                        continue
+
+                    # Render the nested list before the rest of the items of this list. An item left open would contain
+                    # the nested list, so it is closed first to keep the nested list where it is without compact output.
+                    yield f'</li>{item.opening_tag()}' if item_was_open else item.opening_tag()
+                    stack.append((item, iter(item.items)))
+                    break
+
+                yield f'<li>{escape(item) if escaping else item}{item_closing_tag}'
+                item_open = compact
+            else:
+                stack.pop()
+                yield html_list.closing_tag()
+                item_open = False
+
+    def fingerprint(self) -> str:
+        """Returns a fingerprint of the items of this HtmlList and any nested lists, as a string of hex digits, without
+        rendering it. Lists that would be rendered the same way have the same fingerprint in every process and on every
+        version of Python. If the items come from a generator, it is consumed. See githubmarkdownui.fingerprint.
+        """
+        return fingerprint_values(self._iter_fingerprint_values())
+
+    def write(self, stream: TextIO, compact: Optional[bool] = None) -> None:
+        """Outputs this HtmlList in HTML list syntax straight into a file-like object.
+
+        :param stream: The file-like object the list will be written to
+        :param compact: Whether to leave out the </li> closing tags
+        """
+        write = stream.write
+        for fragment in self.iter_fragments(compact):
+            write(fragment)
+
+    @instrumented('html_list')
+    def render(self, max_length: Optional[int] = None, compact: Optional[bool] = None) -> Markup:
+        """Outputs this HtmlList in HTML list syntax, like casting it to a str.
 
-        for item in self.items:
+        :param max_length: If given, the list will not be longer than this many characters. Items are rendered until the next
+        one does not fit, and the remaining items are replaced by a final item saying how many items were omitted. A nested
+        list counts as a single item
+        :param compact: Whether to leave out the </li> closing tags
+        """
+        if max_length is None:
+            return Markup(''.join(self.iter_fragments(compact)))
+
+        item_closing_tag = closing_tag('li', resolve_compact(compact))
+
+        return Markup(render_within_budget(self.opening_tag(), self._iter_list_items(compact=compact), self.closing_tag(),
+                                           max_length,
+                                           lambda omitted_count: f'<li>{omitted_count} more items omitted{item_closing_tag}',
+                                           item_count=len(self.items) if isinstance(self.items, Sized) else None))
+
+    @instrumented('html_list_pages')
+    def pages(self, max_length: int = GITHUB_COMMENT_MAX_LENGTH, compact: Optional[bool] = None) -> List[Markup]:
+        """Outputs this HtmlList split across multiple lists, so that no list is longer than the given maximum length. A
+        nested list is never split across two lists.
+
+        :param max_length: The maximum length of each list, which defaults to the maximum length of a GitHub comment
+        :param compact: Whether to leave out the </li> closing tags
+        """
+        return [Markup(page) for page in render_pages(self.opening_tag(), self._iter_list_items(compact=compact),
+                                                      self.closing_tag(), max_length)]
+
+    def _iter_list_items(self, items: Optional[Iterable[Union[str, HtmlList]]] = None,
+                         compact: Optional[bool] = None) -> Iterator[str]:
+        escaping = autoescape_enabled()
+        compact = resolve_compact(compact)
+        item_closing_tag = closing_tag('li', compact)
+        item_open = False
+
+        for item in self.items if items is None else items:
             if isinstance(item, HtmlList):
-                list_body += str(item)
+                # See iter_fragments() for why an item left open is closed before a nested list.
+                nested_list = str(item) if item._outputs_itself() else ''.join(item.iter_fragments(compact))
+                yield f'</li>{nested_list}' if item_open else nested_list
+                item_open = False
             else:
-                list_body += f'<li>{item}</li>'
+                yield f'<li>{escape(item) if escaping else item}{item_closing_tag}'
+                item_open = compact
+
+    def _iter_fingerprint_values(self) -> Iterator[Any]:
+        # Every value is preceded by what it is, so an item can never be mistaken for the start or end of a nested list.
+        yield from self._iter_list_values()
+        stack = [iter(self.items)]
+
+        while stack:
+            for item in stack[-1]:
+                if isinstance(item, HtmlList):
+                    yield from item._iter_list_values()
+                    stack.append(iter(item.items))
+                    break
+
+                yield 'item'
+                yield item
+            else:
+                stack.pop()
+                yield 'end'
+
+    def _iter_list_values(self) -> Iterator[Any]:
+        yield 'list'
+        yield type(self).__name__
+        # Fields such as the starting number of an OrderedList change how the list is displayed.
+        for list_field in fields(self):
+            if list_field.name != 'items':
+                yield getattr(self, list_field.name)
+
+    def opening_tag(self) -> str:
+        """Returns the opening tag of this HtmlList."""
+        return '<ul>'
+
+    def closing_tag(self) -> str:
+        """Returns the closing tag of this HtmlList."""
+        return '</ul>'
 
-        return list_body
+    def _outputs_itself(self) -> bool:
+        """Returns whether this HtmlList is of a child class that overrides __str__ to output itself."""
+        return type(self).__str__ is not HtmlList.__str__
 
-    @abstractmethod
-    def __str__(self) -> str:
+    @instrumented('html_list')
+    def __str__(self) -> Markup:
         """Outputs this HtmlList in HTML list syntax."""
-        pass
+        return Markup(''.join(self.iter_fragments()))
 
 
 @dataclass
@@ -44,13 +192,43 @@ class OrderedList(HtmlList):
     """
     starting_number: int = 1
 
-    def __str__(self) -> str:
-        if self.starting_number != 1:
-            opening_tag = f'<ol start="{self.starting_number}">'
-        else:
-            opening_tag = '<ol>'
+    @instrumented('html_list_pages')
+    def pages(self, max_length: int = GITHUB_COMMENT_MAX_LENGTH, compact: Optional[bool] = None) -> List[Markup]:
+        """Outputs this OrderedList split across multiple lists, so that no list is longer than the given maximum length. Each
+        list starts counting where the previous list stopped.
+
+        :param max_length: The maximum length of each list, which defaults to the maximum length of a GitHub comment
+        :param compact: Whether to leave out the </li> closing tags
+        """
+        # Reserve room for the longest opening tag any of the lists could need.
+        items = self.items if isinstance(self.items, Sequence) else list(self.items)
+        longest_opening_tag = self._opening_tag(self.starting_number + len(items))
+        list_pages = []
+        page_length = max_length - len(longest_opening_tag) - len(self.closing_tag())
+        number = self.starting_number
+        # Each item is rendered as one fragment, so the items on each page are the next as many items as it has fragments.
+        start = 0
+
+        for page_items in paginate(self._iter_list_items(items, compact), page_length):
+            list_pages.append(Markup(f'{self._opening_tag(number)}{"".join(page_items)}{self.closing_tag()}'))
+            # Nested lists are not numbered, so only count the other items.
+            number += sum(1 for item in items[start:start + len(page_items)] if not isinstance(item, HtmlList))
+            start += len(page_items)
+
+        return list_pages
+
+    def opening_tag(self) -> str:
+        return self._opening_tag(self.starting_number)
+
+    def closing_tag(self) -> str:
+        return '</ol>'
+
+    @staticmethod
+    def _opening_tag(starting_number: int) -> str:
+        if starting_number != 1:
+            return f'<ol start="{starting_number}">'
 
-        return f'{opening_tag}{self.build_list_contents()}</ol>'
+        return '<ol>'
 
 
 @dataclass
@@ -63,29 +241,77 @@ class UnorderedList(HtmlList):
 
     To turn this UnorderedList into an HTML string, simply cast this object to a str.
     """
-    def __str__(self) -> str:
-        return f'<ul>{self.build_list_contents()}</ul>'
+    def opening_tag(self) -> str:
+        return '<ul>'
 
+    def closing_tag(self) -> str:
+        return '</ul>'
 
-def task_list(items: List[str], items_to_check: Optional[List[int]] = None) -> str:
+
+@instrumented('task_list')
+def task_list(items: Iterable[Union[str, Tuple[str, bool]]], items_to_check: Optional[Iterable[int]] = None) -> Markup:
     """Creates a task list in GitHub Flavored Markdown where each item can be checked off. This task list cannot be used
     inside a table.
 
+    Each item is either a string, which is checked off if its index is in items_to_check, or an (item, checked) pair.
+
     :param items: The items in the task list
     :param items_to_check: The indices (starting from 0) of the items that should be checked off
 
     :raises: Exception if an index in items_to_check does not exist in the items list
     """
-    if not items_to_check:
-        items_to_check = []
+    return Markup(''.join(iter_task_list(items, items_to_check)))
 
-    for index in items_to_check:
-        if index < 0 or index > len(items) - 1:
-            raise Exception(f'Cannot check off non-existent index {index} in task list')
 
-    task_list_syntax = ''
+def iter_task_list(items: Iterable[Union[str, Tuple[str, bool]]],
+                   items_to_check: Optional[Iterable[int]] = None) -> Iterator[str]:
+    """Creates a task list like task_list(), yielding it one line at a time. Every line after the first starts with the
+    newline that separates it from the line before it.
+
+    Since the items are consumed lazily, they can come from any iterable such as a generator, and only one item needs to be
+    held in memory at a time. Indices in items_to_check past the end of the items can only be detected once every item has
+    been consumed, so in that case the exception is raised after the last line.
+
+    :param items: The items in the task list, each either a string or an (item, checked) pair
+    :param items_to_check: The indices (starting from 0) of the items that should be checked off
+
+    :raises: Exception if an index in items_to_check does not exist in the items list
+    """
+    indices_to_check = set(items_to_check) if items_to_check else set()
+
+    if indices_to_check and min(indices_to_check) < 0:
+        raise Exception(f'Cannot check off non-existent index {min(indices_to_check)} in task list')
+
+    largest_index_to_check = max(indices_to_check, default=-1)
+    escaping = autoescape_enabled()
+    index = -1
 
     for index, item in enumerate(items):
-        task_list_syntax += f'- [{"x" if index in items_to_check else " "}] {item}\n'
+        if isinstance(item, tuple):
+            item, checked = item
+        else:
+            checked = index in indices_to_check
+
+        if escaping:
+            item = escape(item)
+
+        line = f'- [x] {item}' if checked else f'- [ ] {item}'
+        yield f'\n{line}' if index else line
+
+    if largest_index_to_check > index:
+        raise Exception(f'Cannot check off non-existent index {largest_index_to_check} in task list')
 
-    return task_list_syntax.rstrip('\n')
+
+def write_task_list(stream: TextIO, items: Iterable[Union[str, Tuple[str, bool]]],
+                    items_to_check: Optional[Iterable[int]] = None) -> None:
+    """Creates a task list like task_list() and writes it straight into a file-like object, one line at a time.
+
+    :param stream: The file-like object the task list will be written to
+    :param items: The items in the task list, each either a string or an (item, checked) pair
+    :param items_to_check: The indices (starting from 0) of the items that should be checked off
+
+    :raises: Exception if an index in items_to_check does not exist in the items list
+    """
+    write = stream.write
+    for line in iter_task_list(items, items_to_check):
+        write(line)
@@ -1,5 +1,28 @@
+from __future__ import annotations
+from contextlib import contextmanager
+from contextvars import ContextVar
 from enum import Enum
-from typing import List, Optional
+from functools import lru_cache
+from itertools import chain, islice
+from typing import Any, Iterable, Iterator, List, Mapping, Optional, Sequence, TextIO, Tuple, Union
+
+from githubmarkdownui.budget import render_pages, render_within_budget
+from githubmarkdownui.constants import GITHUB_COMMENT_MAX_LENGTH
+from githubmarkdownui.emitter import closing_tag, resolve_compact
+from githubmarkdownui.escape import Markup, autoescape_enabled, escape, escape_rows
+from githubmarkdownui.fingerprint import fingerprint_values
+from githubmarkdownui.instrumentation import instrumented
+from githubmarkdownui.parallel import chunk_bounds, render_chunks
+
+_TABLE_CLOSING_TAGS = '</tbody></table>'
+# The number of distinct cell values each TableTemplate remembers the escaped text of.
+_INTERNED_CELL_COUNT = 1024
+# The number of rows whose cells are checked at once for characters that have to be escaped in Markdown syntax.
+_ROW_BATCH_SIZE = 64
+# The characters that would end a cell or a row of a table in Markdown syntax.
+_MARKDOWN_CELL_ESCAPE_TABLE = str.maketrans({'\\': '\\\\', '|': '\\|', '\n': '<br>'})
+
+_inside_html_block: ContextVar[bool] = ContextVar('inside_html_block', default=False)
 
 
 class TableAlignmentError(Exception):
@@ -16,8 +39,31 @@ class TableAlignment(Enum):
     RIGHT = 'right'
 
 
-def table(content: List[List[str]], alignment: List[Optional[TableAlignment]] = None) -> str:
-    """Creates a table using HTML syntax.
+class TableFormat(Enum):
+    """The syntax a table is created with. HTML tables can be placed anywhere, including inside collapsible sections and
+    other HTML blocks. Markdown pipe tables, such as |a|b| with a |:-|-:| row below it, take far fewer characters but are
+    not rendered inside HTML blocks, and their cells are rendered as inline Markdown. AUTO picks whichever of the two is
+    shorter for each table, see choose_table_format().
+    """
+    HTML = 'html'
+    MARKDOWN = 'markdown'
+    AUTO = 'auto'
+
+
+# The cell of the delimiter row of a Markdown table for each alignment.
+_MARKDOWN_DELIMITERS = {
+    None: '-',
+    TableAlignment.LEFT: ':-',
+    TableAlignment.CENTER: ':-:',
+    TableAlignment.RIGHT: '-:',
+}
+
+
+@instrumented('table')
+def table(content: List[List[str]], alignment: List[Optional[TableAlignment]] = None, max_length: Optional[int] = None,
+          table_format: TableFormat = TableFormat.HTML, compact: Optional[bool] = None,
+          workers: Optional[int] = None) -> Markup:
+    """Creates a table using HTML syntax, or Markdown syntax if the table format says so.
 
     The content parameter is a list containing lists of equal length, which correspond to the contents of the table.
     The first sublist is the table headers, and each remaining sublist is one row of the table.
@@ -33,45 +79,571 @@ def table(content: List[List[str]], alignment: List[Optional[TableAlignment]] =
     :param content: A list of lists containing the contents of the table
     :param alignment: An optional list specifying how each column of the table should be aligned. This list must be the
     same length as the sublists of the content parameter
+    :param max_length: If given, the table will not be longer than this many characters. Rows are rendered until the next
+    one does not fit, and the remaining rows are replaced by a final row saying how many rows were omitted
+    :param table_format: The syntax to create the table with. See TableFormat. The cells of a Markdown table are rendered as
+    inline Markdown, and only their | and \\ characters and newlines are escaped, so a cell such as *important* or `code`
+    is displayed in italics or as code. This also applies to TableFormat.AUTO whenever it picks Markdown, so AUTO can change
+    how cells are displayed
+    :param compact: Whether to leave out optional closing tags from an HTML table. If not given, this is enabled inside
+    githubmarkdownui.emitter.compact_html()
+    :param workers: If given, the rows of a table with hundreds of thousands of rows are split into chunks that are rendered
+    by this many processes at once, such as os.cpu_count(), and the output is identical. This is not used with max_length.
+    See githubmarkdownui.parallel.render_chunks
+
+    :raises: TableAlignmentError when the alignment parameter is not the same length as the sublists of content
+    :raises: TableDimensionError when the sublists of content do not contain the same number of elements, or one of them is
+    a string instead of a list of cells
+    :raises: BudgetError when the table headers alone do not fit in max_length
+    """
+    if table_format == TableFormat.AUTO:
+        table_format = choose_table_format(content, alignment, compact)
+
+    template = compile_table(alignment, len(content[0]), table_format, compact)
+
+    if max_length is None:
+        bounds = chunk_bounds(len(content) - 1, workers) if workers else []
+        if len(bounds) <= 1:
+            return template.render(content)
+
+        rows = render_chunks(_render_table_chunk, (content, template.alignment, template.columns, table_format,
+                                                   template.compact), bounds, workers)
+
+        return Markup(f'{template.head(content[0])}{"".join(rows)}{template.closing_tags}')
+
+    return Markup(render_within_budget(template.head(content[0]), template.iter_rows(islice(content, 1, None)),
+                                       template.closing_tags, max_length, template.omission_marker,
+                                       item_count=len(content) - 1))
+
+
+@instrumented('table_pages')
+def table_pages(content: List[List[str]], alignment: List[Optional[TableAlignment]] = None,
+                max_length: int = GITHUB_COMMENT_MAX_LENGTH, table_format: TableFormat = TableFormat.HTML,
+                compact: Optional[bool] = None) -> List[str]:
+    """Creates a table like table(), but splits its rows across multiple tables so that no table is longer than the given
+    maximum length. Each table repeats the table headers.
+
+    :param content: A list of lists containing the contents of the table
+    :param alignment: An optional list specifying how each column of the table should be aligned
+    :param max_length: The maximum length of each table, which defaults to the maximum length of a GitHub comment
+    :param table_format: The syntax to create the tables with. See TableFormat
+    :param compact: Whether to leave out optional closing tags from HTML tables, as in table()
 
     :raises: TableAlignmentError when the alignment parameter is not the same length as the sublists of content
     :raises: TableDimensionError when the sublists of content do not contain the same number of elements
+    :raises: BudgetError when a single row does not fit in a table of max_length
+    """
+    if table_format == TableFormat.AUTO:
+        table_format = choose_table_format(content, alignment, compact)
+
+    template = compile_table(alignment, len(content[0]), table_format, compact)
+
+    return render_pages(template.head(content[0]), template.iter_rows(islice(content, 1, None)), template.closing_tags,
+                        max_length)
+
+
+def iter_table(header: Sequence[str], rows: Iterable[Sequence[str]], alignment: List[Optional[TableAlignment]] = None,
+               table_format: TableFormat = TableFormat.HTML, compact: Optional[bool] = None) -> Iterator[str]:
+    """Creates a table using HTML or Markdown syntax, yielding it one fragment at a time. The first fragment contains the
+    table headers, each following fragment contains one row of the table, and the last fragment closes the table.
+
+    Since the rows are consumed lazily, they can come from any iterable such as a generator or a csv.reader, and only one
+    row needs to be held in memory at a time. Each row is validated as it is consumed.
+
+    :param header: The headers of the table
+    :param rows: An iterable of rows, where each row has the same number of elements as the header
+    :param alignment: An optional list specifying how each column of the table should be aligned. This list must be the
+    same length as the header
+    :param table_format: The syntax to create the table with, which cannot be AUTO since the rows are only read once
+    :param compact: Whether to leave out optional closing tags from an HTML table, as in table()
+
+    :raises: TableAlignmentError when the alignment parameter is not the same length as the header
+    :raises: TableDimensionError when a row does not have the same number of elements as the header
+    :raises: ValueError if the table format is AUTO
     """
-    # Check if the inputs are valid. The content parameter must be a m x n matrix and alignment must be the same length as
-    # one element in content.
-    if not all(isinstance(row, list) and len(row) == len(content[0]) for row in content):
-        raise TableDimensionError('Each row in the table must have the same number of columns')
+    yield from compile_table(alignment, len(header), table_format, compact).iter_table(header, rows)
+
+
+@instrumented('table')
+def table_from_columns(columns: Union[Mapping[str, Sequence[str]], Sequence[Sequence[str]]],
+                       headers: Optional[Sequence[str]] = None,
+                       alignment: List[Optional[TableAlignment]] = None, compact: Optional[bool] = None) -> Markup:
+    """Creates a table using HTML syntax from column oriented data, without transposing it into rows first. The output is
+    identical to calling table() with the same data laid out as rows.
+
+    The columns parameter is either a mapping from each header to the contents of its column, such as a dict of lists or a
+    pandas DataFrame, or a sequence of columns, such as a list of lists or the transpose of a 2D NumPy array. Each cell is
+    converted with str(), so the columns do not need to contain strings.
+
+    For example, the columns parameter {'column 1': ['hello', 'foo'], 'column 2': ['world', 'bar']} would create the same
+    table as the content parameter [['column 1', 'column 2'], ['hello', 'world'], ['foo', 'bar']] of table().
+
+    :param columns: A mapping from each header to its column, or a sequence of columns
+    :param headers: The headers of the table. This is required if columns is not a mapping, otherwise it can be used to
+    select and order the columns of the mapping
+    :param alignment: An optional list specifying how each column of the table should be aligned. This list must be the
+    same length as the headers
+    :param compact: Whether to leave out optional closing tags, as in table()
+
+    :raises: Exception if the headers are not given and the columns are not a mapping
+    :raises: TableAlignmentError when the alignment parameter is not the same length as the headers
+    :raises: TableDimensionError when the columns do not all have the same length, or there is not one header per column
+    """
+    if hasattr(columns, 'keys'):
+        if headers is None:
+            headers = list(columns.keys())
+        columns = [columns[header] for header in headers]
+    elif headers is None:
+        raise Exception('The headers must be given when the columns are not a mapping')
+
+    if len(columns) != len(headers) or any(len(column) != len(columns[0]) for column in columns):
+        raise TableDimensionError('Each column in the table must have the same number of rows')
 
-    if alignment and len(alignment) != len(content[0]):
-        raise TableAlignmentError('The alignment parameter is not the same length as a row in the table')
+    # zip() walks the columns lazily, so no transposed copy is made. Converting and slotting in one column at a time was
+    # measured as well, and was about twice as slow as formatting each row with the row template, since the str() of each
+    # cell costs the same either way and the row template does the rest of the work in a single operation.
+    return compile_table(alignment, len(headers), compact=compact).render_rows(headers, zip(*columns))
 
-    table_syntax = '<table><thead><tr>'
 
-    # Build the table header.
-    for index, item in enumerate(content[0]):
-        if alignment and alignment[index]:
-            table_syntax += f'<th align="{alignment[index].value}">'
-        else:
-            table_syntax += '<th>'
+def choose_table_format(content: Sequence[Sequence[Any]], alignment: List[Optional[TableAlignment]] = None,
+                        compact: Optional[bool] = None) -> TableFormat:
+    """Returns whichever of TableFormat.HTML and TableFormat.MARKDOWN creates the shorter table from the given content, as
+    TableFormat.AUTO does. Both formats contain the same cell text, so the lengths are worked out from the tags around the
+    cells and the | and \\ characters that have to be escaped in Markdown, without rendering the table either way.
 
-        table_syntax += f'{item}</th>'
+    HTML is always chosen inside inside_html_block(), or when a cell contains a newline, since a newline can only be
+    displayed in a Markdown table as a line break.
 
-    table_syntax += '</tr></thead><tbody>'
+    :param content: The contents of the table as given to table(), with the headers first
+    :param alignment: An optional list specifying how each column of the table should be aligned
+    :param compact: Whether the HTML table would leave out optional closing tags, as in table()
+
+    :raises: TableAlignmentError when the alignment parameter is not the same length as the sublists of content
+    """
+    if _inside_html_block.get():
+        return TableFormat.HTML
+
+    columns = len(content[0])
+    html_template = compile_table(alignment, columns, TableFormat.HTML, compact)
+    markdown_template = compile_table(alignment, columns, TableFormat.MARKDOWN)
+    # The number of characters Markdown syntax saves, before escaping any | or \ characters.
+    saved_length = html_template.markup_length(len(content) - 1) - markdown_template.markup_length(len(content) - 1)
+    # Autoescaping replaces | with an entity in either format, so only newlines and backslashes have to be looked for.
+    escaping = autoescape_enabled()
+
+    for batch in _iter_row_batches(content):
+        text = _join_cells(batch)
+        if '\n' in text:
+            return TableFormat.HTML
+        if not escaping:
+            saved_length -= text.count('|')
+        if '\\' in text:
+            saved_length -= text.count('\\') + sum(str(cell).endswith('\\') for row in batch for cell in row)
+
+    return TableFormat.MARKDOWN if saved_length > 0 else TableFormat.HTML
+
+
+@contextmanager
+def inside_html_block() -> Iterator[None]:
+    """Makes tables created with TableFormat.AUTO inside the with block use HTML syntax, for tables that will be placed in
+    an HTML block such as collapsible_section() or code_block(), where Markdown syntax is not rendered. For example:
+
+    with inside_html_block():
+        section = collapsible_section('Results', table(content, table_format=TableFormat.AUTO))
+
+    MarkdownDocument does the same for tables added inside its collapsible sections.
+    """
+    token = _inside_html_block.set(True)
+    try:
+        yield
+    finally:
+        _inside_html_block.reset(token)
+
+
+def table_fingerprint(content: Iterable[Sequence[Any]], alignment: List[Optional[TableAlignment]] = None) -> str:
+    """Returns a fingerprint of the contents and alignment of a table, as a string of hex digits, without rendering it.
+    Tables that would be rendered the same way by table() have the same fingerprint in every process and on every version
+    of Python, so it can be compared with the fingerprint of a table that was posted before to skip posting it again. The
+    rows are hashed one batch at a time, so the content can be a generator. See githubmarkdownui.fingerprint.
+
+    :param content: The contents of the table as given to table(), with the headers first
+    :param alignment: An optional list specifying how each column of the table should be aligned
+    """
+    content = iter(content)
+    header = next(content)
+    # No alignment is displayed the same way as leaving every column unaligned.
+    alignment = alignment or [None] * len(header)
+
+    return fingerprint_values(chain(('table', len(alignment)), alignment, _iter_row_values(chain((header,), content))))
+
+
+class TableWriter:
+    """Writes a table using HTML syntax straight into a file-like object, one row at a time. The table headers are written
+    when the writer is created and the table is closed when close() is called, or when the writer is used as a context
+    manager and the with block exits. If the with block exits because of an exception, the table is left unclosed, so a
+    partly written table does not look complete. For example:
+
+    with TableWriter(stream, ['column 1', 'column 2']) as writer:
+        for row in rows:
+            writer.write_row(row)
+    """
+
+    def __init__(self, stream: TextIO, header: Sequence[str], alignment: List[Optional[TableAlignment]] = None,
+                 table_format: TableFormat = TableFormat.HTML, compact: Optional[bool] = None):
+        """
+        :param stream: The file-like object the table will be written to
+        :param header: The headers of the table
+        :param alignment: An optional list specifying how each column of the table should be aligned. This list must be
+        the same length as the header
+        :param table_format: The syntax to write the table with, which cannot be AUTO
+        :param compact: Whether to leave out optional closing tags from an HTML table, as in table()
+
+        :raises: TableAlignmentError when the alignment parameter is not the same length as the header
+        :raises: ValueError if the table format is AUTO
+        """
+        self.stream = stream
+        self._template = compile_table(alignment, len(header), table_format, compact)
+        self._closed = False
+
+        stream.write(self._template.head(header))
+
+    def write_row(self, row: Sequence[str]) -> None:
+        """Writes one row of the table. The cells are escaped if autoescaping is enabled when the row is written.
+
+        :param row: The row to write, which must have the same number of elements as the header
+
+        :raises: TableDimensionError when the row does not have the same number of elements as the header
+        """
+        if self._closed:
+            raise ValueError('Cannot write a row to a closed table')
+
+        self.stream.write(self._template.format_row(row))
+
+    def write_rows(self, rows: Iterable[Sequence[str]]) -> None:
+        """Writes each row in the given iterable.
+
+        :param rows: An iterable of rows, where each row has the same number of elements as the header
+        """
+        for row in rows:
+            self.write_row(row)
+
+    def close(self) -> None:
+        """Closes the table. The underlying stream is left open."""
+        if not self._closed:
+            self.stream.write(self._template.closing_tags)
+            self._closed = True
+
+    def __enter__(self) -> TableWriter:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if exc_info[0] is None:
+            self.close()
+
+
+class TableTemplate:
+    """A table schema, made up of a number of columns and how each column is aligned, compiled ahead of time so that any
+    number of tables with that schema can be rendered without working out the tags of each cell again. Each row is rendered
+    by a single formatting operation, and the output is identical to table(). For example:
+
+    template = compile_table([TableAlignment.LEFT, None], 2)
+    for content in contents:
+        stream.write(template.render(content))
+
+    When autoescaping is enabled, the template remembers the escaped text of repeated cell values, such as status emojis
+    or N/A, so each value is only escaped once. A compact template leaves out optional closing tags, see
+    githubmarkdownui.emitter.compact_html.
+    """
+    # The text at the end of each table.
+    closing_tags = _TABLE_CLOSING_TAGS
 
-    # Build the table body. Skip the first list in content because that is the table headers.
-    for row in content[1:]:
-        table_syntax += '<tr>'
+    def __init__(self, columns: int, alignment: Optional[Sequence[Optional[TableAlignment]]] = None, compact: bool = False):
+        """
+        :param columns: The number of columns in the table
+        :param alignment: An optional list specifying how each column of the table should be aligned. This list must be the
+        same length as the number of columns
+        :param compact: Whether to leave out the optional closing tags of cells and rows
 
-        for index, item in enumerate(row):
-            if alignment and alignment[index]:
-                table_syntax += f'<td align="{alignment[index].value}">'
+        :raises: TableAlignmentError when the alignment parameter is not the same length as the number of columns
+        """
+        if alignment and len(alignment) != columns:
+            raise TableAlignmentError('The alignment parameter is not the same length as a row in the table')
+
+        self.columns = columns
+        self.alignment = tuple(alignment) if alignment else None
+        self.compact = compact
+        self._head_template, self._row_template = self._build_templates()
+        self._interned_escape = lru_cache(maxsize=_INTERNED_CELL_COUNT, typed=True)(escape)
+
+    def head(self, header: Sequence[Any]) -> str:
+        """Renders the opening tags of a table, including the table headers.
+
+        :param header: The headers of the table
+
+        :raises: TableDimensionError when the header does not have the same number of elements as there are columns
+        """
+        return self._format(self._head_template, self._escape_cells(_check_row(header)))
+
+    def format_row(self, row: Sequence[Any]) -> str:
+        """Renders one row of a table. The cells are escaped if autoescaping is enabled.
+
+        :param row: The row to render
+
+        :raises: TableDimensionError when the row does not have the same number of elements as there are columns
+        """
+        return self._format(self._row_template, self._escape_cells(_check_row(row)))
+
+    def iter_rows(self, rows: Iterable[Sequence[Any]]) -> Iterator[str]:
+        """Renders each row in the given iterable, one row at a time.
+
+        :param rows: An iterable of rows, where each row has the same number of elements as there are columns
+
+        :raises: TableDimensionError when a row does not have the same number of elements as there are columns
+        """
+        row_template = self._row_template
+
+        for row in self._escape_rows(rows):
+            if isinstance(row, (str, bytes)):
+                _check_row(row)
+            try:
+                yield row_template % tuple(row)
+            except TypeError:
+                self._check_dimensions(row)
+                raise
+
+    def iter_table(self, header: Sequence[Any], rows: Iterable[Sequence[Any]]) -> Iterator[str]:
+        """Renders a table one fragment at a time, the same way as githubmarkdownui.blocks.table.iter_table.
+
+        :param header: The headers of the table
+        :param rows: An iterable of rows, where each row has the same number of elements as the header
+
+        :raises: TableDimensionError when the header or a row does not have the same number of elements as there are columns
+        """
+        yield self.head(header)
+        yield from self.iter_rows(rows)
+        yield self.closing_tags
+
+    def render_rows(self, header: Sequence[Any], rows: Iterable[Sequence[Any]]) -> Markup:
+        """Renders a table from its headers and an iterable of rows.
+
+        :param header: The headers of the table
+        :param rows: An iterable of rows, where each row has the same number of elements as the header
+
+        :raises: TableDimensionError when the header or a row does not have the same number of elements as there are columns
+        """
+        return Markup(''.join(self.iter_table(header, rows)))
+
+    def render(self, content: Sequence[Sequence[Any]]) -> Markup:
+        """Renders a table the same way as table(), where the first element of content is the table headers and each
+        remaining element is one row of the table.
+
+        :param content: A list of lists containing the contents of the table
+
+        :raises: TableDimensionError when the sublists of content do not have the same number of elements as there are
+        columns
+        """
+        return self.render_rows(content[0], islice(content, 1, None))
+
+    def omission_marker(self, omitted_count: int) -> str:
+        """Renders the row that replaces the rows left out of a table that was too long.
+
+        :param omitted_count: The number of rows that were left out
+        """
+        return f'<tr><td colspan="{self.columns}">{omitted_count} more rows omitted{closing_tag("td", self.compact)}' \
+            f'{closing_tag("tr", self.compact)}'
+
+    def markup_length(self, rows: int) -> int:
+        """Returns the number of characters in a table with the given number of rows, apart from the text of the cells.
+
+        :param rows: The number of rows in the table, not counting the headers
+        """
+        # Each cell is a %s in the templates.
+        return len(self._head_template) + rows * len(self._row_template) + len(self.closing_tags) - \
+            2 * self.columns * (rows + 1)
+
+    def _build_templates(self) -> Tuple[str, str]:
+        """Returns the templates of the opening tags of a table, including the table headers, and of each row."""
+        alignment = self.alignment
+        row_attributes = ''
+        if self.compact and alignment and alignment[0] and alignment.count(alignment[0]) == self.columns:
+            # Cells take the alignment of their row, so when every column has the same alignment it is only set once per row.
+            row_attributes = f' align="{alignment[0].value}"'
+            alignment = None
+
+        # The tags never contain a % character, so they need no escaping.
+        header_cells = ''.join([f'{tag}%s{closing_tag("th", self.compact)}'
+                                for tag in _opening_tags('th', alignment, self.columns)])
+        row_cells = ''.join([f'{tag}%s{closing_tag("td", self.compact)}'
+                             for tag in _opening_tags('td', alignment, self.columns)])
+        row_closing_tag = closing_tag('tr', self.compact)
+
+        return f'<table><thead><tr{row_attributes}>{header_cells}{row_closing_tag}</thead><tbody>', \
+            f'<tr{row_attributes}>{row_cells}{row_closing_tag}'
+
+    def _escape_cells(self, cells: Sequence[Any]) -> Sequence[Any]:
+        if autoescape_enabled():
+            return [self._escape_cell(cell) for cell in cells]
+
+        return cells
+
+    def _escape_rows(self, rows: Iterable[Sequence[Any]]) -> Iterable[Sequence[Any]]:
+        if autoescape_enabled():
+            return escape_rows(rows, self._escape_cell)
+
+        return rows
+
+    def _escape_cell(self, cell: Any) -> Markup:
+        try:
+            return self._interned_escape(cell)
+        except TypeError:
+            # The cell cannot be used as a dictionary key, so it cannot be interned.
+            return escape(cell)
+
+    def _format(self, template: str, cells: Sequence[Any]) -> str:
+        try:
+            return template % tuple(cells)
+        except TypeError:
+            self._check_dimensions(cells)
+            raise
+
+    def _check_dimensions(self, cells: Sequence[Any]) -> None:
+        if len(cells) != self.columns:
+            raise TableDimensionError('Each row in the table must have the same number of columns') from None
+
+
+class MarkdownTableTemplate(TableTemplate):
+    """A TableTemplate that renders tables using Markdown syntax, such as:
+
+    |column 1|column 2|
+    |-:|-|
+    |this is a long string|hello|
+
+    Any | and \\ characters in the cells are escaped with a backslash, and newlines are replaced with <br> tags, so they cannot
+    end a cell or a row. A cell that ends with a backslash is followed by a space, since Markdown parsers such as markdown-it
+    read a | after a backslash as escaped even when that backslash is escaped itself. Each row starts with a newline, so the
+    table ends without one.
+    """
+    closing_tags = ''
+
+    def omission_marker(self, omitted_count: int) -> str:
+        # Markdown tables have no colspan, but missing cells at the end of a row are left empty.
+        return f'\n|{omitted_count} more rows omitted|'
+
+    def _build_templates(self) -> Tuple[str, str]:
+        alignment = self.alignment or [None] * self.columns
+        delimiter_row = ''.join([f'{_MARKDOWN_DELIMITERS[align]}|' for align in alignment])
+
+        return f'|{"%s|" * self.columns}\n|{delimiter_row}', f'\n|{"%s|" * self.columns}'
+
+    def _escape_cells(self, cells: Sequence[Any]) -> Sequence[Any]:
+        return _escape_markdown_cells(super()._escape_cells(cells))
+
+    def _escape_rows(self, rows: Iterable[Sequence[Any]]) -> Iterable[Sequence[Any]]:
+        for batch in _iter_row_batches(super()._escape_rows(rows)):
+            text = _join_cells(batch)
+            if '|' in text or '\n' in text or '\\' in text:
+                yield from map(_escape_markdown_cells, batch)
             else:
-                table_syntax += '<td>'
+                yield from batch
+
+
+def compile_table(alignment: Optional[Sequence[Optional[TableAlignment]]], columns: int,
+                  table_format: TableFormat = TableFormat.HTML, compact: Optional[bool] = None) -> TableTemplate:
+    """Compiles a TableTemplate for tables with the given number of columns and alignment. Templates are cached, so
+    compiling the same schema again returns the same template, and table() reuses them as well.
+
+    :param alignment: An optional list specifying how each column of the table should be aligned. This list must be the
+    same length as the number of columns
+    :param columns: The number of columns in the table
+    :param table_format: The syntax of the tables, which cannot be AUTO since a template does not know its tables in advance
+    :param compact: Whether to leave out optional closing tags from HTML tables. If not given, this is enabled if compiled
+    inside githubmarkdownui.emitter.compact_html(), and the template keeps that setting wherever it is used afterwards
+
+    :raises: TableAlignmentError when the alignment parameter is not the same length as the number of columns
+    :raises: ValueError if the table format is AUTO
+    """
+    if table_format == TableFormat.AUTO:
+        raise ValueError('A table template cannot choose its table format, since it does not know the tables in advance')
+
+    # Markdown tables have no closing tags, so they are never compact.
+    compact = table_format == TableFormat.HTML and resolve_compact(compact)
+
+    return _compile_table(tuple(alignment) if alignment else None, columns, table_format, compact)
+
+
+@lru_cache(maxsize=256)
+def _compile_table(alignment: Optional[Tuple[Optional[TableAlignment], ...]], columns: int, table_format: TableFormat,
+                   compact: bool) -> TableTemplate:
+    if table_format == TableFormat.MARKDOWN:
+        return MarkdownTableTemplate(columns, alignment)
+
+    return TableTemplate(columns, alignment, compact)
+
+
+def _render_table_chunk(worker_input: tuple, start: int, stop: int) -> str:
+    """Renders the rows of a table from start to stop, not counting the headers, for table() with workers."""
+    content, alignment, columns, table_format, compact = worker_input
+    template = _compile_table(alignment, columns, table_format, compact)
+
+    return ''.join(template.iter_rows(islice(content, start + 1, stop + 1)))
+
+
+def _escape_markdown_cells(cells: Sequence[Any]) -> Sequence[Any]:
+    """Escapes the | and \\ characters and newlines in each cell of a row of a Markdown table."""
+    # Most rows have nothing to escape, and checking the whole row at once is much faster than checking each cell.
+    text = _join_cells((cells,))
+    if '|' not in text and '\n' not in text and '\\' not in text:
+        return cells
+
+    return [_escape_markdown_cell(str(cell)) for cell in cells]
+
+
+def _escape_markdown_cell(text: str) -> str:
+    text = text.translate(_MARKDOWN_CELL_ESCAPE_TABLE)
+
+    # The | that ends the cell could be read as escaped after a backslash. Spaces around a cell are not displayed.
+    return f'{text} ' if text.endswith('\\') else text
+
+
+def _check_row(row: Sequence[Any]) -> Sequence[Any]:
+    # A string is a sequence as well, but formatting one as a row would put each of its characters in a cell of its own.
+    if isinstance(row, (str, bytes)):
+        raise TableDimensionError('Each row in the table must be a list of cells, not a string')
+
+    return row
+
+
+def _iter_row_batches(rows: Iterable[Sequence[Any]]) -> Iterator[List[Sequence[Any]]]:
+    rows = iter(rows)
+
+    while True:
+        batch = list(islice(rows, _ROW_BATCH_SIZE))
+        if not batch:
+            return
+
+        yield batch
+
+
+def _join_cells(rows: Iterable[Sequence[Any]]) -> str:
+    """Joins the text of every cell of the given rows together, so they can all be searched at once."""
+    try:
+        return ''.join(map(''.join, rows))
+    except TypeError:
+        # Some cells are not strings, so each cell has to be converted on its own.
+        return ''.join([str(cell) for row in rows for cell in row])
+
 
-            table_syntax += f'{item}</td>'
+def _iter_row_values(rows: Iterable[Sequence[Any]]) -> Iterator[Any]:
+    # Each row starts with its length, so the cells of one row cannot run into the next. Each cell is rendered as its str(),
+    # so cells such as 1 and '1' that are rendered the same way are hashed the same way.
+    for row in rows:
+        yield len(row)
+        yield from map(str, row)
 
-        table_syntax += '</tr>'
 
-    table_syntax += '</tbody></table>'
+def _opening_tags(tag: str, alignment: Optional[Sequence[Optional[TableAlignment]]], columns: int) -> List[str]:
+    """Works out the opening tag of each column once, so it does not have to be looked up again for every cell."""
+    if not alignment:
+        return [f'<{tag}>'] * columns
 
-    return table_syntax
+    return [f'<{tag} align="{align.value}">' if align else f'<{tag}>' for align in alignment]
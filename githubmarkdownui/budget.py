@@ -0,0 +1,108 @@
+from typing import Callable, Iterable, Iterator, List, Optional
+
+
+class BudgetError(Exception):
+    """Raised when the output cannot fit in the given maximum length, even after omitting content from it."""
+
+
+def render_within_budget(head: str, items: Iterable[str], tail: str, max_length: int, omission_marker: Callable[[int], str],
+                         separator: str = '', item_count: Optional[int] = None) -> str:
+    """Renders a block consisting of a head, a number of items joined by a separator, and a tail, without letting the output
+    grow past the given maximum length. The items are consumed one at a time and rendering stops at the first item that does
+    not fit. Any items that were left out are replaced with a marker such as "5 more rows omitted", and enough of the
+    preceding items are dropped to make room for that marker.
+
+    :param head: The text at the start of the block, such as the opening tags of a table
+    :param items: The items of the block, such as the rows of a table. This should be a lazy iterable so that items that do
+    not fit are never rendered
+    :param tail: The text at the end of the block, such as the closing tags of a table
+    :param max_length: The maximum length of the output
+    :param omission_marker: A function that takes the number of omitted items and returns the item to display instead
+    :param separator: The text placed between each item
+    :param item_count: The total number of items. If not given, any remaining items are consumed in order to count them
+
+    :raises: BudgetError if the head, the tail and the omission marker alone do not fit in the maximum length
+    """
+    rendered_items = []
+    length = len(head) + len(tail)
+    items = iter(items)
+
+    for item in items:
+        added_length = len(item) + (len(separator) if rendered_items else 0)
+
+        if length + added_length > max_length:
+            break
+
+        rendered_items.append(item)
+        length += added_length
+    else:
+        return f'{head}{separator.join(rendered_items)}{tail}'
+
+    if item_count is None:
+        omitted_count = 1 + sum(1 for _ in items)
+    else:
+        omitted_count = item_count - len(rendered_items)
+
+    # Drop items from the end until the marker fits. Dropping an item can make the marker longer, so check again each time.
+    marker = omission_marker(omitted_count)
+    while rendered_items and length + len(separator) + len(marker) > max_length:
+        dropped_item = rendered_items.pop()
+        length -= len(dropped_item) + (len(separator) if rendered_items else 0)
+        omitted_count += 1
+        marker = omission_marker(omitted_count)
+
+    if length + (len(separator) if rendered_items else 0) + len(marker) > max_length:
+        raise BudgetError(f'The output cannot fit in {max_length} characters')
+
+    rendered_items.append(marker)
+
+    return f'{head}{separator.join(rendered_items)}{tail}'
+
+
+def render_pages(head: str, items: Iterable[str], tail: str, max_length: int, separator: str = '') -> List[str]:
+    """Splits a block consisting of a head, a number of items joined by a separator, and a tail into multiple pages, where
+    each page repeats the head and the tail and is no longer than the given maximum length. This can be used to split up
+    output that is too long for a single GitHub comment.
+
+    :param head: The text at the start of each page, such as the opening tags of a table
+    :param items: The items of the block, such as the rows of a table
+    :param tail: The text at the end of each page, such as the closing tags of a table
+    :param max_length: The maximum length of each page
+    :param separator: The text placed between each item on a page
+
+    :raises: BudgetError if a single item does not fit on a page by itself
+    """
+    return [f'{head}{separator.join(page_items)}{tail}'
+            for page_items in paginate(items, max_length - len(head) - len(tail), separator)]
+
+
+def paginate(items: Iterable[str], max_length: int, separator: str = '') -> Iterator[List[str]]:
+    """Groups the given items into pages, where the items on each page joined by the separator are no longer than the given
+    maximum length. At least one page is always yielded, even if there are no items.
+
+    :param items: The items to group into pages
+    :param max_length: The maximum length of the items on each page, including the separators between them
+    :param separator: The text placed between each item on a page
+
+    :raises: BudgetError if a single item is longer than the maximum length
+    """
+    page_items = []
+    length = 0
+
+    for item in items:
+        if len(item) > max_length:
+            raise BudgetError(f'An item of length {len(item)} cannot fit on a page of {max_length} characters')
+
+        added_length = len(item) + (len(separator) if page_items else 0)
+
+        if length + added_length > max_length:
+            yield page_items
+            page_items = []
+            length = 0
+            added_length = len(item)
+
+        page_items.append(item)
+        length += added_length
+
+    # The last page always holds at least one item, unless there were no items at all.
+    yield page_items
@@ -1,57 +1,230 @@
 from __future__ import annotations
-from dataclasses import dataclass
+import re
+from array import array
+from collections import Counter
+from dataclasses import dataclass, field, fields, replace
 from enum import Enum
-from typing import List, Optional
+from functools import lru_cache
+from heapq import nlargest
+from itertools import chain, islice, product
+from math import fsum, isnan, nan
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
 from githubmarkdownui.blocks.leaf import code_block
-from githubmarkdownui.constants import TREE_CONTINUE_MARKER, TREE_END_MARKER, TREE_MORE_JOBS_MARKER
-from githubmarkdownui.emoji import Emoji
+from githubmarkdownui.blocks.lists import UnorderedList
+from githubmarkdownui.budget import render_pages, render_within_budget
+from githubmarkdownui.constants import CODE_BLOCK_CLOSING_TAGS, CODE_BLOCK_OPENING_TAGS, GITHUB_COMMENT_MAX_LENGTH, \
+    TREE_CONTINUE_MARKER, TREE_END_MARKER, TREE_MORE_JOBS_MARKER
+from githubmarkdownui.duration import Duration, format_duration
+from githubmarkdownui.emoji import Emoji, autoexpand_shortcodes_enabled, expand_shortcodes
+from githubmarkdownui.escape import autoescape_enabled, escape
+from githubmarkdownui.fingerprint import fingerprint, fingerprint_values, iter_dataclass_values
 from githubmarkdownui.inline import bold
+from githubmarkdownui.instrumentation import instrumented
+from githubmarkdownui.parallel import chunk_bounds, render_chunks
+from githubmarkdownui.slots import slotted
+from githubmarkdownui.utils import collapsible_section
+from githubmarkdownui.width import display_width, display_widths
+
+# Whether autoescaping is enabled and whether shortcodes are expanded, which is what the displayed text of jobs and tasks
+# depends on.
+DisplaySettings = Tuple[bool, bool]
+# Every task caches the settings its strings were built with, so the same few tuples are shared instead of each task
+# holding its own.
+_DISPLAY_SETTINGS: Dict[DisplaySettings, DisplaySettings] = {
+    settings: settings for settings in product((False, True), repeat=2)
+}
+
+# Memory addresses in failure messages, such as <object at 0x7f3a2c1d9e80>, which differ between runs of the same failure.
+_MEMORY_ADDRESS_PATTERN = re.compile(r'0x[0-9a-fA-F]+')
+# Most jobs repeat the same few durations, and durations cannot be changed, so each string or number is only converted to a
+# Duration once. It is typed, so 90 and 90.0 keep their own number of seconds.
+_cached_duration = lru_cache(maxsize=4096, typed=True)(Duration.from_value)
 
 
 class CIStatus(Enum):
-    """Enum to specify if a CI job or task has succeeded or failed."""
+    """Enum to specify if a CI job or task has succeeded or failed, is still running, is waiting to run, or was skipped."""
     SUCCEEDED = Emoji.CHECK_MARK.value
     FAILED = Emoji.X.value
+    # New statuses go at the end, since a CITaskBatch stores each status by its position.
+    RUNNING = Emoji.HOURGLASS.value
+    PENDING = Emoji.SQUARE.value
+    SKIPPED = Emoji.NEXT_TRACK.value
+
+
+# The statuses in the order of the codes they are stored as in a CITaskBatch.
+_STATUSES = tuple(CIStatus)
+_STATUS_CODES = {status: code for code, status in enumerate(_STATUSES)}
+# The number of names a CITaskBatch decodes at once when every name is ASCII, and that a job tree measures at once.
+_NAME_CHUNK_SIZE = 4096
 
+# The tasks or jobs a CITaskMetadata or CIJobMetadata belongs to. Most metadata belongs to a single task or job, so a single
+# owner is not wrapped in a tuple.
+_Owners = Union[None, 'CITask', 'CIJob', Tuple[Union['CITask', 'CIJob'], ...]]
 
+
+@slotted
 @dataclass
 class CIJobMetadata:
     """Class intended to hold metadata for a CIJob Execution. Each job should have a CIStatus to signal success or failure,
-    a job name, optional job duration (specified as a string such as 8s or 25m 37s), optional job failure type (such as Test
-    Failure or Infrastructure Failure), and optional failure message. Since the name can be any string, it can also be a
-    link to a CI execution."""
+    a job name, optional job duration (specified as a Duration, a number of seconds, or a string such as 8s or 25m 37s, which
+    is kept as given and read as a Duration by duration_value), optional job failure type (such as Test Failure or
+    Infrastructure Failure), and optional failure message. Since the name can be any string, it can also be a link to a CI
+    execution. A duration string that is not a duration, such as N/A, is displayed as is but left out of total durations,
+    and an empty string means no duration.
+
+    Changing a field of the metadata, such as job.metadata.status = CIStatus.FAILED, does the same as CIJob.update() on
+    each job it belongs to."""
     status: CIStatus
     name: str
-    duration: Optional[str] = None
+    duration: Optional[Union[Duration, float, str]] = None
     failure_type: Optional[str] = None
     failure_message: Optional[str] = None
+    # The jobs this metadata belongs to, whose cached output is discarded when one of its fields changes.
+    _owners: _Owners = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def duration_value(self) -> Optional[Duration]:
+        """The duration as a Duration, or None if there is no duration. See Duration.from_value()."""
+        return _to_duration(self.duration)
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        _set_metadata_field(self, name, value)
 
+    def __getstate__(self) -> Dict[str, Any]:
+        return _metadata_state(self)
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        _set_metadata_state(self, state)
+
+
+@slotted
 @dataclass
 class CITaskMetadata:
     """Class intended to hold metadata for a CITask execution. Each task should have a CIStatus to signal success or failure,
-    a task name, optional task duration (specified as a string such as 8s or 25m 37s), and any additional information about
-    the task, such as links to any relevant logs. Do not include any HTML tags on the task name or duration."""
+    a task name, optional task duration (specified as a Duration, a number of seconds, or a string such as 8s or 25m 37s,
+    which is kept as given and read as a Duration by duration_value), any additional information about the task, such as
+    links to any relevant logs, and an optional failure type and failure message, which are not displayed in task lists. Do
+    not include any HTML tags on the task name or duration. A duration string that is not a duration, such as N/A, is
+    displayed as is but left out of total durations and slowest tasks, and an empty string means no duration.
+
+    Changing a field of the metadata, such as task.metadata.status = CIStatus.FAILED, does the same as CITask.update() on
+    each task it belongs to. The metadata returned by CITaskBatch.metadata() is a copy, so use CITaskBatch.update() to
+    change a task in a batch."""
     status: CIStatus
     name: str
-    duration: Optional[str] = None
+    duration: Optional[Union[Duration, float, str]] = None
     info: Optional[str] = None
+    failure_type: Optional[str] = None
+    failure_message: Optional[str] = None
+    # The tasks this metadata belongs to, whose cached strings are discarded when one of its fields changes.
+    _owners: _Owners = field(default=None, init=False, repr=False, compare=False)
 
+    @property
+    def duration_value(self) -> Optional[Duration]:
+        """The duration as a Duration, or None if there is no duration. See Duration.from_value()."""
+        return _to_duration(self.duration)
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        _set_metadata_field(self, name, value)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return _metadata_state(self)
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        _set_metadata_state(self, state)
+
+
+class _JobLink:
+    """The link from the tasks and child jobs of a CIJob back to the job, which lets a change to one of them reach the job.
+    Whenever the job links its tasks and child jobs again, such as after its lists were changed in place, it cuts its old
+    link, so a task or job that was removed from it no longer reaches it.
+    """
+    __slots__ = ('job',)
+
+    def __init__(self, job: Optional[CIJob]):
+        self.job: Optional[CIJob] = job
+
+    def __reduce__(self) -> tuple:
+        # A copied link is cut, so copying or pickling a job does not copy the jobs above it as well. A copied job finds its
+        # link was cut the next time it is rendered or counted, and links its tasks and child jobs again.
+        return _JobLink, (None,)
+
+
+# A task, batch or job is linked to each job it belongs to, once for each time it appears in that job. Most belong to a
+# single job, so a single link is not wrapped in a tuple.
+_Links = Union[None, _JobLink, Tuple[_JobLink, ...]]
+
+
+@slotted
 @dataclass
 class CITask:
     """This class is intended to be used to help with the creation of task lists, which can be useful for displaying tasks
-    executed within a build pipeline."""
+    executed within a build pipeline.
+
+    The strings built for a task and its fingerprint are cached, and so is the output of every job it belongs to. Use
+    update(), assign new metadata to the task, or change a field of its metadata to change it, which keeps all of them up to
+    date. The same task can belong to more than one job, and the same metadata to more than one task.
+    """
     metadata: CITaskMetadata
+    # The jobs this task belongs to, which are linked by CIJob, and the cached strings built for this task.
+    _job_link: _Links = field(default=None, init=False, repr=False, compare=False)
+    # Both strings depend on whether autoescaping and shortcode expansion are enabled, so those are cached alongside them.
+    _string_length: Optional[Tuple[DisplaySettings, int]] = field(default=None, init=False, repr=False, compare=False)
+    _task_string: Optional[Tuple[int, DisplaySettings, str]] = field(default=None, init=False, repr=False, compare=False)
+    _fingerprint: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        _add_owner(self.metadata, self)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        # Assigning new metadata does the same as update(). The fields are set one at a time while a task is unpickled, so
+        # the metadata may be set before the rest of them.
+        if name == 'metadata' and hasattr(self, '_job_link'):
+            self._replace_metadata(value)
+        else:
+            object.__setattr__(self, name, value)
+            if name == 'metadata':
+                _add_owner(value, self)
+
+    def update(self, **changes) -> None:
+        """Replaces the given fields of the task metadata, for example task.update(status=CIStatus.FAILED). Only the jobs
+        this task belongs to will have to be rendered again.
+
+        :param changes: The fields of the task metadata to replace, and their new values
+        """
+        self._replace_metadata(replace(self.metadata, **changes))
+
+    def mark_dirty(self) -> None:
+        """Discards the cached strings and fingerprint of this task, and the cached output of the jobs it belongs to."""
+        self._clear_cache()
+
+        for job in _linked_jobs(self._job_link):
+            job.mark_dirty()
+
+    def fingerprint(self) -> str:
+        """Returns a fingerprint of the metadata of this task, as a string of hex digits. Tasks with the same metadata have
+        the same fingerprint in every process and on every version of Python. See githubmarkdownui.fingerprint.
+        """
+        if self._fingerprint is None:
+            self._fingerprint = fingerprint_values(('CITask', *_iter_metadata_values(self.metadata)))
+
+        return self._fingerprint
 
     def get_left_justified_task_string_length(self) -> int:
-        """Calculates the length of the task string that will be left justified in the task list. This consists of the task
-        emoji, task name, and task duration.
+        """Calculates the display width of the task string that will be left justified in the task list. This consists of
+        the task emoji, task name, and task duration. See githubmarkdownui.width.display_width.
         """
-        # Factor emoji, 2 space buffer, task name, one space, left bracket, task duration, right bracket in string length.
-        return len(f'{self.metadata.status.value}  {self.metadata.name}'
-                   f'{" (" + self.metadata.duration + ")" if self.metadata.duration else ""}')
+        settings = _display_settings()
+
+        if self._string_length is None or self._string_length[0] != settings:
+            # Factor emoji, 2 space buffer, task name, one space, left bracket, task duration, right bracket in string length.
+            # Only the task name has to be measured, since the other parts are either ASCII or the same for every task.
+            duration = _duration_text(self.metadata.duration)
+            self._string_length = (settings, _status_width(self.metadata.status) + 2 + display_width(self._name(settings)) +
+                                   (len(duration) + 3 if duration else 0))
+
+        return self._string_length[1]
 
     def build_task_string(self, width: int = 0) -> str:
         """Builds the string to represent the given task in a task list. The string will be formatted as follows:
@@ -61,99 +234,1495 @@ class CITask:
         The task duration will be bolded, and the emoji, task name, and task duration will be left justified according to
         the given width.
 
-        :param width: The total width of the string, used to left justify the contents
+        :param width: The total display width of the string, used to left justify the contents
+        """
+        # Most of the time a task is built with the same width as last time, since the width only changes when the longest
+        # task in the job changes.
+        settings = _display_settings()
+
+        if self._task_string and self._task_string[:2] == (width, settings):
+            return self._task_string[2]
+
+        # The width of the left justified string is already known, so there is no need to measure it again.
+        task_string = _format_task_string(self.metadata.status, self._name(settings),
+                                          _duration_text(self.metadata.duration),
+                                          self.metadata.info and self._info(settings),
+                                          width - self.get_left_justified_task_string_length())
+        self._task_string = (width, settings, task_string)
+
+        return task_string
+
+    def _replace_metadata(self, metadata: CITaskMetadata) -> None:
+        previous_status = self.metadata.status
+        _remove_owner(self.metadata, self)
+        object.__setattr__(self, 'metadata', metadata)
+        _add_owner(metadata, self)
+        self._metadata_changed(previous_status)
+
+    def _metadata_changed(self, previous_status: CIStatus) -> None:
+        self._clear_cache()
+
+        # The previous status is known, so the jobs do not have to count the status of every task again.
+        for job in _linked_jobs(self._job_link):
+            job._task_updated(previous_status, self.metadata.status)
+
+    def _clear_cache(self) -> None:
+        self._string_length = None
+        self._task_string = None
+        self._fingerprint = None
+
+    def _name(self, settings: DisplaySettings) -> str:
+        return _display_text(self.metadata.name, settings)
+
+    def _info(self, settings: DisplaySettings) -> str:
+        return _display_text(self.metadata.info, settings)
+
+
+class CITaskBatch:
+    """A compact store for a large number of tasks, which can be given to CIJob in place of a list of CITasks. Instead of
+    two objects for each task, the statuses are stored as one byte each, the names one after another in a single buffer,
+    the durations as an array of seconds, and each distinct info string only once. A million tasks take tens of megabytes
+    instead of gigabytes, and are rendered at least as fast. For example:
+
+    batch = CITaskBatch()
+    for result in results:
+        batch.add(CIStatus.FAILED if result.failed else CIStatus.SUCCEEDED, result.name, result.seconds)
+    job = CIJob(CIJobMetadata(CIStatus.FAILED, 'tests'), batch)
+
+    A job with a batch renders the same output as a job with a list of CITasks with the same metadata, except durations are
+    always formatted from their number of seconds, so a duration given as 90s is displayed as 1m 30s, and a duration string
+    that is not a duration, such as N/A, is not displayed at all.
+
+    Indexing or iterating over a batch creates a CITask for each task. Changing that CITask does not change the batch, so use
+    update() instead.
+    """
+    __slots__ = ('_status_codes', '_names', '_name_offsets', '_ascii_names', '_plain_names', '_durations', '_info_codes',
+                 '_info_values', '_info_lookup', '_failures', '_status_counts', '_positions', '_job_link')
+
+    def __init__(self, tasks: Iterable[CITaskMetadata] = ()):
+        """
+        :param tasks: The metadata of the tasks to add to the batch
+        """
+        self._status_codes = array('B')
+        # The names encoded as UTF-8 one after another, and the offset of the start of each one followed by the offset of
+        # the end of the last one. The offsets are 32 bits, which allows up to 4 GiB of names.
+        self._names = bytearray()
+        self._name_offsets = array('I', [0])
+        # Whether every name is ASCII, so the offsets in the buffer are also offsets in the decoded names, and whether no
+        # name contains HTML either, so the length of each name is also its display width.
+        self._ascii_names = True
+        self._plain_names = True
+        # The duration of each task in seconds, where NaN means the task has no duration.
+        self._durations = array('d')
+        # The index of the info of each task in _info_values, where 0 means the task has no info.
+        self._info_codes = array('I')
+        self._info_values: List[Optional[str]] = [None]
+        self._info_lookup: Dict[str, int] = {}
+        # The failure type and failure message of each task that has either, by position. Most tasks do not have them.
+        self._failures: Dict[int, Tuple[Optional[str], Optional[str]]] = {}
+        self._status_counts: Counter = Counter()
+        # The positions of the tasks with each status, which are built when first needed.
+        self._positions: Dict[CIStatus, array] = {}
+        # The jobs this batch belongs to, which are linked by CIJob.
+        self._job_link: _Links = None
+
+        self.extend(tasks)
+
+    def add(self, status: CIStatus, name: str, duration: Optional[Union[Duration, float, str]] = None,
+            info: Optional[str] = None, failure_type: Optional[str] = None, failure_message: Optional[str] = None) -> None:
+        """Adds a task to the end of the batch, without creating a CITask or CITaskMetadata for it.
+
+        :param status: The status of the task
+        :param name: The name of the task
+        :param duration: The duration of the task, as a Duration, a number of seconds or a string such as 8s
+        :param info: Any additional information about the task
+        :param failure_type: The type of failure of the task, such as Test Failure
+        :param failure_message: The failure message of the task
+        """
+        self._add(status, name, duration, info, failure_type, failure_message)
+        self._task_added(status)
+
+    def append(self, metadata: CITaskMetadata) -> None:
+        """Adds a task to the end of the batch.
+
+        :param metadata: The metadata of the task
+        """
+        self._add_metadata(metadata)
+        self._task_added(metadata.status)
+
+    def extend(self, tasks: Iterable[CITaskMetadata]) -> None:
+        """Adds tasks to the end of the batch.
+
+        :param tasks: The metadata of the tasks
+        """
+        for metadata in tasks:
+            self._add_metadata(metadata)
+
+        self._mark_dirty()
+
+    def update(self, index: int, **changes) -> None:
+        """Replaces the given fields of the metadata of a task, for example batch.update(3, status=CIStatus.FAILED). Changing
+        a name takes time proportional to the size of the batch, but any other change takes constant time.
+
+        :param index: The position of the task in the batch
+        :param changes: The fields of the task metadata to replace, and their new values
+        """
+        index = range(len(self))[index]
+        old_metadata = self.metadata(index)
+        metadata = replace(old_metadata, **changes)
+
+        self._status_counts[old_metadata.status] -= 1
+        self._status_counts[metadata.status] += 1
+        self._status_codes[index] = _STATUS_CODES[metadata.status]
+        self._durations[index] = _batch_seconds(metadata.duration)
+        self._info_codes[index] = self._info_code(metadata.info)
+        self._set_failure(index, metadata.failure_type, metadata.failure_message)
+
+        if metadata.name != old_metadata.name:
+            encoded_name = self._encode_name(metadata.name)
+            start, end = self._name_offsets[index], self._name_offsets[index + 1]
+            self._names[start:end] = encoded_name
+
+            shift = len(encoded_name) - (end - start)
+            for offset_index in range(index + 1, len(self._name_offsets)):
+                self._name_offsets[offset_index] += shift
+
+        self._mark_dirty()
+
+    def metadata(self, index: int) -> CITaskMetadata:
+        """Returns the metadata of a task.
+
+        :param index: The position of the task in the batch
+        """
+        index = range(len(self))[index]
+        duration = self._durations[index]
+
+        return CITaskMetadata(_STATUSES[self._status_codes[index]], self._name(index),
+                              None if isnan(duration) else duration, self._info_values[self._info_codes[index]],
+                              *self._failures.get(index, (None, None)))
+
+    def status_counts(self) -> Dict[CIStatus, int]:
+        """Returns the number of tasks with each status. Statuses without any tasks are left out."""
+        return {status: self._status_counts[status] for status in CIStatus if self._status_counts[status]}
+
+    def total_seconds(self) -> float:
+        """Returns the sum of the durations of the tasks in seconds. Tasks without a duration are left out."""
+        return fsum(duration for duration in self._durations if not isnan(duration))
+
+    def __len__(self) -> int:
+        return len(self._status_codes)
+
+    def __getitem__(self, index: int) -> CITask:
+        return CITask(self.metadata(index))
+
+    def __iter__(self) -> Iterator[CITask]:
+        return (CITask(self.metadata(index)) for index in range(len(self)))
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({len(self)} tasks)'
+
+    def _add(self, status: CIStatus, name: str, duration: Optional[Union[Duration, float, str]], info: Optional[str],
+             failure_type: Optional[str], failure_message: Optional[str]) -> None:
+        self._set_failure(len(self), failure_type, failure_message)
+        self._status_codes.append(_STATUS_CODES[status])
+        self._names += self._encode_name(name)
+        self._name_offsets.append(len(self._names))
+        self._durations.append(_batch_seconds(duration))
+        self._info_codes.append(self._info_code(info))
+        self._status_counts[status] += 1
+
+    def _add_metadata(self, metadata: CITaskMetadata) -> None:
+        self._add(metadata.status, metadata.name, metadata.duration, metadata.info, metadata.failure_type,
+                  metadata.failure_message)
+
+    def _set_failure(self, index: int, failure_type: Optional[str], failure_message: Optional[str]) -> None:
+        if failure_type is None and failure_message is None:
+            self._failures.pop(index, None)
+        else:
+            self._failures[index] = (failure_type, failure_message)
+
+    def _encode_name(self, name: str) -> bytes:
+        if not name.isascii():
+            self._ascii_names = False
+        if '<' in name or '&' in name:
+            self._plain_names = False
+
+        return name.encode()
+
+    def _info_code(self, info: Optional[str]) -> int:
+        if info is None:
+            return 0
+
+        code = self._info_lookup.get(info)
+        if code is None:
+            code = self._info_lookup[info] = len(self._info_values)
+            self._info_values.append(info)
+
+        return code
+
+    def _name(self, index: int) -> str:
+        return self._names[self._name_offsets[index]:self._name_offsets[index + 1]].decode()
+
+    def _mark_dirty(self) -> None:
+        self._positions.clear()
+
+        for job in _linked_jobs(self._job_link):
+            job.mark_dirty()
+
+    def _task_added(self, status: CIStatus) -> None:
+        self._positions.clear()
+
+        for job in _linked_jobs(self._job_link):
+            job._task_added(status)
+
+    def _iter_failures(self) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+        """Yields the name, failure type and failure message of each task with a failure type or failure message."""
+        for index in sorted(self._failures):
+            yield (self._name(index), *self._failures[index])
+
+    def _select(self, status: Optional[CIStatus]) -> _TaskSelection:
+        """Returns the tasks with the given status, or every task if no status is given."""
+        if not status:
+            return _TaskSelection(self, range(len(self)))
+
+        if status not in self._positions:
+            code = _STATUS_CODES[status]
+            self._positions[status] = array('I', (index for index, status_code in enumerate(self._status_codes)
+                                                  if status_code == code))
+
+        return _TaskSelection(self, self._positions[status])
+
+
+class _TaskSelection:
+    """Some of the tasks in a CITaskBatch, which acts like a list of CITasks but renders them straight from the batch."""
+    __slots__ = ('batch', 'positions')
+
+    def __init__(self, batch: CITaskBatch, positions: Sequence[int]):
+        self.batch = batch
+        self.positions = positions
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __getitem__(self, index: int) -> CITask:
+        return self.batch[self.positions[index]]
+
+    def __iter__(self) -> Iterator[CITask]:
+        return (self.batch[index] for index in self.positions)
+
+    def iter_task_lines(self, width: Optional[int] = None) -> Iterator[str]:
+        """Yields the line of each task in a task list, the same as the lines built by CITask.build_task_string.
+
+        :param width: The display width to left justify the tasks to, which defaults to the width of the widest task
         """
-        duration_string = ' ' + bold(f'({self.metadata.duration})') if self.metadata.duration else ''
-        # Since the strong tags are part of the duration string, they will be accounted for when left justifying with the
-        # given width. But when this string is used in GitHub Flavored Markdown, the strong tags will not show up since they
-        # will bold the text inside it, so we must add additional padding to the width according to the length of the strong
-        # tags. The only string that should not have additional padding is the longest string, since that will just increase
-        # the distance between the duration and the additional info.
-        additional_padding = len(bold('')) if self.metadata.duration and \
-            self.get_left_justified_task_string_length() != width else 0
+        settings = _display_settings()
+        batch = self.batch
+        status_codes = batch._status_codes
+        durations = batch._durations
+        info_codes = batch._info_codes
+        # Everything apart from the names is one of a few values that are repeated over and over, so each one is only
+        # formatted and measured once.
+        status_strings = [f'{status.value}  ' for status in _STATUSES]
+        info_strings = ['   ' + _display_text(info, settings) if info else '' for info in batch._info_values]
+        duration_strings: Dict[float, Tuple[str, int]] = {}
+
+        # Unless the width is given, measure every task first to find the longest one, then build the lines.
+        left_justified_widths = self._iter_left_justified_widths(settings, duration_strings)
+        if width is None:
+            left_justified_widths = array('I', left_justified_widths)
+            width = max(left_justified_widths, default=0)
+
+        for index, name, left_justified_width in zip(self.positions, self._iter_names(settings), left_justified_widths):
+            duration = durations[index]
+            duration_string = '' if isnan(duration) else duration_strings[duration][0]
+            yield f'{status_strings[status_codes[index]]}{name}{duration_string}' \
+                f'{" " * (width - left_justified_width)}{info_strings[info_codes[index]]}'
+
+    def left_justified_width(self) -> int:
+        """Returns the display width of the widest task in a task list, apart from its info."""
+        return max(self._iter_left_justified_widths(_display_settings(), {}), default=0)
+
+    def iter_display_values(self, settings: DisplaySettings) -> Iterator[Tuple[CIStatus, str, Optional[str]]]:
+        """Yields the status, displayed name and displayed info of each task."""
+        info_values = self.batch._info_values
+        info_codes = self.batch._info_codes
+        status_codes = self.batch._status_codes
+
+        for index, name in zip(self.positions, self._iter_names(settings)):
+            info = info_values[info_codes[index]]
+            yield _STATUSES[status_codes[index]], name, info and _display_text(info, settings)
+
+    def slice(self, start: int, stop: int) -> _TaskSelection:
+        """Returns the selection of the tasks in this selection from start to stop."""
+        return _TaskSelection(self.batch, self.positions[start:stop])
+
+    def _iter_left_justified_widths(self, settings: DisplaySettings,
+                                    duration_strings: Dict[float, Tuple[str, int]]) -> Iterator[int]:
+        status_codes = self.batch._status_codes
+        durations = self.batch._durations
+        status_widths = [_status_width(status) + 2 for status in _STATUSES]
+
+        for index, name_width in zip(self.positions, self._iter_name_widths(settings)):
+            duration = durations[index]
+            yield status_widths[status_codes[index]] + name_width + \
+                (0 if isnan(duration) else _duration_string(duration_strings, duration)[1])
 
-        left_justified_string = f'{self.metadata.status.value}  {self.metadata.name}{duration_string}'
-        info_string = '   ' + self.metadata.info if self.metadata.info else ''
+    def _iter_names(self, settings: DisplaySettings) -> Iterator[str]:
+        offsets = self.batch._name_offsets
+        names = self.batch._names
+        if not self.batch._ascii_names:
+            for index in self.positions:
+                yield _display_text(names[offsets[index]:offsets[index + 1]].decode(), settings)
+            return
 
-        return f'{left_justified_string:<{width + additional_padding}}{info_string}'
+        # When every name is ASCII, the part of the buffer holding a chunk of the selected names is decoded at once and the
+        # names are sliced out of it. The positions are in order, so that part starts at the first name of the chunk and
+        # ends after the last one. Only the chunks that are reached are decoded, so a task list cut short by max_length does
+        # not decode every name.
+        for chunk_start in range(0, len(self.positions), _NAME_CHUNK_SIZE):
+            chunk = self.positions[chunk_start:chunk_start + _NAME_CHUNK_SIZE]
+            start = offsets[chunk[0]]
+            chunk_names = str(memoryview(names)[start:offsets[chunk[-1] + 1]], 'ascii')
 
+            for index in chunk:
+                yield _display_text(chunk_names[offsets[index] - start:offsets[index + 1] - start], settings)
 
+    def _iter_name_widths(self, settings: DisplaySettings) -> Iterator[int]:
+        # Each character of an escaped ASCII name is displayed as one column, and so is each character of an ASCII name
+        # without any HTML, so those names do not have to be decoded or measured. That is unless a name could have a
+        # shortcode in it that would be expanded to an emoji.
+        escaping, expanding = settings
+        batch = self.batch
+        if batch._ascii_names and (escaping or batch._plain_names) and not (expanding and b':' in batch._names):
+            offsets = batch._name_offsets
+            return (offsets[index + 1] - offsets[index] for index in self.positions)
+
+        return map(display_width, self._iter_names(settings))
+
+
+@slotted
 @dataclass
 class CIJob:
     """This class is intended to be used to help with the creation of job trees, which can be useful for displaying jobs
-    executed within a build pipeline."""
+    executed within a build pipeline.
+
+    The output of each job is cached, so that when a single task changes only the job it belongs to has to be rendered
+    again. Each job also keeps an index of its tasks and child jobs by status, and a count of the statuses of every task and
+    job below it. Use add_task(), add_child_job() and update() to change a job, and CITask.update() to change a task, which
+    keep these up to date as they go. Assigning new metadata to a job or task does the same as update().
+
+    Changes made to the lists of tasks and child jobs in place, such as appending to job.tasks, are found from the length
+    of each list the next time the job is rendered or counted, at the cost of linking and counting the tasks of the job
+    again. Only changes that keep the length of a list the same, such as replacing or reordering its items, need
+    mark_dirty() to be called afterwards. The same task or job can belong to more than one job.
+
+    The tasks can also be given as a CITaskBatch, which takes far less memory for jobs with a large number of tasks. Use
+    CITaskBatch.update() to change a task in a batch.
+    """
     metadata: CIJobMetadata
-    tasks: List[CITask]
+    tasks: Union[List[CITask], CITaskBatch]
     child_jobs: Optional[List[CIJob]] = None
+    # The jobs this job is a child of, the link its own tasks and child jobs hold, and the lists they were linked from along
+    # with their lengths. Also the cached output of this job, the cached lines of this job as they appear in the job trees
+    # above it, and the display width of the widest of its tasks with each status in its task list and in job trees.
+    _parent_link: _Links = field(default=None, init=False, repr=False, compare=False)
+    _link: Optional[_JobLink] = field(default=None, init=False, repr=False, compare=False)
+    _synced: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
+    _output_cache: Dict[tuple, str] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _tree_lines_cache: Dict[tuple, List[str]] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _task_widths: Dict[tuple, int] = field(default_factory=dict, init=False, repr=False, compare=False)
+    # The tasks and child jobs of this job grouped by status, which are built when first needed. Also the number of tasks and
+    # jobs below this job with each status, and the status of this job when it was counted by the jobs above it.
+    _task_index: Optional[Dict[CIStatus, List[CITask]]] = field(default=None, init=False, repr=False, compare=False)
+    _child_job_index: Optional[Dict[CIStatus, List[CIJob]]] = field(default=None, init=False, repr=False, compare=False)
+    _task_counts: Counter = field(default_factory=Counter, init=False, repr=False, compare=False)
+    _job_counts: Counter = field(default_factory=Counter, init=False, repr=False, compare=False)
+    _counted_status: Optional[CIStatus] = field(default=None, init=False, repr=False, compare=False)
+    _fingerprint: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    # The number of changes made to this job and everything below it, which is returned by revision().
+    _revision: int = field(default=0, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        _add_owner(self.metadata, self)
+        self._sync_status_counts()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        # Assigning new metadata does the same as update(). While a job is unpickled, it is only linked once all of its fields
+        # have been set.
+        if name == 'metadata' and getattr(self, '_link', None) is not None:
+            self._replace_metadata(value)
+        else:
+            object.__setattr__(self, name, value)
+            if name == 'metadata':
+                _add_owner(value, self)
+
+    def add_task(self, task: CITask) -> None:
+        """Adds a task to the end of the tasks of this job.
+
+        :param task: The task to add. If the tasks of this job are a CITaskBatch, only the metadata of the task is added
+        """
+        if isinstance(self.tasks, CITaskBatch):
+            # The batch counts the new task in every job it belongs to.
+            self.tasks.append(task.metadata)
+            return
+
+        self.tasks.append(task)
+        self._task_added(task.metadata.status, task)
+
+    def add_child_job(self, child_job: CIJob) -> None:
+        """Adds a job to the end of the child jobs of this job.
+
+        :param child_job: The job to add
+        """
+        lists_changed = self._lists_changed()
+        if self.child_jobs is None:
+            self.child_jobs = []
+
+        self.child_jobs.append(child_job)
+        if lists_changed:
+            # The lists were changed in place since they were counted, so adding the new job to the counts would not be
+            # enough.
+            self.mark_dirty()
+            return
+
+        child_job._parent_link = _add_link(child_job._parent_link, self._link)
+        self._synced = (self.tasks, len(self.tasks), self.child_jobs, len(self.child_jobs))
+        if self._child_job_index is not None:
+            self._child_job_index.setdefault(child_job.metadata.status, []).append(child_job)
+
+        # The jobs above this one also count the new job itself.
+        job_counts_change = child_job._job_counts.copy()
+        job_counts_change[child_job.metadata.status] += 1
+
+        for job in chain([self], self._iter_ancestors()):
+            job._output_cache.clear()
+            job._fingerprint = None
+            job._revision += 1
+            job._task_counts.update(child_job._task_counts)
+            job._job_counts.update(job_counts_change)
+
+    def update(self, **changes) -> None:
+        """Replaces the given fields of the job metadata, for example job.update(status=CIStatus.FAILED).
+
+        :param changes: The fields of the job metadata to replace, and their new values
+        """
+        self._replace_metadata(replace(self.metadata, **changes))
+
+    def mark_dirty(self) -> None:
+        """Discards the cached output and fingerprint of this job, and those of every job above it since their job trees
+        include this job. The cached output of any other job is kept. The status index and status counts of this job are
+        brought up to date, and the change in status counts is applied to every job above it.
+        """
+        self._output_cache.clear()
+        self._tree_lines_cache.clear()
+        self._task_widths.clear()
+        self._fingerprint = None
+        self._revision += 1
+
+        previous_status = self._counted_status
+        task_counts_change, job_counts_change = self._sync_status_counts()
+        # The jobs above this one also count the status of this job itself.
+        job_counts_change[previous_status] -= 1
+        job_counts_change[self.metadata.status] += 1
+
+        for parent in _linked_jobs(self._parent_link):
+            parent._child_job_index = None
+
+        for job in self._iter_ancestors():
+            job._output_cache.clear()
+            job._fingerprint = None
+            job._revision += 1
+            job._task_counts.update(task_counts_change)
+            job._job_counts.update(job_counts_change)
+
+    def fingerprint(self) -> str:
+        """Returns a fingerprint of this job, its tasks and every job below it, as a string of hex digits. It is built from
+        the metadata rather than the rendered output, so it can be compared with the fingerprint of the last output that was
+        posted to skip rendering and posting it again when nothing has changed. Jobs with the same metadata, tasks and child
+        jobs have the same fingerprint in every process and on every version of Python. See githubmarkdownui.fingerprint.
+
+        The fingerprint of each job and task is cached, so after a single task changes only the jobs from it up to this job
+        are hashed again.
+        """
+        self._sync_changed_lists()
+
+        if self._fingerprint is None:
+            # Walk down to the jobs whose fingerprint is not cached, then hash them with every child job before its parent.
+            jobs = []
+            stack = [self]
+            while stack:
+                job = stack.pop()
+                jobs.append(job)
+                stack.extend(child_job for child_job in job.child_jobs or [] if child_job._fingerprint is None)
+
+            for job in reversed(jobs):
+                job._fingerprint = fingerprint_values((
+                    'CIJob', *_iter_metadata_values(job.metadata),
+                    len(job.tasks), *(task.fingerprint() for task in job.tasks),
+                    len(job.child_jobs or []), *(child_job._fingerprint for child_job in job.child_jobs or []),
+                ))
+
+        return self._fingerprint
+
+    def revision(self) -> int:
+        """Returns a number that grows each time this job, one of its tasks or anything below it changes. Unlike the
+        fingerprint, it takes constant time to get however many tasks were added or changed, so it can be compared with the
+        revision of the last output that was posted to skip rendering it again when nothing has changed. A change that is
+        undone afterwards still counts as a change, and the revision is only meaningful within a single process.
+        """
+        self._sync_changed_lists()
+
+        return self._revision
+
+    def task_status_counts(self, include_child_jobs: bool = False) -> Dict[CIStatus, int]:
+        """Returns the number of tasks with each status. Statuses without any tasks are left out.
+
+        :param include_child_jobs: If True, the tasks of every job below this job are counted as well. Otherwise only the
+        tasks of this job are counted
+        """
+        self._sync_changed_lists(include_child_jobs)
+
+        if include_child_jobs:
+            return {status: self._task_counts[status] for status in CIStatus if self._task_counts[status]}
+
+        if isinstance(self.tasks, CITaskBatch):
+            return self.tasks.status_counts()
+
+        return {status: len(tasks) for status, tasks in self._get_task_index().items()}
+
+    def job_status_counts(self, include_child_jobs: bool = False) -> Dict[CIStatus, int]:
+        """Returns the number of child jobs with each status. Statuses without any jobs are left out.
+
+        :param include_child_jobs: If True, every job below this job is counted. Otherwise only the direct child jobs of
+        this job are counted
+        """
+        self._sync_changed_lists(include_child_jobs)
+
+        if include_child_jobs:
+            return {status: self._job_counts[status] for status in CIStatus if self._job_counts[status]}
+
+        return {status: len(jobs) for status, jobs in self._get_child_job_index().items()}
+
+    def tasks_with_status(self, status: CIStatus) -> List[CITask]:
+        """Returns the tasks of this job with the given status, in the order they appear in this job.
+
+        :param status: The status of the tasks to return
+        """
+        self._sync_changed_lists(False)
+
+        return list(self._tasks_with_status(status))
+
+    def child_jobs_with_status(self, status: CIStatus) -> List[CIJob]:
+        """Returns the child jobs of this job with the given status, in the order they appear in this job.
+
+        :param status: The status of the child jobs to return
+        """
+        self._sync_changed_lists(False)
+
+        return list(self._child_jobs_with_status(status))
+
+    def status_summary(self, include_child_jobs: bool = True) -> str:
+        """Creates a summary of how many tasks have each status, such as "❌ 3 failed, ✅ 12 succeeded". The statuses are
+        listed in the order they are declared in CIStatus, and statuses without any tasks are left out.
+
+        :param include_child_jobs: If True, the tasks of every job below this job are counted as well. Otherwise only the
+        tasks of this job are counted
+        """
+        status_counts = self.task_status_counts(include_child_jobs)
+        return ', '.join(f'{status.value} {status_counts[status]} {status.name.lower()}'
+                         for status in CIStatus if status in status_counts)
+
+    def total_duration(self) -> Duration:
+        """Returns the sum of the durations of every task in this job and every job below it. Tasks without a duration are
+        left out.
+        """
+        return Duration(sum(_task_seconds(job.tasks) for job in self._iter_jobs()))
+
+    def critical_path(self) -> Tuple[Duration, List[CIJob]]:
+        """Finds the longest running chain of jobs from this job down to a job without child jobs, assuming the child jobs of
+        a job run in parallel once it is done. The duration of a job is its own duration, or the sum of the durations of its
+        tasks if it does not have one. Returns the total duration of the chain and the jobs in it, starting with this job.
+        """
+        # Visit every child job before its parent, keeping the longest chain below each job.
+        longest_chains = {}
+        for job in reversed(list(self._iter_jobs())):
+            job_seconds = _seconds(job.metadata.duration_value)
+            if job_seconds is None:
+                job_seconds = _task_seconds(job.tasks)
+            longest_child_chain = max((longest_chains[id(child_job)] for child_job in job.child_jobs or []),
+                                      key=lambda chain: chain[0], default=(0, None))
+            longest_chains[id(job)] = (job_seconds + longest_child_chain[0], (job, longest_child_chain[1]))
+
+        seconds, chain = longest_chains[id(self)]
+        jobs = []
+        while chain:
+            job, chain = chain
+            jobs.append(job)
+
+        return Duration(seconds), jobs
 
-    def ci_task_list(self, status: Optional[CIStatus] = None) -> str:
+    def slowest_tasks(self, count: int, status: Optional[CIStatus] = None) -> List[CITask]:
+        """Returns the tasks with the longest durations in this job and every job below it, slowest first. The tasks are
+        selected with a heap in a single pass instead of sorting every task.
+
+        :param count: The number of tasks to return
+        :param status: Only tasks with the given status will be considered. If not given, all tasks will be considered
+        """
+        self._sync_changed_lists()
+
+        return nlargest(count, (task for job in self._iter_jobs() for task in job._tasks_with_status(status)
+                                if _seconds(task.metadata.duration_value) is not None),
+                        key=lambda task: task.metadata.duration_value)
+
+    @instrumented('slowest_task_list')
+    def slowest_task_list(self, count: int, status: Optional[CIStatus] = None) -> str:
+        """Creates a task list in monospaced font, in the same format as ci_task_list, of the tasks with the longest durations
+        in this job and every job below it, slowest first.
+
+        :param count: The number of tasks to display
+        :param status: Only tasks with the given status will be displayed. If not given, all tasks will be displayed
+        """
+        return code_block('\n'.join(_iter_task_lines(self.slowest_tasks(count, status))))
+
+    @instrumented('failure_report')
+    def failure_report(self, max_names: int = 10, max_length: Optional[int] = None) -> str:
+        """Creates a report of the failures in this job and every job below it, where each distinct failure is displayed only
+        once, however many jobs and tasks it affects. Each failure is a collapsible section titled with its failure type and
+        the number of jobs and tasks it affects, which shows its failure message in a code block and lists the names of the
+        affected jobs and tasks. The most common failures come first.
+
+        Failures are grouped by a fingerprint of their failure type and failure message in a single pass, so the output
+        grows with the number of distinct failures rather than the number of failed tasks. Whitespace and memory addresses
+        such as 0x7f3a2c1d9e80 are ignored when comparing failure messages, and the message of the first failure in each
+        group is the one displayed. Only jobs and tasks with a failure type or failure message are included, and tasks are
+        named after their job as well, such as "unit tests: test_add_task".
+
+        :param max_names: The number of affected jobs and tasks listed for each failure. Any others are only counted
+        :param max_length: If given, the report will not be longer than this many characters. Failures are rendered until the
+        next one does not fit, and the remaining failures are replaced by a final line saying how many were omitted
+
+        :raises: BudgetError when the report cannot fit in max_length, even after omitting all of the failures
+        """
+        groups = _group_failures(self._iter_failures(), max_names)
+        # sorted() is stable, so failures that affect the same number of jobs and tasks stay in the order they were found.
+        sections = map(_failure_section, sorted(groups, key=lambda group: -group.count))
+
+        if max_length is None:
+            return '\n'.join(sections)
+
+        return render_within_budget('', sections, '', max_length,
+                                    lambda omitted_count: f'{omitted_count} more failures omitted', '\n', len(groups))
+
+    @instrumented('ci_task_list')
+    def ci_task_list(self, status: Optional[CIStatus] = None, max_length: Optional[int] = None,
+                     workers: Optional[int] = None) -> str:
         """Creates a task list in monospaced font. All of the task info will be aligned. Only the tasks in the parent job
         will be displayed.
 
         :param status: Only tasks with the given status will be displayed. If not given, all tasks will be displayed
+        :param max_length: If given, the task list will not be longer than this many characters. Tasks are rendered until the
+        next one does not fit, and the remaining tasks are replaced by a final line saying how many tasks were omitted
+        :param workers: If given, the tasks of a job with hundreds of thousands of tasks are split into chunks that are
+        rendered by this many processes at once, and the output is identical. The widest task is measured first, so each
+        chunk can be aligned on its own. This is not used with max_length. See githubmarkdownui.parallel.render_chunks
+
+        :raises: BudgetError when the task list cannot fit in max_length, even after omitting all of the tasks
         """
-        # Want to display the results like this, and have the additional info in each line aligned with each other:
-        # <emoji>  <task name> (<task duration>)   <additional info>
-        # Need to find the longest emoji + task name + task duration and use that value to left justify each line.
-        longest_string_length = 0
-        for task in self.tasks:
-            if status and task.metadata.status != status:
-                continue
+        self._sync_changed_lists(False)
 
-            string_length = task.get_left_justified_task_string_length()
+        if max_length is None:
+            return self._cached_output(('ci_task_list', status), lambda: code_block(self._task_list_text(status, workers)))
 
-            if string_length > longest_string_length:
-                longest_string_length = string_length
+        tasks_to_display = self._tasks_with_status(status)
+        lines = _iter_task_lines(tasks_to_display, self._widest_task(status, False))
 
-        return code_block('\n'.join([task.build_task_string(longest_string_length) for task in self.tasks
-                                    if not status or status and task.metadata.status == status]))
+        return render_within_budget(CODE_BLOCK_OPENING_TAGS, lines, CODE_BLOCK_CLOSING_TAGS,
+                                    max_length, lambda omitted_count: f'{omitted_count} more tasks omitted', '\n',
+                                    len(tasks_to_display))
 
-    def child_ci_job_tree(self, status: Optional[CIStatus] = None) -> str:
-        """Creates a job tree consisting of child jobs in monospaced font. Any tasks that belong to a job will show up under the job.
+    def iter_ci_task_list_lines(self, status: Optional[CIStatus] = None) -> Iterator[str]:
+        """Yields the lines of the task list created by ci_task_list one at a time, without the surrounding code block.
+
+        :param status: Only tasks with the given status will be displayed. If not given, all tasks will be displayed
+        """
+        self._sync_changed_lists(False)
+
+        return _iter_task_lines(self._tasks_with_status(status))
+
+    @instrumented('ci_task_list_pages')
+    def ci_task_list_pages(self, status: Optional[CIStatus] = None,
+                           max_length: int = GITHUB_COMMENT_MAX_LENGTH) -> List[str]:
+        """Creates a task list like ci_task_list, but splits the tasks across multiple task lists so that no task list is
+        longer than the given maximum length.
+
+        :param status: Only tasks with the given status will be displayed. If not given, all tasks will be displayed
+        :param max_length: The maximum length of each task list, which defaults to the maximum length of a GitHub comment
+
+        :raises: BudgetError when a single task does not fit in a task list of max_length
+        """
+        self._sync_changed_lists(False)
+
+        return render_pages(CODE_BLOCK_OPENING_TAGS, _iter_task_lines(self._tasks_with_status(status)),
+                            CODE_BLOCK_CLOSING_TAGS, max_length, '\n')
+
+    @instrumented('child_ci_job_tree')
+    def child_ci_job_tree(self, status: Optional[CIStatus] = None, max_length: Optional[int] = None,
+                          max_depth: Optional[int] = 1, collapse_succeeded: bool = False,
+                          workers: Optional[int] = None) -> str:
+        """Creates a job tree consisting of child jobs in monospaced font. Any tasks that belong to a job will show up under
+        the job, followed by its own child jobs if max_depth allows it.
+
+        The job tree is walked without recursion, so there is no limit on how deep the job hierarchy can be.
+
+        :param status: Only jobs and tasks with the given status will be displayed. If not given, all jobs and tasks will be
+        displayed. The child jobs of a job that is not displayed will not be displayed either
+        :param max_length: If given, the job tree will not be longer than this many characters. Jobs and tasks are rendered
+        until the next one does not fit, and the remaining ones are replaced by a final line saying how many were omitted
+        :param max_depth: The number of levels of child jobs to display, which defaults to only the direct child jobs of this
+        job. If None, the whole job hierarchy will be displayed
+        :param collapse_succeeded: If True, a job where the job itself and every task and job below it have succeeded will
+        be displayed as a single line, without its tasks and child jobs
+        :param workers: If given, the child jobs of a job with hundreds of thousands of jobs and tasks below it are split into
+        segments that are rendered by this many processes at once, and the output is identical. Each segment is a run of
+        child jobs with every job and task below them. This is not used with max_length. See
+        githubmarkdownui.parallel.render_chunks
+
+        :raises: BudgetError when the job tree cannot fit in max_length, even after omitting all of the jobs and tasks
+        """
+        self._sync_changed_lists()
+
+        if max_length is None:
+            return self._cached_output(('child_ci_job_tree', status, max_depth, collapse_succeeded), lambda: code_block(
+                self._job_tree_text(status, max_depth, collapse_succeeded, workers)))
+
+        tree_nodes = _iter_job_tree_nodes(self._child_jobs_with_status(status), status, max_depth, collapse_succeeded)
+        line_count = sum(1 + len(job._tasks_with_status(status) if show_tasks else [])
+                         for job, _, _, show_tasks, _ in tree_nodes)
+
+        return render_within_budget(CODE_BLOCK_OPENING_TAGS,
+                                    self.iter_child_ci_job_tree_lines(status, max_depth, collapse_succeeded),
+                                    CODE_BLOCK_CLOSING_TAGS, max_length,
+                                    lambda omitted_count: f'{omitted_count} more jobs and tasks omitted', '\n', line_count)
+
+    def iter_child_ci_job_tree_lines(self, status: Optional[CIStatus] = None, max_depth: Optional[int] = 1,
+                                     collapse_succeeded: bool = False) -> Iterator[str]:
+        """Yields the lines of the job tree created by child_ci_job_tree one at a time, without the surrounding code block.
+        This is the line of each job below this job, each followed by the lines of the tasks in the job.
+
+        :param status: Only jobs and tasks with the given status will be displayed. If not given, all jobs and tasks will be
+        displayed
+        :param max_depth: The number of levels of child jobs to display. If None, the whole job hierarchy will be displayed
+        :param collapse_succeeded: If True, a job where everything has succeeded will be displayed as a single line
+        """
+        self._sync_changed_lists()
+
+        return _iter_tree_lines(self._child_jobs_with_status(status), status, max_depth, collapse_succeeded)
+
+    @instrumented('child_ci_job_tree_pages')
+    def child_ci_job_tree_pages(self, status: Optional[CIStatus] = None, max_length: int = GITHUB_COMMENT_MAX_LENGTH,
+                                max_depth: Optional[int] = 1, collapse_succeeded: bool = False) -> List[str]:
+        """Creates a job tree like child_ci_job_tree, but splits the jobs and tasks across multiple job trees so that no job
+        tree is longer than the given maximum length.
 
         :param status: Only jobs and tasks with the given status will be displayed. If not given, all jobs and tasks will be
         displayed
+        :param max_length: The maximum length of each job tree, which defaults to the maximum length of a GitHub comment
+        :param max_depth: The number of levels of child jobs to display. If None, the whole job hierarchy will be displayed
+        :param collapse_succeeded: If True, a job where everything has succeeded will be displayed as a single line
+
+        :raises: BudgetError when a single job or task does not fit in a job tree of max_length
+        """
+        return render_pages(CODE_BLOCK_OPENING_TAGS, self.iter_child_ci_job_tree_lines(status, max_depth, collapse_succeeded),
+                            CODE_BLOCK_CLOSING_TAGS, max_length, '\n')
+
+    def _iter_ancestors(self) -> Iterator[CIJob]:
+        """Yields every job above this job, without recursion. A job that this job is below by more than one path, such as
+        when a job belongs to two jobs, is yielded once for each path, since it counts the jobs and tasks below it once for
+        each path as well.
+        """
+        stack = _linked_jobs(self._parent_link)
+        while stack:
+            job = stack.pop()
+            yield job
+            stack.extend(_linked_jobs(job._parent_link))
+
+    def _iter_jobs(self) -> Iterator[CIJob]:
+        """Yields this job and every job below it, parents before their child jobs, without recursion."""
+        stack = [self]
+        while stack:
+            job = stack.pop()
+            yield job
+            stack.extend(reversed(job.child_jobs or []))
+
+    def _iter_failures(self) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+        """Yields the name, failure type and failure message of each job and task with a failure type or failure message in
+        this job and every job below it.
+        """
+        for job in self._iter_jobs():
+            metadata = job.metadata
+            if metadata.failure_type is not None or metadata.failure_message is not None:
+                yield metadata.name, metadata.failure_type, metadata.failure_message
+
+            for task_name, failure_type, failure_message in _iter_task_failures(job.tasks):
+                yield f'{metadata.name}: {task_name}', failure_type, failure_message
+
+    def _cached_output(self, key: tuple, render: Callable[[], str]) -> str:
+        # The output depends on whether autoescaping and shortcode expansion are enabled.
+        key += (_display_settings(),)
+
+        if key not in self._output_cache:
+            self._output_cache[key] = render()
+
+        return self._output_cache[key]
+
+    def _task_list_text(self, status: Optional[CIStatus], workers: Optional[int]) -> str:
+        """Returns the lines of the task list created by ci_task_list, rendering them in parallel if workers is given."""
+        tasks = self._tasks_with_status(status)
+        bounds = chunk_bounds(len(tasks), workers) if workers else []
+        if len(bounds) <= 1:
+            return '\n'.join(_iter_task_lines(tasks))
+
+        # Every task is left justified to the widest task, so that is measured first and each chunk is aligned on its own.
+        return '\n'.join(render_chunks(_render_task_list_chunk, (tasks, _task_list_width(tasks)), bounds, workers))
+
+    def _job_tree_text(self, status: Optional[CIStatus], max_depth: Optional[int], collapse_succeeded: bool,
+                       workers: Optional[int]) -> str:
+        """Returns the lines of the job tree created by child_ci_job_tree, rendering them in parallel if workers is given."""
+        child_jobs = self._child_jobs_with_status(status)
+        bounds = []
+        if workers:
+            # The tasks of each job are aligned with each other but not with any other job, so each child job can be rendered
+            # on its own. Each one is weighted by the number of jobs and tasks below it, to balance the segments.
+            bounds = chunk_bounds(len(child_jobs), workers, [1 + sum(job._task_counts.values()) +
+                                                             sum(job._job_counts.values()) for job in child_jobs])
+
+        if len(bounds) <= 1:
+            return '\n'.join(_iter_tree_lines(child_jobs, status, max_depth, collapse_succeeded))
+
+        # Only the child jobs are given to the workers, which do not need this job or any job above it.
+        return '\n'.join(render_chunks(_render_job_tree_chunk, (child_jobs, status, max_depth, collapse_succeeded), bounds,
+                                       workers))
+
+    def _subtree_succeeded(self) -> bool:
+        """Returns whether this job and every task and job below it have succeeded."""
+        return self.metadata.status == CIStatus.SUCCEEDED and \
+            self._task_counts[CIStatus.SUCCEEDED] == sum(self._task_counts.values()) and \
+            self._job_counts[CIStatus.SUCCEEDED] == sum(self._job_counts.values())
+
+    def _sync_changed_lists(self, include_child_jobs: bool = True) -> None:
+        """Brings this job, and every job below it if include_child_jobs is True, up to date with any changes made to their
+        lists of tasks and child jobs in place.
+        """
+        for job in self._iter_jobs() if include_child_jobs else [self]:
+            if job._lists_changed():
+                job.mark_dirty()
+
+    def _lists_changed(self, added_tasks: int = 0) -> bool:
+        """Returns whether the lists of tasks and child jobs of this job were replaced or changed length since they were
+        last linked to it, or whether this job is a copy of the job they were linked to.
+
+        :param added_tasks: The number of tasks that were just added, which are not counted as a change
+        """
+        tasks, task_count, child_jobs, child_job_count = self._synced
+        return self._link.job is not self or tasks is not self.tasks or len(tasks) - added_tasks != task_count or \
+            child_jobs is not self.child_jobs or len(child_jobs or []) != child_job_count
+
+    def _replace_metadata(self, metadata: CIJobMetadata) -> None:
+        """Does the same as mark_dirty() after the metadata of this job was replaced, but only moves this job to its new
+        status in the status counts of the jobs above it, since none of the jobs and tasks below it changed.
+        """
+        _remove_owner(self.metadata, self)
+        object.__setattr__(self, 'metadata', metadata)
+        _add_owner(metadata, self)
+        self._metadata_changed()
+
+    def _metadata_changed(self) -> None:
+        metadata = self.metadata
+        self._output_cache.clear()
+        self._tree_lines_cache.clear()
+        self._fingerprint = None
+        self._revision += 1
+
+        previous_status = self._counted_status
+        self._counted_status = metadata.status
+
+        for parent in _linked_jobs(self._parent_link):
+            parent._child_job_index = None
+
+        for job in self._iter_ancestors():
+            job._output_cache.clear()
+            job._fingerprint = None
+            job._revision += 1
+            job._job_counts[previous_status] -= 1
+            job._job_counts[metadata.status] += 1
+
+    def _task_added(self, status: CIStatus, task: Optional[CITask] = None) -> None:
+        """Does the same as mark_dirty() after a task was added to the end of the tasks of this job, but only links the new
+        task and counts its status, instead of linking and counting every task again. This keeps building a job one task at
+        a time linear in the number of tasks.
+
+        :param status: The status of the new task
+        :param task: The new task, or None if the tasks of this job are a CITaskBatch
+        """
+        if self._lists_changed(added_tasks=1):
+            # The tasks were changed in place since they were counted, so adding the new task to the counts would not be
+            # enough.
+            self.mark_dirty()
+            return
+
+        if task is not None:
+            object.__setattr__(task, '_job_link', _add_link(task._job_link, self._link))
+            if self._task_index is not None:
+                self._task_index.setdefault(status, []).append(task)
+
+        self._synced = (self.tasks, len(self.tasks), self.child_jobs, len(self.child_jobs or []))
+        self._tree_lines_cache.clear()
+        self._update_task_widths(status, task)
+
+        for job in chain([self], self._iter_ancestors()):
+            job._output_cache.clear()
+            job._fingerprint = None
+            job._revision += 1
+            job._task_counts[status] += 1
+
+    def _task_updated(self, previous_status: CIStatus, status: CIStatus) -> None:
+        """Does the same as mark_dirty() after one of the tasks of this job was updated, but only moves that task from its
+        previous status to its new status in the status counts, instead of counting the status of every task again. This
+        keeps each update quick in jobs with a large number of tasks, such as while a LiveReport applies status events.
         """
-        job_tree_strings = []
+        if self._lists_changed():
+            # The tasks were changed in place since they were counted, so adjusting the counts would not be enough.
+            self.mark_dirty()
+            return
 
-        if status:
-            jobs_to_display = list(filter(lambda job: job.metadata.status == status, self.child_jobs))
+        self._tree_lines_cache.clear()
+        self._task_widths.clear()
+        if status != previous_status:
+            self._task_index = None
+
+        for job in chain([self], self._iter_ancestors()):
+            job._output_cache.clear()
+            job._fingerprint = None
+            job._revision += 1
+            job._task_counts[previous_status] -= 1
+            job._task_counts[status] += 1
+
+    def _sync_status_counts(self) -> Tuple[Counter, Counter]:
+        """Links the tasks and child jobs of this job to it, discards its status index, and counts the statuses of every
+        task and job below it again using the counts already kept by its child jobs. Returns how much the counts changed.
+        """
+        self._task_index = None
+        self._child_job_index = None
+
+        # Anything that was removed from this job since it was last linked still holds the old link, so that link is cut.
+        if self._link:
+            self._link.job = None
+        link = self._link = _JobLink(self)
+
+        if isinstance(self.tasks, CITaskBatch):
+            self.tasks._job_link = _add_link(self.tasks._job_link, link)
+            task_counts = self.tasks._status_counts.copy()
+        else:
+            task_counts = Counter()
+            # The links are set without going through CITask.__setattr__, since this is done for every task.
+            set_task_link = object.__setattr__
+            for task in self.tasks:
+                links = task._job_link
+                set_task_link(task, '_job_link', link if links is None else _add_link(links, link))
+                task_counts[task.metadata.status] += 1
+
+        job_counts = Counter()
+        for child_job in self.child_jobs or []:
+            child_job._parent_link = _add_link(child_job._parent_link, link)
+            task_counts.update(child_job._task_counts)
+            job_counts[child_job.metadata.status] += 1
+            job_counts.update(child_job._job_counts)
+
+        task_counts_change = task_counts.copy()
+        task_counts_change.subtract(self._task_counts)
+        job_counts_change = job_counts.copy()
+        job_counts_change.subtract(self._job_counts)
+
+        self._task_counts = task_counts
+        self._job_counts = job_counts
+        self._counted_status = self.metadata.status
+        self._synced = (self.tasks, len(self.tasks), self.child_jobs, len(self.child_jobs or []))
+
+        return task_counts_change, job_counts_change
+
+    def _get_task_index(self) -> Dict[CIStatus, List[CITask]]:
+        if self._task_index is None:
+            self._task_index = _index_by_status(self.tasks)
+
+        return self._task_index
+
+    def _get_child_job_index(self) -> Dict[CIStatus, List[CIJob]]:
+        if self._child_job_index is None:
+            self._child_job_index = _index_by_status(self.child_jobs or [])
+
+        return self._child_job_index
+
+    def _tasks_with_status(self, status: Optional[CIStatus]) -> Union[List[CITask], _TaskSelection]:
+        if isinstance(self.tasks, CITaskBatch):
+            return self.tasks._select(status)
+
+        if not status:
+            return self.tasks
+
+        return self._get_task_index().get(status, [])
+
+    def _widest_task(self, status: Optional[CIStatus], in_job_tree: bool) -> int:
+        """Returns the display width of the widest task with the given status, apart from its info, in the task list of this
+        job or in the job trees above it. It is kept up to date as tasks are added, so showing the first few tasks of a job
+        does not measure every one of them.
+        """
+        key = (status, in_job_tree, _display_settings())
+
+        if key not in self._task_widths:
+            self._task_widths[key] = _widest_task_width(self._tasks_with_status(status), in_job_tree, key[2])
+
+        return self._task_widths[key]
+
+    def _update_task_widths(self, status: CIStatus, task: Optional[CITask]) -> None:
+        """Brings the widths kept by _widest_task up to date after a task was added. Only the widths measured with the
+        current display settings are kept, since those are the ones the new task can be measured with.
+
+        :param status: The status of the new task
+        :param task: The new task, or None if the tasks of this job are a CITaskBatch
+        """
+        if not self._task_widths:
+            return
+
+        settings = _display_settings()
+        new_tasks = [task] if task is not None else self.tasks._select(None).slice(-1, None)
+
+        for key in list(self._task_widths):
+            task_status, in_job_tree, task_settings = key
+            if task_settings != settings:
+                del self._task_widths[key]
+            elif task_status in (None, status):
+                self._task_widths[key] = max(self._task_widths[key], _widest_task_width(new_tasks, in_job_tree, settings))
+
+    def _child_jobs_with_status(self, status: Optional[CIStatus]) -> List[CIJob]:
+        if not status:
+            return self.child_jobs or []
+
+        return self._get_child_job_index().get(status, [])
+
+    def _tree_lines(self, status: Optional[CIStatus], prefix: str, is_last: bool, show_tasks: bool,
+                    has_child_jobs: bool) -> Iterator[str]:
+        """Yields the line of this job in a job tree, followed by the lines of the tasks in this job."""
+        lines = self._unprefixed_tree_lines(status, is_last, show_tasks, has_child_jobs)
+        if not prefix:
+            yield from lines
+            return
+
+        # The prefix goes after the status emoji at the start of each line, which is followed by the first space.
+        for line in lines:
+            split = line.index(' ') + 1
+            yield f'{line[:split]}{prefix}{line[split:]}'
+
+    def _unprefixed_tree_lines(self, status: Optional[CIStatus], is_last: bool, show_tasks: bool,
+                               has_child_jobs: bool) -> Iterable[str]:
+        """Returns the lines from _tree_lines without the tree prefix, which is the same for each line. The prefix holds a
+        marker for every level above this job, so caching it would store O(depth) characters on every line.
+        """
+        key = (status, is_last, show_tasks, has_child_jobs, _display_settings())
+
+        if key in self._tree_lines_cache:
+            return self._tree_lines_cache[key]
+
+        return self._build_tree_lines(*key)
+
+    def _build_tree_lines(self, status: Optional[CIStatus], is_last: bool, show_tasks: bool, has_child_jobs: bool,
+                          settings: DisplaySettings) -> Iterator[str]:
+        """Yields the lines from _unprefixed_tree_lines one at a time, and caches them once every line was built. A job tree
+        that is cut short by max_length only builds the lines it displays.
+        """
+        # The last job should be prefixed with └─ so it looks like there's no other jobs after it.
+        job_tree_string = f'{self.metadata.status.value} {TREE_END_MARKER if is_last else TREE_CONTINUE_MARKER} ' \
+            f'{_display_text(self.metadata.name, settings)}'
+        lines = [job_tree_string]
+        yield job_tree_string
+
+        tasks_to_display = self._tasks_with_status(status) if show_tasks else []
+        # If this job is the last one under its parent then do not display a │ to imply the job tree extends.
+        task_prefix = f'{" " if is_last else TREE_MORE_JOBS_MARKER}\t'
+
+        # The tree prefix and both markers are as wide for every task, so they do not change how the tasks are left
+        # justified. Until the widest task is known, every task is measured up front to find it, and those measurements
+        # are kept so each task is still only measured once.
+        task_values = _iter_tree_display_values(tasks_to_display, settings)
+        width_key = (status, True, settings)
+        if tasks_to_display and width_key not in self._task_widths:
+            task_values = list(task_values)
+            self._task_widths[width_key] = max(task_width for *_, task_width in task_values)
+        longest_task_string_width = self._task_widths.get(width_key, 0)
+
+        for task_index, (task_status, task_name, task_info, task_width) in enumerate(task_values):
+            # The last task should be prefixed with └─ so it looks like there's no other tasks after it, unless the child
+            # jobs of this job come after it.
+            is_last_task = task_index == len(tasks_to_display) - 1 and not has_child_jobs
+            # Now left justify using the widest string and add additional info.
+            line = f'{task_status.value} {task_prefix}{TREE_END_MARKER if is_last_task else TREE_CONTINUE_MARKER} ' \
+                f'{task_name}{" " * (longest_task_string_width - task_width)}{"   " + task_info if task_info else ""}'
+            lines.append(line)
+            yield line
+
+        self._tree_lines_cache[status, is_last, show_tasks, has_child_jobs, settings] = lines
+
+
+def _add_link(links: _Links, link: _JobLink) -> _Links:
+    """Returns the given links with another link added, leaving out any links that were cut."""
+    if links is None:
+        return link
+
+    if isinstance(links, _JobLink):
+        return link if links.job is None else (links, link)
+
+    return tuple(existing_link for existing_link in links if existing_link.job is not None) + (link,)
+
+
+def _set_metadata_field(metadata: Union[CITaskMetadata, CIJobMetadata], name: str, value: Any) -> None:
+    """Sets a field of the given metadata, and lets each task or job it belongs to know that it changed."""
+    owners = metadata._owners
+    if owners is None:
+        object.__setattr__(metadata, name, value)
+        return
+
+    previous_status = metadata.status
+    object.__setattr__(metadata, name, value)
+
+    for owner in _iter_owners(owners):
+        if isinstance(owner, CITask):
+            owner._metadata_changed(previous_status)
         else:
-            jobs_to_display = self.child_jobs
-
-        for job_index, job in enumerate(jobs_to_display):
-            # The last job should be prefixed with └─ so it looks like there's no other jobs after it.
-            if job_index == len(jobs_to_display) - 1:
-                job_tree_strings.append(f'{job.metadata.status.value} └─ {job.metadata.name}')
-            else:
-                job_tree_strings.append(f'{job.metadata.status.value} ├─ {job.metadata.name}')
-
-            if status:
-                tasks_to_display = list(filter(lambda task: task.metadata.status == status, job.tasks))
-            else:
-                tasks_to_display = job.tasks
-
-            task_tree_strings = []
-            longest_task_string_length = 0
-            # Loop through the tasks the first time to build the left justified strings and calculate max string length.
-            for task_index, task in enumerate(tasks_to_display):
-                # If this task is part of the last job then do not display a │ to imply the job tree extends.
-                job_tree_extender = TREE_MORE_JOBS_MARKER if job_index != len(jobs_to_display) - 1 else ' '
-                # The last task should be prefixed with └─ so it looks like there's no other tasks after it.
-                task_tree_extender = TREE_CONTINUE_MARKER if task_index != len(tasks_to_display) - 1 else TREE_END_MARKER
-
-                task_tree_string = f'{task.metadata.status.value} {job_tree_extender}\t{task_tree_extender} ' \
-                    f'{task.metadata.name}'
-                string_length = len(task_tree_string)
-
-                if string_length > longest_task_string_length:
-                    longest_task_string_length = string_length
-
-                task_tree_strings.append(task_tree_string)
-
-            # Now left justify using the longest string length and add additional info.
-            for task_index, task in enumerate(tasks_to_display):
-                job_tree_strings.append(f'{task_tree_strings[task_index]:<{longest_task_string_length}}'
-                                        f'{"   " + task.metadata.info if task.metadata.info else ""}')
-
-        return code_block('\n'.join(job_tree_strings))
+            owner._metadata_changed()
+
+
+def _metadata_state(metadata: Union[CITaskMetadata, CIJobMetadata]) -> Dict[str, Any]:
+    """Returns the fields of the given metadata to copy or pickle. The tasks and jobs it belongs to are left out, since each
+    of them adds itself back to the metadata once it is copied or unpickled along with it.
+    """
+    return {metadata_field.name: getattr(metadata, metadata_field.name) for metadata_field in fields(metadata)
+            if metadata_field.name != '_owners'}
+
+
+def _set_metadata_state(metadata: Union[CITaskMetadata, CIJobMetadata], state: Dict[str, Any]) -> None:
+    # A task or job may have already added itself to the metadata, if it was unpickled first.
+    if not hasattr(metadata, '_owners'):
+        object.__setattr__(metadata, '_owners', None)
+
+    for name, value in state.items():
+        object.__setattr__(metadata, name, value)
+
+
+def _add_owner(metadata: Union[CITaskMetadata, CIJobMetadata], owner: Union[CITask, CIJob]) -> None:
+    """Records that the given metadata belongs to a task or job, unless it already does."""
+    owners = getattr(metadata, '_owners', None)
+    if owners is None:
+        object.__setattr__(metadata, '_owners', owner)
+    elif not any(existing_owner is owner for existing_owner in _iter_owners(owners)):
+        object.__setattr__(metadata, '_owners', (*_iter_owners(owners), owner))
+
+
+def _remove_owner(metadata: Union[CITaskMetadata, CIJobMetadata], owner: Union[CITask, CIJob]) -> None:
+    """Records that the given metadata no longer belongs to a task or job, after it was given new metadata."""
+    owners = tuple(existing_owner for existing_owner in _iter_owners(metadata._owners) if existing_owner is not owner)
+    object.__setattr__(metadata, '_owners', owners if len(owners) > 1 else owners[0] if owners else None)
+
+
+def _iter_owners(owners: _Owners) -> Tuple[Union[CITask, CIJob], ...]:
+    if owners is None:
+        return ()
+
+    return owners if isinstance(owners, tuple) else (owners,)
+
+
+def _linked_jobs(links: _Links) -> List[CIJob]:
+    """Returns the job of each of the given links that was not cut."""
+    if links is None:
+        return []
+
+    if isinstance(links, _JobLink):
+        return [links.job] if links.job is not None else []
+
+    return [link.job for link in links if link.job is not None]
+
+
+@lru_cache(maxsize=None)
+def _status_width(status: CIStatus) -> int:
+    return display_width(status.value)
+
+
+def _task_seconds(tasks: Union[List[CITask], CITaskBatch]) -> float:
+    if isinstance(tasks, CITaskBatch):
+        return tasks.total_seconds()
+
+    return sum(seconds for seconds in (_seconds(task.metadata.duration_value) for task in tasks) if seconds is not None)
+
+
+def _to_duration(value: Optional[Union[Duration, float, str]]) -> Optional[Duration]:
+    """Converts the duration given to the metadata of a job or task to a Duration, where an empty string is no duration."""
+    if value is None or value == '':
+        return None
+
+    if isinstance(value, Duration):
+        return value
+
+    return _cached_duration(value)
+
+
+def _duration_text(value: Optional[Union[Duration, float, str]]) -> Optional[str]:
+    """Returns the text the duration given to the metadata of a task is displayed as, or None if there is no duration."""
+    if value is None or value == '':
+        return None
+
+    # Durations with the same number of seconds are equal, even if they are displayed differently, so they are not cached.
+    if isinstance(value, Duration):
+        return str(value)
+
+    return _cached_duration_text(value)
+
+
+@lru_cache(maxsize=4096, typed=True)
+def _cached_duration_text(value: Union[float, str]) -> str:
+    return str(_cached_duration(value))
+
+
+def _iter_metadata_values(metadata: Union[CITaskMetadata, CIJobMetadata]) -> Iterator[Any]:
+    """Yields the values of the given metadata to fingerprint. The duration is fingerprinted as the Duration it is displayed
+    as, so a duration given as 90, 90.0 or 1m 30s has the same fingerprint as it did when it was converted to a Duration.
+    """
+    values = iter_dataclass_values(metadata)
+    for name, value in zip(values, values):
+        if name == 'duration':
+            value = metadata.duration_value
+            if value is None:
+                continue
+
+        yield name
+        yield value
+
+
+def _seconds(duration: Optional[Duration]) -> Optional[float]:
+    """Returns the number of seconds of a duration, or None if there is no duration or its length is not known."""
+    return None if duration is None else duration.seconds
+
+
+def _batch_seconds(duration: Optional[Union[Duration, float, str]]) -> float:
+    """Returns the number of seconds of a duration as it is stored in a CITaskBatch, where NaN means no duration."""
+    seconds = _seconds(_to_duration(duration))
+
+    return nan if seconds is None else seconds
+
+
+def _iter_task_failures(tasks: Union[List[CITask], CITaskBatch]) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+    if isinstance(tasks, CITaskBatch):
+        return tasks._iter_failures()
+
+    return ((task.metadata.name, task.metadata.failure_type, task.metadata.failure_message) for task in tasks
+            if task.metadata.failure_type is not None or task.metadata.failure_message is not None)
+
+
+@dataclass
+class _FailureGroup:
+    """The failures with the same failure type and failure message, and the first few jobs and tasks they affect."""
+    failure_type: Optional[str]
+    failure_message: Optional[str]
+    count: int = 0
+    names: List[str] = field(default_factory=list)
+
+
+def _group_failures(failures: Iterable[Tuple[str, Optional[str], Optional[str]]], max_names: int) -> List[_FailureGroup]:
+    """Groups the given failures by a fingerprint of their failure type and normalized failure message, in the order each
+    distinct failure was first found.
+    """
+    groups: Dict[str, _FailureGroup] = {}
+
+    for name, failure_type, failure_message in failures:
+        key = fingerprint(failure_type, _normalize_failure_message(failure_message))
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = _FailureGroup(failure_type, failure_message)
+
+        group.count += 1
+        if len(group.names) < max_names:
+            group.names.append(name)
+
+    return list(groups.values())
+
+
+def _normalize_failure_message(failure_message: Optional[str]) -> Optional[str]:
+    if failure_message is None:
+        return None
+
+    return _MEMORY_ADDRESS_PATTERN.sub('0x', ' '.join(failure_message.split()))
+
+
+def _failure_section(group: _FailureGroup) -> str:
+    title = f'{group.failure_type or "Failure"} ({group.count} {"failure" if group.count == 1 else "failures"})'
+    names: List[str] = group.names
+    if group.count > len(names):
+        names = names + [f'and {group.count - len(names)} more']
+
+    failure_message = group.failure_message
+    if failure_message and autoexpand_shortcodes_enabled():
+        failure_message = expand_shortcodes(failure_message)
+
+    message = code_block(escape(failure_message)) if failure_message else ''
+
+    return collapsible_section(title, f'{message}{UnorderedList(names)}')
+
+
+def _iter_display_values(tasks: Union[List[CITask], _TaskSelection],
+                         settings: DisplaySettings) -> Iterator[Tuple[CIStatus, str, Optional[str]]]:
+    """Yields the status, displayed name and displayed info of each task."""
+    if isinstance(tasks, _TaskSelection):
+        return tasks.iter_display_values(settings)
+
+    return ((task.metadata.status, task._name(settings), task.metadata.info and task._info(settings)) for task in tasks)
+
+
+def _display_settings() -> DisplaySettings:
+    """Returns whether autoescaping and shortcode expansion are enabled, which the displayed names and info depend on."""
+    return _DISPLAY_SETTINGS[autoescape_enabled(), autoexpand_shortcodes_enabled()]
+
+
+def _display_text(text: str, settings: DisplaySettings) -> str:
+    """Returns a name or info as it is displayed, with its shortcodes expanded and then escaped if enabled."""
+    escaping, expanding = settings
+    if expanding:
+        text = expand_shortcodes(text)
+
+    return escape(text) if escaping else text
+
+
+def _index_by_status(items: List[Union[CIJob, CITask]]) -> Dict[CIStatus, List[Union[CIJob, CITask]]]:
+    index = {}
+    for item in items:
+        index.setdefault(item.metadata.status, []).append(item)
+
+    return index
+
+
+def _duration_string(duration_strings: Dict[float, Tuple[str, int]], seconds: float) -> Tuple[str, int]:
+    """Returns the duration string of a task in a task list and its display width, caching it in the given dict."""
+    if seconds not in duration_strings:
+        duration = format_duration(seconds)
+        duration_strings[seconds] = (' ' + bold(f'({duration})'), len(duration) + 3)
+
+    return duration_strings[seconds]
+
+
+def _format_task_string(status: CIStatus, name: str, duration: Optional[str], info: Optional[str], padding: int) -> str:
+    # The strong tags around the duration are not displayed, so they are ignored when left justifying the string.
+    duration_string = ' ' + bold(f'({duration})') if duration else ''
+    info_string = '   ' + info if info else ''
+
+    return f'{status.value}  {name}{duration_string}{" " * padding}{info_string}'
+
+
+def _iter_task_lines(tasks: Union[List[CITask], _TaskSelection], width: Optional[int] = None) -> Iterator[str]:
+    """Yields the line of each task in a task list, left justified to the given width or else the widest task."""
+    if isinstance(tasks, _TaskSelection):
+        return tasks.iter_task_lines(width)
+
+    return _iter_cached_task_lines(tasks, width)
+
+
+def _iter_cached_task_lines(tasks: List[CITask], width: Optional[int]) -> Iterator[str]:
+    # Want to display the results like this, and have the additional info in each line aligned with each other:
+    # <emoji>  <task name> (<task duration>)   <additional info>
+    # Need to find the longest emoji + task name + task duration and use that value to left justify each line.
+    longest_string_length = _task_list_width(tasks) if width is None else width
+
+    for task in tasks:
+        yield task.build_task_string(longest_string_length)
+
+
+def _task_list_width(tasks: Union[List[CITask], _TaskSelection]) -> int:
+    """Returns the display width of the widest task in a task list, apart from its info."""
+    if isinstance(tasks, _TaskSelection):
+        return tasks.left_justified_width()
+
+    return max((task.get_left_justified_task_string_length() for task in tasks), default=0)
+
+
+def _widest_task_width(tasks: Union[List[CITask], _TaskSelection], in_job_tree: bool, settings: DisplaySettings) -> int:
+    """Returns the display width of the widest task, apart from its info, in a task list or in a job tree without the tree
+    prefix.
+    """
+    if not in_job_tree:
+        return _task_list_width(tasks)
+
+    return max((task_width for *_, task_width in _iter_tree_display_values(tasks, settings)), default=0)
+
+
+def _iter_tree_display_values(tasks: Union[List[CITask], _TaskSelection],
+                              settings: DisplaySettings) -> Iterator[Tuple[CIStatus, str, Optional[str], int]]:
+    """Yields the status, displayed name and displayed info of each task, and the display width of its status and name."""
+    display_values = _iter_display_values(tasks, settings)
+
+    # The names are measured a chunk at a time, so a chunk of plain ASCII names is measured all at once.
+    while True:
+        chunk = list(islice(display_values, _NAME_CHUNK_SIZE))
+        if not chunk:
+            return
+
+        name_widths = display_widths([name for _, name, _ in chunk])
+        for (status, name, info), name_width in zip(chunk, name_widths):
+            yield status, name, info, _status_width(status) + name_width
+
+
+def _iter_tree_lines(child_jobs: Sequence[CIJob], status: Optional[CIStatus], max_depth: Optional[int],
+                     collapse_succeeded: bool, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+    """Yields the lines of the job tree below the given child jobs of a job, as CIJob.iter_child_ci_job_tree_lines does.
+    Only the child jobs from start to stop are rendered, along with the jobs and tasks below them.
+    """
+    for job, *tree_position in _iter_job_tree_nodes(child_jobs, status, max_depth, collapse_succeeded, start, stop):
+        yield from job._tree_lines(status, *tree_position)
+
+
+def _iter_job_tree_nodes(child_jobs: Sequence[CIJob], status: Optional[CIStatus], max_depth: Optional[int],
+                         collapse_succeeded: bool, start: int = 0,
+                         stop: Optional[int] = None) -> Iterator[Tuple[CIJob, str, bool, bool, bool]]:
+    """Walks the given child jobs of a job and the jobs below them in the order they appear in the job tree, using an
+    explicit stack instead of recursion. For each job, yields the job, the tree prefix in front of its marker, whether it is
+    the last item under its parent, whether its tasks are displayed, and whether any of its child jobs are displayed. Only
+    the child jobs from start to stop are walked, along with the jobs below them.
+    """
+    # Push the jobs in reverse so they are popped off the stack in order.
+    stack = [(child_jobs[index], '', index == len(child_jobs) - 1, 1)
+             for index in reversed(range(start, len(child_jobs) if stop is None else stop))]
+
+    while stack:
+        job, prefix, is_last, depth = stack.pop()
+        collapsed = collapse_succeeded and job._subtree_succeeded()
+
+        if collapsed or (max_depth is not None and depth >= max_depth):
+            child_jobs = []
+        else:
+            child_jobs = job._child_jobs_with_status(status)
+
+        yield job, prefix, is_last, not collapsed, bool(child_jobs)
+
+        # If this job is the last one under its parent then do not display a │ to imply the job tree extends.
+        child_prefix = f'{prefix}{" " if is_last else TREE_MORE_JOBS_MARKER}\t'
+        for index in reversed(range(len(child_jobs))):
+            stack.append((child_jobs[index], child_prefix, index == len(child_jobs) - 1, depth + 1))
+
+
+def _render_task_list_chunk(worker_input: tuple, start: int, stop: int) -> str:
+    """Renders the lines of the tasks in a task list from start to stop, for CIJob.ci_task_list with workers."""
+    tasks, width = worker_input
+    tasks = tasks.slice(start, stop) if isinstance(tasks, _TaskSelection) else tasks[start:stop]
+
+    return '\n'.join(_iter_task_lines(tasks, width))
+
+
+def _render_job_tree_chunk(worker_input: tuple, start: int, stop: int) -> str:
+    """Renders the lines of the child jobs in a job tree from start to stop, for CIJob.child_ci_job_tree with workers."""
+    child_jobs, status, max_depth, collapse_succeeded = worker_input
+
+    return '\n'.join(_iter_tree_lines(child_jobs, status, max_depth, collapse_succeeded, start, stop))
@@ -1,3 +1,8 @@
+CODE_BLOCK_OPENING_TAGS = '<pre><code>'
+CODE_BLOCK_CLOSING_TAGS = '</code></pre>'
+
+GITHUB_COMMENT_MAX_LENGTH = 65536
+
 HEADING_MIN_LEVEL = 1
 HEADING_MAX_LEVEL = 6
 
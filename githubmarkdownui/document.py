@@ -0,0 +1,213 @@
+from __future__ import annotations
+from contextlib import contextmanager
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
+
+from githubmarkdownui.blocks.leaf import heading, thematic_break
+from githubmarkdownui.blocks.lists import HtmlList, iter_task_list
+from githubmarkdownui.blocks.table import TableAlignment, TableFormat, choose_table_format, iter_table
+from githubmarkdownui.ci import CIJob, CIStatus
+from githubmarkdownui.constants import CODE_BLOCK_CLOSING_TAGS, CODE_BLOCK_OPENING_TAGS
+from githubmarkdownui.escape import escape_if_enabled
+from githubmarkdownui.instrumentation import current_label, iter_instrumented
+
+# A block is stored as a function that yields the fragments of its output, so nothing is rendered until the document is.
+Block = Callable[[], Iterable[str]]
+# Each block is added along with its type and label, which it is recorded under when instrumentation is enabled.
+_LabelledBlock = Tuple[str, str, Block]
+
+
+class MarkdownDocument:
+    """Builds a document out of blocks such as headings, tables, lists, code blocks, collapsible sections and CI job trees,
+    and renders the whole document in a single pass. Each block writes its output one fragment at a time, so a block nested
+    inside a collapsible section is never copied into an intermediate string. Blocks are separated by a newline, and tables
+    in Markdown syntax by a blank line, which they need to be rendered.
+
+    Headings are rendered when they are added, and every other block is rendered when the document is, so autoescaping
+    applies to them if it is enabled at that time. See githubmarkdownui.escape.autoescape. The same goes for compact HTML,
+    see githubmarkdownui.emitter.compact_html. When instrumentation is enabled, each block is recorded under the label that
+    was active when the block was added. See githubmarkdownui.instrumentation.instrument.
+
+    Each method that adds a block returns the document, so calls can be chained. For example:
+
+    document = MarkdownDocument().heading('CI Results', 2)
+    with document.collapsible_section('Failed jobs'):
+        document.child_ci_job_tree(ci_job, CIStatus.FAILED)
+    document.write(stream)
+    """
+
+    def __init__(self):
+        self._blocks: List[_LabelledBlock] = []
+        # The block lists that new blocks are added to. The last one belongs to the innermost open collapsible section.
+        self._block_stack: List[List[_LabelledBlock]] = [self._blocks]
+
+    def add(self, text: Union[str, Block]) -> MarkdownDocument:
+        """Adds a block of already rendered text, such as the output of bold() or check_description(), or a function that
+        yields the fragments of a block when the document is rendered.
+
+        :param text: The text of the block, or a function that yields the fragments of the block
+        """
+        return self._add('text', text if callable(text) else lambda: (text,))
+
+    def heading(self, text: str, level: int) -> MarkdownDocument:
+        """Adds a heading. See githubmarkdownui.blocks.leaf.heading.
+
+        :param text: The text for the heading
+        :param level: The level of the heading between 1 and 6 inclusive
+
+        :raises: Exception if the level is not between 1 and 6 inclusive
+        """
+        rendered_heading = heading(text, level)
+        return self._add('heading', lambda: (rendered_heading,))
+
+    def thematic_break(self) -> MarkdownDocument:
+        """Adds a thematic break. See githubmarkdownui.blocks.leaf.thematic_break."""
+        return self._add('thematic_break', lambda: (thematic_break(),))
+
+    def table(self, content: List[List[str]], alignment: List[Optional[TableAlignment]] = None,
+              table_format: TableFormat = TableFormat.HTML) -> MarkdownDocument:
+        """Adds a table. See githubmarkdownui.blocks.table.table.
+
+        :param content: A list of lists containing the contents of the table
+        :param alignment: An optional list specifying how each column of the table should be aligned
+        :param table_format: The syntax to create the table with. With TableFormat.AUTO, a table inside a collapsible section
+        always uses HTML syntax, since Markdown syntax is not rendered there
+        """
+        if table_format == TableFormat.AUTO and len(self._block_stack) > 1:
+            table_format = TableFormat.HTML
+
+        return self._add('table', lambda: _iter_table(content, alignment, table_format))
+
+    def html_list(self, html_list: HtmlList) -> MarkdownDocument:
+        """Adds an OrderedList or UnorderedList.
+
+        :param html_list: The list to add
+        """
+        return self._add('html_list', html_list.iter_fragments)
+
+    def task_list(self, items: Iterable[Union[str, Tuple[str, bool]]],
+                  items_to_check: Optional[Iterable[int]] = None) -> MarkdownDocument:
+        """Adds a task list. See githubmarkdownui.blocks.lists.task_list.
+
+        :param items: The items in the task list, each either a string or an (item, checked) pair. If the items come from a
+        generator, the document can only be rendered once
+        :param items_to_check: The indices (starting from 0) of the items that should be checked off
+        """
+        return self._add('task_list', lambda: iter_task_list(items, items_to_check))
+
+    def code_block(self, text: Union[str, Iterable[str]], language: Optional[str] = None) -> MarkdownDocument:
+        """Adds a code block. See githubmarkdownui.blocks.leaf.code_block.
+
+        :param text: The text inside the code block, or an iterable of lines which will be separated by newlines. If the lines
+        come from a generator, the document can only be rendered once
+        :param language: The language to use for syntax highlighting
+        """
+        lines = [text] if isinstance(text, str) else text
+
+        if language:
+            return self._add('code_block', lambda: _iter_code_block(f'```{language}\n', lines, '\n```'))
+
+        return self._add('code_block', lambda: _iter_code_block(CODE_BLOCK_OPENING_TAGS, lines, CODE_BLOCK_CLOSING_TAGS))
+
+    def ci_task_list(self, ci_job: CIJob, status: Optional[CIStatus] = None) -> MarkdownDocument:
+        """Adds the task list of a job. See githubmarkdownui.ci.CIJob.ci_task_list.
+
+        :param ci_job: The job whose tasks will be displayed
+        :param status: Only tasks with the given status will be displayed. If not given, all tasks will be displayed
+        """
+        return self._add('ci_task_list', lambda: _iter_code_block(
+            CODE_BLOCK_OPENING_TAGS, ci_job.iter_ci_task_list_lines(status), CODE_BLOCK_CLOSING_TAGS))
+
+    def child_ci_job_tree(self, ci_job: CIJob, status: Optional[CIStatus] = None, max_depth: Optional[int] = 1,
+                          collapse_succeeded: bool = False) -> MarkdownDocument:
+        """Adds the job tree of the child jobs of a job. See githubmarkdownui.ci.CIJob.child_ci_job_tree.
+
+        :param ci_job: The job whose child jobs will be displayed
+        :param status: Only jobs and tasks with the given status will be displayed. If not given, all jobs and tasks will be
+        displayed
+        :param max_depth: The number of levels of child jobs to display. If None, the whole job hierarchy will be displayed
+        :param collapse_succeeded: If True, a job where everything has succeeded will be displayed as a single line
+        """
+        return self._add('child_ci_job_tree', lambda: _iter_code_block(
+            CODE_BLOCK_OPENING_TAGS, ci_job.iter_child_ci_job_tree_lines(status, max_depth, collapse_succeeded),
+            CODE_BLOCK_CLOSING_TAGS))
+
+    @contextmanager
+    def collapsible_section(self, title: str) -> Iterator[MarkdownDocument]:
+        """Adds a collapsible section with the given title. Any blocks added inside the with block will be displayed inside
+        this collapsible section. See githubmarkdownui.utils.collapsible_section.
+
+        :param title: The title for this collapsible section
+        """
+        section_blocks: List[_LabelledBlock] = []
+        self._add('collapsible_section', lambda: _iter_collapsible_section(title, section_blocks))
+        self._block_stack.append(section_blocks)
+
+        try:
+            yield self
+        finally:
+            self._block_stack.pop()
+
+    def iter_fragments(self) -> Iterator[str]:
+        """Renders the document one fragment at a time."""
+        return _iter_blocks(self._blocks)
+
+    def write(self, stream: TextIO) -> None:
+        """Renders the document straight into a file-like object.
+
+        :param stream: The file-like object the document will be written to
+        """
+        write = stream.write
+        for fragment in self.iter_fragments():
+            write(fragment)
+
+    def render(self) -> str:
+        """Renders the document into a string with a single join."""
+        return ''.join(self.iter_fragments())
+
+    def __str__(self) -> str:
+        return self.render()
+
+    def _add(self, block_type: str, block: Block) -> MarkdownDocument:
+        self._block_stack[-1].append((block_type, current_label(), block))
+        return self
+
+
+def _iter_blocks(blocks: List[_LabelledBlock]) -> Iterator[str]:
+    for index, (block_type, label, block) in enumerate(blocks):
+        if index:
+            yield '\n'
+
+        yield from iter_instrumented(block_type, label, block())
+
+
+def _iter_table(content: List[List[str]], alignment: List[Optional[TableAlignment]],
+                table_format: TableFormat) -> Iterator[str]:
+    if table_format == TableFormat.AUTO:
+        table_format = choose_table_format(content, alignment)
+
+    if table_format == TableFormat.MARKDOWN:
+        # A Markdown table has to be separated from the text around it by blank lines.
+        yield '\n'
+        yield from iter_table(content[0], islice(content, 1, None), alignment, table_format)
+        yield '\n'
+    else:
+        yield from iter_table(content[0], islice(content, 1, None), alignment)
+
+
+def _iter_code_block(opening_tags: str, lines: Iterable[str], closing_tags: str) -> Iterator[str]:
+    yield opening_tags
+
+    for index, line in enumerate(lines):
+        if index:
+            yield '\n'
+
+        yield line
+
+    yield closing_tags
+
+
+def _iter_collapsible_section(title: str, blocks: List[_LabelledBlock]) -> Iterator[str]:
+    yield f'<details><summary>{escape_if_enabled(title)}</summary>\n'
+    yield from _iter_blocks(blocks)
+    yield '</details>'
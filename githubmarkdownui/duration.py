@@ -0,0 +1,112 @@
+from __future__ import annotations
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Optional, Union
+
+from githubmarkdownui.slots import slotted
+
+_DURATION_PART_PATTERN = re.compile(r'\s*(\d+(?:\.\d+)?)\s*(ms|h|m|s)')
+_SECONDS_PER_UNIT = {'h': 3600, 'm': 60, 's': 1, 'ms': 0.001}
+
+
+@slotted
+@dataclass(frozen=True, order=True)
+class Duration:
+    """A length of time in seconds, which can be sorted, compared and added together. A duration created from a string such
+    as 8s or 25m 37s will display that string as is, otherwise it will be formatted the same way, such as 1h 20m.
+
+    A duration created by from_value() from a string that is not a duration, such as 2 min or N/A, keeps that string as its
+    text and has seconds of None. It is displayed as is, but it is left out of sums, and cannot be sorted.
+    """
+    seconds: Optional[float]
+    text: Optional[str] = field(default=None, compare=False)
+
+    @classmethod
+    def parse(cls, text: str) -> Duration:
+        """Creates a duration from a string made up of numbers followed by the units h, m, s or ms, such as 8s, 1.5s or
+        25m 37s.
+
+        :param text: The string to parse
+
+        :raises: ValueError if the string is not a duration
+        """
+        seconds = 0
+        position = 0
+
+        for match in _DURATION_PART_PATTERN.finditer(text):
+            if match.start() != position:
+                break
+
+            seconds += float(match.group(1)) * _SECONDS_PER_UNIT[match.group(2)]
+            position = match.end()
+
+        if position == 0 or text[position:].strip():
+            raise ValueError(f'{text!r} is not a duration such as 8s or 25m 37s')
+
+        return cls(seconds, text)
+
+    @classmethod
+    def from_value(cls, value: Union[str, int, float, Duration]) -> Duration:
+        """Creates a duration from a string such as 25m 37s, a number of seconds, or another duration. A string that is not
+        a duration, such as 2 min or 00:25:37, is kept as the text of a duration whose seconds are None.
+
+        :param value: The value to create the duration from
+        """
+        if isinstance(value, Duration):
+            return value
+
+        if isinstance(value, str):
+            try:
+                return cls.parse(value)
+            except ValueError:
+                return cls(None, value)
+
+        return cls(value)
+
+    def __add__(self, other: Duration) -> Duration:
+        if not isinstance(other, Duration):
+            return NotImplemented
+
+        # A duration whose length is not known adds nothing, so a sum of durations is the sum of those that are known.
+        if other.seconds is None:
+            return self
+        if self.seconds is None:
+            return other
+
+        return Duration(self.seconds + other.seconds)
+
+    def __radd__(self, other: Union[int, Duration]) -> Duration:
+        # sum() starts from 0, so adding a duration to 0 gives the duration.
+        if isinstance(other, int) and other == 0:
+            return self
+
+        return NotImplemented
+
+    def __str__(self) -> str:
+        if self.text is not None:
+            return self.text
+
+        return format_duration(self.seconds)
+
+
+@lru_cache(maxsize=4096)
+def format_duration(seconds: float) -> str:
+    """Formats a number of seconds as a string such as 8s, 25m 37s or 1h 20m. Any parts that are zero are left out, and the
+    seconds are rounded to two decimal places. Durations under a second are formatted in milliseconds, such as 250ms.
+
+    :param seconds: The number of seconds to format
+    """
+    if 0 < seconds < 0.9995:
+        return f'{round(seconds * 1000)}ms'
+
+    # Round before splitting the seconds into hours and minutes, so that 59.999 seconds is carried over into 1m instead of
+    # being displayed as 60s.
+    hours, seconds = divmod(round(seconds, 2), 3600)
+    minutes, seconds = divmod(seconds, 60)
+    seconds = round(seconds, 2)
+
+    parts = [f'{int(hours)}h' if hours else '', f'{int(minutes)}m' if minutes else '',
+             f'{seconds:g}s' if seconds or not (hours or minutes) else '']
+
+    return ' '.join(part for part in parts if part)
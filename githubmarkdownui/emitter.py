@@ -0,0 +1,57 @@
+from __future__ import annotations
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+# The tags whose closing tag HTML lets be left out, since the next item, cell or row, or the end of the enclosing list or
+# table, closes them as well.
+OPTIONAL_CLOSING_TAGS = frozenset({'li', 'td', 'th', 'tr'})
+
+_compact_html: ContextVar[bool] = ContextVar('compact_html', default=False)
+
+
+def compact_html_enabled() -> bool:
+    """Returns whether compact HTML is enabled in the current context. See compact_html()."""
+    return _compact_html.get()
+
+
+@contextmanager
+def compact_html(enabled: bool = True) -> Iterator[None]:
+    """Enables compact HTML inside the with block. While compact HTML is enabled, tables and lists leave out the closing
+    tags that HTML does not require, which are </li>, </td>, </th> and </tr>, and a table whose columns all have the same
+    alignment sets it once on each row instead of on every cell. The output is displayed the same way on GitHub, and is
+    usually a quarter to a half shorter. For example:
+
+    with compact_html():
+        table([['test', 'result'], ['test_a', 'passed']])
+
+    gives <table><thead><tr><th>test<th>result</thead><tbody><tr><td>test_a<td>passed</tbody></table>. Functions that
+    create tables or lists also take a compact parameter, which overrides this setting for a single call. Like
+    autoescaping, the setting is stored in a context variable, so it only applies to the current thread or asyncio task.
+
+    :param enabled: Whether compact HTML should be enabled, which allows it to be disabled inside a with block that enabled
+    it
+    """
+    token = _compact_html.set(enabled)
+
+    try:
+        yield
+    finally:
+        _compact_html.reset(token)
+
+
+def resolve_compact(compact: Optional[bool]) -> bool:
+    """Returns the given compact parameter, or whether compact HTML is enabled in the current context if it is None.
+
+    :param compact: Whether compact HTML was asked for in a single call, or None to use the current setting
+    """
+    return compact_html_enabled() if compact is None else compact
+
+
+def closing_tag(tag: str, compact: bool) -> str:
+    """Returns the closing tag of an element, or an empty string if the output is compact and the closing tag is optional.
+
+    :param tag: The name of the element, such as td
+    :param compact: Whether the output is compact
+    """
+    return '' if compact and tag in OPTIONAL_CLOSING_TAGS else f'</{tag}>'
@@ -1,4 +1,18 @@
+import pkgutil
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
 from enum import Enum
+from functools import lru_cache
+from typing import Dict, Iterator, Optional
+
+from githubmarkdownui.escape import Markup
+
+# A shortcode such as :x: or :+1:, where the name can be looked up in the shortcode table. The closing colon is only looked
+# ahead at, since when the name is not a known shortcode that colon can open the next one, as in :foo:x:.
+_SHORTCODE_PATTERN = re.compile(r':([a-z0-9_+\-]+)(?=:)')
+
+_autoexpand_shortcodes: ContextVar[bool] = ContextVar('autoexpand_shortcodes', default=False)
 
 
 class Emoji(Enum):
@@ -9,7 +23,96 @@ class Emoji(Enum):
     CHECK_MARK = '✅'
     SQUARE = '⬜'
     HOURGLASS = '⏳'
+    NEXT_TRACK = '⏭️'
     INFORMATION = 'ℹ️'
     PAGE = '📄'
     LOCK = '🔒'
     KEY = '🔑'
+
+
+def expand_shortcodes(text: str) -> str:
+    """Replaces each emoji shortcode in the given text, such as :x: or :white_check_mark:, with the emoji it stands for.
+    GitHub does not expand shortcodes inside code blocks, so text that will be placed in one has to be expanded first.
+    Anything between two colons that is not a known shortcode, such as the time in 12:30:45, is left as is. Neither
+    shortcodes nor emojis contain HTML, so a Markup stays a Markup.
+
+    The shortcodes are those used by GitHub, taken from gemoji. They are read from a data file the first time they are
+    needed, so importing this module stays fast.
+
+    :param text: The text to expand
+    """
+    # Most text has no shortcodes, and checking for a colon is much faster than searching for them.
+    if ':' not in text:
+        return text
+
+    get_emoji = _shortcodes().get
+    fragments = []
+    position = 0
+
+    for match in _SHORTCODE_PATTERN.finditer(text):
+        start = match.start()
+        # A match that starts before the current position opens with the closing colon of the shortcode before it.
+        if start >= position:
+            emoji = get_emoji(match[1])
+            if emoji is not None:
+                fragments.append(text[position:start])
+                fragments.append(emoji)
+                position = match.end() + 1
+
+    fragments.append(text[position:])
+    expanded = ''.join(fragments)
+
+    return Markup(expanded) if isinstance(text, Markup) else expanded
+
+
+def shortcode_emoji(shortcode: str) -> Optional[str]:
+    """Returns the emoji a shortcode stands for, or None if it is not a known shortcode.
+
+    :param shortcode: The name of the shortcode, without the colons around it, such as white_check_mark
+    """
+    return _shortcodes().get(shortcode)
+
+
+def autoexpand_shortcodes_enabled() -> bool:
+    """Returns whether shortcodes are expanded automatically in the current context. See autoexpand_shortcodes()."""
+    return _autoexpand_shortcodes.get()
+
+
+@contextmanager
+def autoexpand_shortcodes(enabled: bool = True) -> Iterator[None]:
+    """Enables expanding shortcodes automatically inside the with block. While it is enabled, the names, info and failure
+    messages of CI jobs and tasks are expanded with expand_shortcodes() wherever they are placed in a code block, such as
+    in task lists, job trees and failure reports. For example:
+
+    with autoexpand_shortcodes():
+        job.ci_task_list()
+
+    displays a task named ":lock: test_auth" as "🔒 test_auth" instead of the shortcode. Like autoescaping, the setting is
+    stored in a context variable, so it only applies to the current thread or asyncio task.
+
+    :param enabled: Whether shortcodes should be expanded, which allows it to be disabled inside a with block that enabled
+    it
+    """
+    token = _autoexpand_shortcodes.set(enabled)
+
+    try:
+        yield
+    finally:
+        _autoexpand_shortcodes.reset(token)
+
+
+@lru_cache(maxsize=None)
+def _shortcodes() -> Dict[str, str]:
+    """Returns the emoji for each shortcode, read from shortcodes.txt. Each line of the file is an emoji followed by its
+    shortcodes, separated by spaces, apart from the comments at the top, which start with a # followed by a space or
+    nothing else. The keycap emoji #️⃣ starts with a # as well, but a variation selector follows it.
+    """
+    shortcodes = {}
+    for line in pkgutil.get_data(__name__.rpartition('.')[0], 'shortcodes.txt').decode('utf-8').splitlines():
+        if line == '#' or line.startswith('# '):
+            continue
+
+        emoji, *names = line.split(' ')
+        shortcodes.update(dict.fromkeys(names, emoji))
+
+    return shortcodes
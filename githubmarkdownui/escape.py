@@ -0,0 +1,215 @@
+from __future__ import annotations
+from contextlib import contextmanager
+from contextvars import ContextVar
+from bisect import bisect_right
+from itertools import accumulate, chain, islice
+from string import Formatter
+from typing import Any, Callable, Iterable, Iterator, List, Sequence
+
+# The characters that change the meaning of text placed in HTML. | is escaped as well, since it separates the cells of a
+# table in Markdown syntax.
+_ESCAPE_TABLE = str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '"': '&quot;',
+    "'": '&#39;',
+    '|': '&#124;',
+})
+_ESCAPED_CHARACTERS = ''.join(map(chr, _ESCAPE_TABLE))
+# The number of rows checked at once by escape_rows().
+_ROW_BATCH_SIZE = 64
+
+_autoescape: ContextVar[bool] = ContextVar('autoescape', default=False)
+
+
+class Markup(str):
+    """A string that is already safe to place in HTML, such as the output of bold() or table(). escape() returns a Markup
+    as is instead of escaping it again, so rendered fragments can be nested inside each other.
+
+    Any object with an __html__ method, such as a markupsafe.Markup, is trusted in the same way.
+
+    Adding a string to a Markup, joining strings with a Markup, or formatting a Markup returns a Markup. While autoescaping
+    is enabled, each string that is not already a Markup is escaped first, so bold('a') + ' <b>' displays <b> as is instead
+    of placing it in the HTML. Otherwise strings are placed in the HTML as they are, the same as with a plain str, so
+    callers can still add their own HTML to rendered output, such as table(rows) + '<hr>'.
+    """
+    __slots__ = ()
+
+    def __html__(self) -> Markup:
+        return self
+
+    def __add__(self, other: Any) -> Markup:
+        if isinstance(other, str) or hasattr(other, '__html__'):
+            return Markup(str.__add__(self, _escape_operand(other)))
+
+        return NotImplemented
+
+    def __radd__(self, other: Any) -> Markup:
+        if isinstance(other, str) or hasattr(other, '__html__'):
+            return Markup(str.__add__(_escape_operand(other), self))
+
+        return NotImplemented
+
+    def join(self, iterable: Iterable[Any]) -> Markup:
+        return Markup(str.join(self, map(_escape_operand, iterable)))
+
+    def format(self, *args: Any, **kwargs: Any) -> Markup:
+        return Markup(_ESCAPE_FORMATTER.vformat(self, args, kwargs))
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({super().__repr__()})'
+
+
+class _EscapeFormatter(Formatter):
+    """Formats each field of a Markup.format() template, then escapes it if autoescaping is enabled, unless it was already a
+    Markup.
+    """
+
+    def format_field(self, value: Any, format_spec: str) -> str:
+        if hasattr(value, '__html__'):
+            # Padding text that is already safe keeps it safe.
+            return format(str(value.__html__()), format_spec)
+
+        return _escape_operand(format(value, format_spec))
+
+
+_ESCAPE_FORMATTER = _EscapeFormatter()
+
+
+def escape(text: Any) -> Markup:
+    """Escapes the characters & < > " ' and | in the given text, so it is displayed as is when placed in HTML. Text that is
+    already a Markup, or has an __html__ method, is returned without being escaped again. Any other object is converted with
+    str() first.
+
+    :param text: The text to escape
+    """
+    if isinstance(text, Markup):
+        return text
+
+    if hasattr(text, '__html__'):
+        return Markup(text.__html__())
+
+    text = str(text)
+
+    # Most text has nothing to escape, and checking for each character is much faster than translating the text.
+    if _needs_escaping(text):
+        return Markup(text.translate(_ESCAPE_TABLE))
+
+    return Markup(text)
+
+
+def escape_if_enabled(text: Any) -> Any:
+    """Escapes the given text with escape() if autoescaping is enabled, otherwise returns it unchanged.
+
+    :param text: The text to escape
+    """
+    return escape(text) if _autoescape.get() else text
+
+
+def escape_rows(rows: Iterable[Sequence[Any]], escape_cell: Callable[[Any], Markup] = escape) -> Iterator[Sequence[Any]]:
+    """Escapes each cell in the given rows with escape(). The rows are consumed lazily in batches, and the cells of each
+    batch are checked all at once, so batches with nothing to escape are passed through without escaping each cell. A row
+    that is a string is passed through as is, instead of being escaped as a row of characters.
+
+    :param rows: The rows to escape, such as the rows of a table
+    :param escape_cell: The function used to escape each cell, which can be a cached version of escape()
+    """
+    # Chaining the batches together hands out each row without resuming a generator for it.
+    return chain.from_iterable(_iter_escaped_row_batches(iter(rows), escape_cell))
+
+
+def autoescape_enabled() -> bool:
+    """Returns whether autoescaping is enabled in the current context. See autoescape()."""
+    return _autoescape.get()
+
+
+@contextmanager
+def autoescape(enabled: bool = True) -> Iterator[None]:
+    """Enables autoescaping inside the with block. While autoescaping is enabled, text given to the inline functions,
+    headings, tables, lists, task lists, collapsible section titles and CI jobs and tasks is escaped with escape(), so a
+    test name such as test_a<b> is displayed as is. Output from other functions, such as bold(), is a Markup and is not
+    escaped again. For example:
+
+    with autoescape():
+        table([['test', 'result'], ['test_a<b>', bold('passed')]])
+
+    Autoescaping is disabled by default, since existing callers may rely on placing their own HTML in the text. The setting
+    is stored in a context variable, so it only applies to the current thread or asyncio task.
+
+    :param enabled: Whether autoescaping should be enabled, which allows it to be disabled inside a with block that
+    enabled it
+    """
+    token = _autoescape.set(enabled)
+
+    try:
+        yield
+    finally:
+        _autoescape.reset(token)
+
+
+def _escape_operand(value: Any) -> str:
+    """Returns an operand of a Markup operation as it is placed in the HTML. Strings are only escaped while autoescaping is
+    enabled, and objects with an __html__ method are always converted with it.
+    """
+    if isinstance(value, str) and not isinstance(value, Markup) and not _autoescape.get():
+        return value
+
+    return escape(value)
+
+
+def _iter_escaped_row_batches(rows: Iterator[Sequence[Any]],
+                              escape_cell: Callable[[Any], Markup]) -> Iterator[List[Sequence[Any]]]:
+    while True:
+        batch = list(islice(rows, _ROW_BATCH_SIZE))
+        if not batch:
+            return
+
+        try:
+            row_texts = list(map(''.join, batch))
+        except TypeError:
+            # Some cells are not strings, so each row has to be checked on its own.
+            batch = [_escape_row(row, escape_cell) if _cells_need_escaping(row) else row for row in batch]
+        else:
+            text = ''.join(row_texts)
+            if _needs_escaping(text):
+                _escape_dirty_rows(batch, row_texts, text, escape_cell)
+
+        yield batch
+
+
+def _escape_dirty_rows(batch: List[Sequence[Any]], row_texts: List[str], text: str,
+                       escape_cell: Callable[[Any], Markup]) -> None:
+    # Rather than checking each row on its own, the rows that need escaping are found from where the characters to escape
+    # are in the text of the whole batch, so a batch with one dirty row is only searched a few times.
+    row_ends = list(accumulate(map(len, row_texts)))
+    dirty_rows = set()
+    for character in _ESCAPED_CHARACTERS:
+        position = text.find(character)
+        while position >= 0:
+            index = bisect_right(row_ends, position)
+            dirty_rows.add(index)
+            position = text.find(character, row_ends[index])
+
+    for index in dirty_rows:
+        batch[index] = _escape_row(batch[index], escape_cell)
+
+
+def _escape_row(row: Sequence[Any], escape_cell: Callable[[Any], Markup]) -> Sequence[Any]:
+    # A string is a sequence as well, but escaping one would turn it into a row of characters.
+    if isinstance(row, (str, bytes)):
+        return row
+
+    return [escape_cell(cell) for cell in row]
+
+
+def _cells_need_escaping(cells: Iterable[Any]) -> bool:
+    try:
+        return _needs_escaping(''.join(cells))
+    except TypeError:
+        # Some cells are not strings, so each cell has to be converted on its own.
+        return True
+
+
+def _needs_escaping(text: str) -> bool:
+    return '&' in text or '<' in text or '>' in text or '"' in text or "'" in text or '|' in text
@@ -0,0 +1,87 @@
+from __future__ import annotations
+from dataclasses import fields
+from enum import Enum
+from hashlib import blake2b
+from itertools import islice
+from typing import Any, Iterable, Iterator
+
+from githubmarkdownui.duration import Duration
+
+# The size of each fingerprint in bytes, which is shown as twice as many hex digits.
+FINGERPRINT_SIZE = 16
+# The number of values encoded before they are passed to the hash at once.
+_BATCH_SIZE = 1024
+
+
+def fingerprint(*values: Any) -> str:
+    """Returns a fingerprint of the given values, as a string of hex digits. See fingerprint_values()."""
+    return fingerprint_values(values)
+
+
+def fingerprint_values(values: Iterable[Any]) -> str:
+    """Returns a fingerprint of the given sequence of values, as a string of hex digits. The values are hashed with BLAKE2b
+    one batch at a time, so they can come from a generator without being held in memory all at once.
+
+    Each value is encoded along with its type and length, so different sequences of values never run together into the
+    same input, for example ('ab', 'c') and ('a', 'bc'). Strings, numbers, booleans, None, enum members and durations are
+    encoded the same way in every process and on every version of Python, unlike the built-in hash(). Any other value is
+    encoded as its str().
+
+    :param values: The values to fingerprint
+    """
+    digest = blake2b(digest_size=FINGERPRINT_SIZE)
+    values = iter(values)
+
+    while True:
+        batch = b''.join(map(_encode, islice(values, _BATCH_SIZE)))
+        if not batch:
+            return digest.hexdigest()
+
+        digest.update(batch)
+
+
+def iter_dataclass_values(instance: Any) -> Iterator[Any]:
+    """Yields the name and value of each field of the given dataclass that is not None, such as the metadata of a CI task.
+    Leaving out fields that are not set means that adding a new optional field does not change existing fingerprints.
+    Fields that are left out of comparisons, such as the tasks a CITaskMetadata belongs to, are left out as well.
+
+    :param instance: The dataclass instance
+    """
+    for instance_field in fields(instance):
+        if not instance_field.compare:
+            continue
+
+        value = getattr(instance, instance_field.name)
+        if value is not None:
+            yield instance_field.name
+            yield value
+
+
+def _encode(value: Any) -> bytes:
+    if value is None:
+        return b'N'
+
+    # bool is checked before int, since it is a subclass of it.
+    if isinstance(value, bool):
+        return b'T' if value else b'F'
+
+    if isinstance(value, str):
+        tag = b's'
+    elif isinstance(value, int):
+        tag = b'i'
+    elif isinstance(value, float):
+        tag = b'f'
+        # repr() gives the shortest string that reads back as the same float, so it is the same on every platform.
+        value = repr(value)
+    elif isinstance(value, Enum):
+        tag = b'e'
+        value = f'{type(value).__name__}.{value.name}'
+    elif isinstance(value, Duration):
+        # A duration is fingerprinted the way it is displayed, so 90 seconds and 1m 30s are different.
+        tag = b'd'
+    else:
+        tag = b'o'
+
+    data = str(value).encode('utf-8', 'surrogatepass')
+
+    return b'%s%d:%s' % (tag, len(data), data)
@@ -1,4 +1,7 @@
-def bold(text: str) -> str:
+from githubmarkdownui.escape import Markup, escape_if_enabled
+
+
+def bold(text: str) -> Markup:
     """Alternative name for strong_emphasis.
 
     :param text: The text to be bolded
@@ -6,23 +9,23 @@ def bold(text: str) -> str:
     return strong_emphasis(text)
 
 
-def code_span(text: str) -> str:
+def code_span(text: str) -> Markup:
     """Returns the text surrounded by <code> tags.
 
     :param text: The text that should appear as a code span
     """
-    return f'<code>{text}</code>'
+    return Markup(f'<code>{escape_if_enabled(text)}</code>')
 
 
-def emphasis(text: str) -> str:
+def emphasis(text: str) -> Markup:
     """Emphasizes (italicizes) the given text by placing <em> tags around it.
 
     :param text: The text to be emphasized
     """
-    return f'<em>{text}</em>'
+    return Markup(f'<em>{escape_if_enabled(text)}</em>')
 
 
-def italics(text: str) -> str:
+def italics(text: str) -> Markup:
     """Alternative name for emphasis.
 
     :param text: The text to be italicized
@@ -30,26 +33,26 @@ def italics(text: str) -> str:
     return emphasis(text)
 
 
-def link(text: str, url: str) -> str:
+def link(text: str, url: str) -> Markup:
     """Turns the given text into a link using <a> tags.
 
     :param text: The text for the link
     :param url: The url for the link
     """
-    return f'<a href="{url}">{text}</a>'
+    return Markup(f'<a href="{escape_if_enabled(url)}">{escape_if_enabled(text)}</a>')
 
 
-def strikethrough(text: str) -> str:
+def strikethrough(text: str) -> Markup:
     """Formats the text with a strikethrough by placing <del> tags around it.
 
     :param text: The text to appear with a strikethrough
     """
-    return f'<del>{text}</del>'
+    return Markup(f'<del>{escape_if_enabled(text)}</del>')
 
 
-def strong_emphasis(text: str) -> str:
+def strong_emphasis(text: str) -> Markup:
     """Strongly emphasizes (bolds) the given text by placing <strong> tags around it.
 
     :param text: The text to be strongly emphasized
     """
-    return f'<strong>{text}</strong>'
+    return Markup(f'<strong>{escape_if_enabled(text)}</strong>')
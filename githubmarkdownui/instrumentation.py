@@ -0,0 +1,229 @@
+from __future__ import annotations
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from functools import wraps
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+F = TypeVar('F', bound=Callable[..., Any])
+
+_stats: ContextVar[Optional[RenderStats]] = ContextVar('render_stats', default=None)
+_label: ContextVar[str] = ContextVar('render_label', default='')
+
+
+@dataclass
+class BlockStats:
+    """The totals recorded for one type of block with one label."""
+    calls: int = 0
+    seconds: float = 0
+    characters: int = 0
+    # The largest amount of memory allocated while rendering a single block. This is only recorded if memory is traced.
+    peak_bytes: int = 0
+
+
+class RenderStats:
+    """Collects the wall time, output characters and optionally the peak memory of each block rendered while it is active,
+    grouped by the type of block and its label. Use instrument() to create one.
+    """
+
+    def __init__(self, trace_memory: bool = False,
+                 callback: Optional[Callable[[str, str, BlockStats], None]] = None):
+        """
+        :param trace_memory: Whether the peak memory allocated while rendering each block should be recorded
+        :param callback: A function that is called after each block is rendered, with the type of block, its label, and
+        the stats of that single block
+        """
+        self.trace_memory = trace_memory
+        self.callback = callback
+        self.blocks: Dict[Tuple[str, str], BlockStats] = {}
+        # The number of instrumented functions currently running, so that functions called by other instrumented functions
+        # are counted as part of them instead of being recorded twice.
+        self._depth = 0
+        # For each block being traced, the memory in use when it started and the highest peak seen before a nested block
+        # reset the peak.
+        self._memory_stack: List[List[int]] = []
+
+    def as_dict(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Exports the stats as a dict from each type of block to a dict from each label to its stats. Blocks rendered
+        without a label are under the empty string. For example:
+
+        {'table': {'failed tests': {'calls': 1, 'seconds': 0.002, 'characters': 5120, 'peak_bytes': 0}}}
+        """
+        stats: Dict[str, Dict[str, Dict[str, float]]] = {}
+
+        for (block_type, label), block_stats in self.blocks.items():
+            stats.setdefault(block_type, {})[label] = asdict(block_stats)
+
+        return stats
+
+    def record(self, block_type: str, label: str, seconds: float, characters: int, peak_bytes: int = 0) -> None:
+        """Adds a single rendered block to the stats.
+
+        :param block_type: The type of block, such as table
+        :param label: The label of the block
+        :param seconds: The wall time spent rendering the block
+        :param characters: The number of characters in the output of the block
+        :param peak_bytes: The peak memory allocated while rendering the block
+        """
+        block_stats = self.blocks.setdefault((block_type, label), BlockStats())
+        block_stats.calls += 1
+        block_stats.seconds += seconds
+        block_stats.characters += characters
+        block_stats.peak_bytes = max(block_stats.peak_bytes, peak_bytes)
+
+        if self.callback:
+            self.callback(block_type, label, BlockStats(1, seconds, characters, peak_bytes))
+
+    def _start_memory(self) -> None:
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            # Resetting the peak loses the peak of any enclosing block, so remember it first.
+            if self._memory_stack:
+                self._memory_stack[-1][1] = max(self._memory_stack[-1][1], peak)
+            tracemalloc.reset_peak()
+            self._memory_stack.append([current, 0])
+
+    def _stop_memory(self) -> int:
+        if not self.trace_memory:
+            return 0
+
+        peak = tracemalloc.get_traced_memory()[1]
+        start, earlier_peak = self._memory_stack.pop()
+
+        return max(peak, earlier_peak) - start
+
+
+def instrumented(block_type: str) -> Callable[[F], F]:
+    """Decorates a function that renders a block, so that each call is recorded while instrumentation is enabled. The
+    output can be a string or a list of strings, such as pages. When instrumentation is disabled, the only cost is a single
+    context variable lookup.
+
+    :param block_type: The type of block the function renders, such as table
+    """
+    def decorator(function: F) -> F:
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            stats = _stats.get()
+            if stats is None or stats._depth:
+                return function(*args, **kwargs)
+
+            stats._depth += 1
+            stats._start_memory()
+            start = perf_counter()
+
+            try:
+                output = function(*args, **kwargs)
+            finally:
+                seconds = perf_counter() - start
+                peak_bytes = stats._stop_memory()
+                stats._depth -= 1
+
+            characters = len(output) if isinstance(output, str) else sum(map(len, output))
+            stats.record(block_type, _label.get(), seconds, characters, peak_bytes)
+
+            return output
+
+        return wrapper
+
+    return decorator
+
+
+def iter_instrumented(block_type: str, label: str, fragments: Iterable[str]) -> Iterator[str]:
+    """Yields the given fragments of a block, recording the block once they have all been yielded if instrumentation is
+    enabled. Only the time spent producing the fragments is counted, not the time spent by the caller in between.
+
+    :param block_type: The type of block, such as table
+    :param label: The label of the block
+    :param fragments: The fragments of the block
+    """
+    stats = _stats.get()
+    if stats is None:
+        yield from fragments
+        return
+
+    seconds = 0.0
+    characters = 0
+    fragments = iter(fragments)
+    stats._start_memory()
+
+    try:
+        while True:
+            start = perf_counter()
+            fragment = next(fragments, None)
+            seconds += perf_counter() - start
+
+            if fragment is None:
+                break
+
+            characters += len(fragment)
+            yield fragment
+    finally:
+        peak_bytes = stats._stop_memory()
+
+    stats.record(block_type, label, seconds, characters, peak_bytes)
+
+
+def current_label() -> str:
+    """Returns the label that blocks rendered in the current context are recorded under. See label()."""
+    return _label.get()
+
+
+@contextmanager
+def label(name: str) -> Iterator[None]:
+    """Records any blocks rendered inside the with block under the given label, so that blocks of the same type can be told
+    apart. For example:
+
+    with instrument() as stats:
+        with label('failed tests'):
+            table(failed_tests)
+
+    :param name: The label for the blocks
+    """
+    token = _label.set(name)
+
+    try:
+        yield
+    finally:
+        _label.reset(token)
+
+
+@contextmanager
+def instrument(trace_memory: bool = False,
+               callback: Optional[Callable[[str, str, BlockStats], None]] = None) -> Iterator[RenderStats]:
+    """Records the wall time, output characters and optionally the peak memory of each block rendered inside the with
+    block, such as tables, lists, code blocks, collapsible sections, CI job renderers and the blocks of a MarkdownDocument.
+    For example:
+
+    with instrument() as stats:
+        document.render()
+    metrics.send(stats.as_dict())
+
+    When a renderer calls another renderer, such as a CI task list building its code block, only the outer one is recorded.
+    The blocks inside a collapsible section of a MarkdownDocument are recorded as well as the section itself.
+
+    :param trace_memory: Whether the peak memory allocated while rendering each block should be recorded with
+    tracemalloc. This slows rendering down considerably, and requires Python 3.9 or later
+    :param callback: A function that is called after each block is rendered, with the type of block, its label, and the
+    stats of that single block
+
+    :raises: RuntimeError if trace_memory is set on a version of Python before 3.9
+    """
+    if trace_memory and not hasattr(tracemalloc, 'reset_peak'):
+        raise RuntimeError('Tracing memory requires Python 3.9 or later')
+
+    stats = RenderStats(trace_memory, callback)
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+
+    token = _stats.set(stats)
+
+    try:
+        yield stats
+    finally:
+        _stats.reset(token)
+
+        if started_tracing:
+            tracemalloc.stop()
@@ -0,0 +1,166 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from heapq import heappush, heappushpop
+from os import PathLike
+from typing import BinaryIO, List, Optional, Tuple, Union
+from xml.etree.ElementTree import Element, iterparse
+
+from githubmarkdownui.ci import CIJob, CIJobMetadata, CIStatus, CITask, CITaskBatch, CITaskMetadata
+
+_SUITE_TAGS = ('testsuite', 'testsuites')
+_FAILURE_TAGS = ('failure', 'error')
+
+
+def parse_junit_xml(source: Union[str, PathLike, BinaryIO], only_failures: bool = False, max_tasks: Optional[int] = None,
+                    batch: bool = False) -> CIJob:
+    """Reads a JUnit XML report into a CIJob. Each testsuite becomes a job, nested the same way as in the report, and each
+    testcase becomes a task of its testsuite. The name of a task is the classname and name of its testcase, such as
+    test.test_ci.test_add_task. A testcase with a failure or error fails, and the type and message of the failure are set
+    as the failure type and failure message of its task, and a skipped testcase is skipped. A job fails if any testcase or
+    job below it fails.
+
+    The report is read incrementally, and each testcase is discarded as soon as it has been read, so reports that are
+    hundreds of megabytes long never have to be held in memory at once. Only the tasks that are kept are held, so memory
+    can be bounded further with only_failures and max_tasks, for example:
+
+    job = parse_junit_xml('report.xml', only_failures=True, max_tasks=1000, batch=True)
+    job.child_ci_job_tree(CIStatus.FAILED)
+
+    Even when tasks are left out, the status of each job still reflects every testcase below it.
+
+    :param source: The path of the report, or a binary file object to read it from
+    :param only_failures: Only failed testcases will be kept as tasks
+    :param max_tasks: Only the given number of testcases with the longest durations will be kept as tasks, across the whole
+        report. The tasks that are kept stay in the same order as in the report
+    :param batch: The tasks of each job will be stored in a CITaskBatch instead of a list of CITasks, which takes much less
+        memory for large reports
+
+    :raises: ValueError if the report does not contain a testsuite, or a time in it is not a number
+    """
+    builder = _JobBuilder(only_failures, max_tasks, batch)
+    # The elements that have been started but not yet ended, each inside the one before it.
+    elements: List[Element] = []
+
+    for event, element in iterparse(source, ('start', 'end')):
+        if event == 'start':
+            elements.append(element)
+            if element.tag in _SUITE_TAGS:
+                builder.start_suite(element)
+            continue
+
+        elements.pop()
+        if element.tag == 'testcase':
+            builder.add_testcase(element)
+        elif element.tag in _SUITE_TAGS:
+            builder.end_suite()
+
+        # Everything needed from an element has been read by the time it ends, so it is removed from its parent to keep the
+        # tree that is built while parsing from growing. It is always the only child left, so removing it is quick.
+        if elements and elements[-1].tag in _SUITE_TAGS:
+            elements[-1].remove(element)
+
+    return builder.build()
+
+
+@dataclass
+class _Suite:
+    """A testsuite that has been started, whose tasks and child suites are collected until the whole report has been read."""
+    name: str
+    duration: Optional[float]
+    tasks: Union[List[CITaskMetadata], CITaskBatch]
+    failed: bool = False
+    child_suites: List[_Suite] = field(default_factory=list)
+
+
+class _JobBuilder:
+    """Collects the testsuites and testcases of a report as it is read, and builds the CIJobs once it has been read."""
+
+    def __init__(self, only_failures: bool, max_tasks: Optional[int], batch: bool):
+        self.only_failures = only_failures
+        self.max_tasks = max_tasks
+        self.batch = batch
+        # The suites that have been started but not ended, each inside the one before it, and the suites that have ended, in
+        # the order they ended, so each suite comes after all of its child suites.
+        self.open_suites: List[_Suite] = []
+        self.ended_suites: List[_Suite] = []
+        # With max_tasks, the tasks with the longest durations so far, as a heap of (seconds, -position, suite, metadata).
+        # The negative position means that of two tasks with the same duration, the later one is dropped first.
+        self.slowest_tasks: List[Tuple[float, int, _Suite, CITaskMetadata]] = []
+        self.task_count = 0
+
+    def start_suite(self, element: Element) -> None:
+        suite = _Suite(element.get('name', element.tag), _seconds(element), CITaskBatch() if self.batch else [])
+
+        if self.open_suites:
+            self.open_suites[-1].child_suites.append(suite)
+        self.open_suites.append(suite)
+
+    def end_suite(self) -> None:
+        suite = self.open_suites.pop()
+        self.ended_suites.append(suite)
+
+        if suite.failed and self.open_suites:
+            self.open_suites[-1].failed = True
+
+    def add_testcase(self, element: Element) -> None:
+        if not self.open_suites:
+            raise ValueError('The report has a testcase outside of a testsuite')
+
+        metadata = _read_testcase(element)
+        suite = self.open_suites[-1]
+        if metadata.status == CIStatus.FAILED:
+            suite.failed = True
+        elif self.only_failures:
+            return
+
+        if self.max_tasks is None:
+            suite.tasks.append(metadata)
+            return
+
+        entry = (metadata.duration if metadata.duration is not None else -1.0, -self.task_count, suite, metadata)
+        self.task_count += 1
+
+        if len(self.slowest_tasks) < self.max_tasks:
+            heappush(self.slowest_tasks, entry)
+        elif self.max_tasks:
+            heappushpop(self.slowest_tasks, entry)
+
+    def build(self) -> CIJob:
+        if not self.ended_suites:
+            raise ValueError('The report does not contain a testsuite')
+
+        # Put the tasks that were kept back in the order they appeared in the report.
+        for _, _, suite, metadata in sorted(self.slowest_tasks, key=lambda entry: -entry[1]):
+            suite.tasks.append(metadata)
+
+        jobs = {}
+        for suite in self.ended_suites:
+            tasks = suite.tasks if self.batch else [CITask(metadata) for metadata in suite.tasks]
+            jobs[id(suite)] = CIJob(CIJobMetadata(CIStatus.FAILED if suite.failed else CIStatus.SUCCEEDED, suite.name,
+                                                  suite.duration), tasks,
+                                    [jobs[id(child_suite)] for child_suite in suite.child_suites] or None)
+
+        return jobs[id(self.ended_suites[-1])]
+
+
+def _read_testcase(element: Element) -> CITaskMetadata:
+    """Returns the metadata of the task for a testcase."""
+    classname = element.get('classname')
+    name = element.get('name', '')
+    if classname:
+        name = f'{classname}.{name}'
+
+    for child in element:
+        if child.tag in _FAILURE_TAGS:
+            return CITaskMetadata(CIStatus.FAILED, name, _seconds(element), failure_type=child.get('type'),
+                                  failure_message=child.get('message') or (child.text or '').strip() or None)
+
+    return CITaskMetadata(CIStatus.SKIPPED if element.find('skipped') is not None else CIStatus.SUCCEEDED, name,
+                          _seconds(element))
+
+
+def _seconds(element: Element) -> Optional[float]:
+    time = element.get('time')
+
+    # Some reports group the digits of long times with commas, such as 1,234.5.
+    return float(time.replace(',', '')) if time else None
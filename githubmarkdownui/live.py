@@ -0,0 +1,127 @@
+from __future__ import annotations
+from time import monotonic
+from typing import Callable, Optional
+
+from githubmarkdownui.ci import CIJob, CITask
+from githubmarkdownui.constants import GITHUB_COMMENT_MAX_LENGTH
+from githubmarkdownui.escape import escape_if_enabled
+
+
+class LiveReport:
+    """Keeps a comment body up to date with a CIJob while its pipeline runs. Status events are applied to the job as they
+    arrive, but a burst of events is coalesced, so the body is rendered and emitted at most once per interval, and only when
+    its visible output changed. For example:
+
+    report = LiveReport(job, post_comment, interval=30)
+    for event in events:
+        report.update_task(tasks[event.task_id], status=event.status, duration=event.duration)
+    report.flush()
+
+    The first change is emitted straight away. Changes that arrive less than interval seconds after the last body was
+    emitted are held until the next event or call to poll() after the interval has passed, so call poll() regularly while
+    no events arrive. Call flush() once the pipeline has finished, so the last changes are emitted without waiting.
+
+    Whether the job changed is found from its revision, so the body is only rendered again after a change, and changes
+    made to the job directly, such as with CITaskBatch.update(), are picked up by poll() and flush() as well. A report is not
+    thread safe, so events from several threads must be handed to a single thread first.
+    """
+
+    def __init__(self, job: CIJob, callback: Callable[[str], None], interval: float = 10,
+                 render: Optional[Callable[[CIJob], str]] = None, clock: Callable[[], float] = monotonic):
+        """
+        :param job: The job to report on
+        :param callback: The function that is called with each rendered body, such as one that posts it as a comment
+        :param interval: The least number of seconds between two bodies being emitted
+        :param render: The function that renders the body from the job. By default, this is the status and name of the job
+        and its status summary, followed by its job tree, or its task list if it has no child jobs, which is cut short to fit
+        in a GitHub comment
+        :param clock: The function that returns the current time in seconds, which only has to increase, such as
+        time.monotonic
+        """
+        self.job = job
+        self.callback = callback
+        self.interval = interval
+        self.render = render or _render_summary
+        self.clock = clock
+        # The last body that was emitted and when, and the revision of the job when the body was last rendered.
+        self._body: Optional[str] = None
+        self._emitted_at: Optional[float] = None
+        self._rendered_revision: Optional[int] = None
+
+    def update_task(self, task: CITask, **changes) -> bool:
+        """Applies an event that changes a task, for example report.update_task(task, status=CIStatus.FAILED). Returns
+        whether a body was emitted.
+
+        :param task: The task to change, which must belong to the job of the report or a job below it
+        :param changes: The fields of the task metadata to replace, and their new values
+        """
+        task.update(**changes)
+        return self.poll()
+
+    def update_job(self, job: CIJob, **changes) -> bool:
+        """Applies an event that changes a job, for example report.update_job(job, status=CIStatus.RUNNING). Returns whether
+        a body was emitted.
+
+        :param job: The job to change, which must be the job of the report or a job below it
+        :param changes: The fields of the job metadata to replace, and their new values
+        """
+        job.update(**changes)
+        return self.poll()
+
+    def add_task(self, job: CIJob, task: CITask) -> bool:
+        """Applies an event that adds a task to the end of the tasks of a job. Returns whether a body was emitted.
+
+        :param job: The job to add the task to, which must be the job of the report or a job below it
+        :param task: The task to add
+        """
+        job.add_task(task)
+        return self.poll()
+
+    def add_child_job(self, job: CIJob, child_job: CIJob) -> bool:
+        """Applies an event that adds a job to the end of the child jobs of a job. Returns whether a body was emitted.
+
+        :param job: The job to add the child job to, which must be the job of the report or a job below it
+        :param child_job: The job to add
+        """
+        job.add_child_job(child_job)
+        return self.poll()
+
+    def poll(self) -> bool:
+        """Emits the body if its visible output changed since the last body was emitted, and the interval has passed since
+        then. Returns whether a body was emitted.
+        """
+        if self._emitted_at is not None and self.clock() - self._emitted_at < self.interval:
+            return False
+
+        return self.flush()
+
+    def flush(self) -> bool:
+        """Emits the body straight away if its visible output changed since the last body was emitted, whether or not the
+        interval has passed. Returns whether a body was emitted.
+        """
+        # Unlike the fingerprint, the revision does not hash every task again after a task is added to a large job.
+        revision = self.job.revision()
+        if revision == self._rendered_revision:
+            return False
+
+        # A change that is not displayed, such as to a failure message, changes the revision but not the body.
+        self._rendered_revision = revision
+        body = self.render(self.job)
+        if body == self._body:
+            return False
+
+        self._body = body
+        self._emitted_at = self.clock()
+        self.callback(body)
+
+        return True
+
+
+def _render_summary(job: CIJob) -> str:
+    summary = f'{job.metadata.status.value} {escape_if_enabled(job.metadata.name)}: {job.status_summary()}'
+    max_length = GITHUB_COMMENT_MAX_LENGTH - len(summary) - 1
+
+    if job.child_jobs:
+        return f'{summary}\n{job.child_ci_job_tree(max_length=max_length)}'
+
+    return f'{summary}\n{job.ci_task_list(max_length=max_length)}'
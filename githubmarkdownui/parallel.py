@@ -0,0 +1,113 @@
+from __future__ import annotations
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from githubmarkdownui.emitter import compact_html, compact_html_enabled
+from githubmarkdownui.emoji import autoexpand_shortcodes, autoexpand_shortcodes_enabled
+from githubmarkdownui.escape import autoescape, autoescape_enabled
+
+# Each worker is given several chunks, so a worker that finishes early can take on chunks that would otherwise hold up the
+# rest, such as a job with far more tasks than the others.
+CHUNKS_PER_WORKER = 4
+
+# Below this many rows, lines or tasks, a chunk takes less time to render than to send to a worker and back.
+_MIN_CHUNK_SIZE = 5000
+
+# Below this many rows, lines or tasks in total, the output is rendered without any workers. Starting the worker processes
+# takes around 20ms, and each item costs close to as much again to reach a worker and come back as it does to render, so a
+# smaller output takes longer to render in parallel than on its own.
+_MIN_PARALLEL_SIZE = 100000
+
+# The input of the chunks rendered by a worker process, which is set once when the process starts.
+_worker_input: Any = None
+
+RenderChunk = Callable[[Any, int, int], str]
+
+
+def chunk_bounds(size: int, workers: int, weights: Optional[Sequence[int]] = None) -> List[Tuple[int, int]]:
+    """Splits the items from 0 to size into consecutive chunks to render in parallel, returned as (start, stop) pairs.
+    There are up to CHUNKS_PER_WORKER chunks for each worker, and only the last chunk can be smaller than a minimum size. An
+    output that is too small to be worth rendering in parallel is a single chunk, and so is any output with a single worker.
+
+    :param size: The number of items
+    :param workers: The number of workers the chunks will be rendered by
+    :param weights: How much output each item renders, such as the number of lines below each job of a job tree. If not
+    given, every item renders the same amount
+    """
+    total = size if weights is None else sum(weights)
+    if workers <= 1 or total < _MIN_PARALLEL_SIZE:
+        return [(0, size)] if size else []
+
+    chunk_weight = max(-(-total // (workers * CHUNKS_PER_WORKER)), _MIN_CHUNK_SIZE, 1)
+
+    if weights is None:
+        return [(start, min(start + chunk_weight, size)) for start in range(0, size, chunk_weight)]
+
+    bounds = []
+    start = 0
+    weight = 0
+    for index, item_weight in enumerate(weights):
+        weight += item_weight
+        if weight >= chunk_weight:
+            bounds.append((start, index + 1))
+            start = index + 1
+            weight = 0
+
+    if start < size:
+        bounds.append((start, size))
+
+    return bounds
+
+
+def render_chunks(render_chunk: RenderChunk, worker_input: Any, bounds: Sequence[Tuple[int, int]],
+                  workers: int) -> List[str]:
+    """Renders each chunk with render_chunk(worker_input, start, stop) across the given number of workers, and returns the
+    output of each chunk in order. Autoescaping, compact HTML and shortcode expansion are applied in the workers the same
+    as where this is called.
+
+    On builds of Python without the GIL, the chunks are rendered by threads, which share the worker input. Otherwise they
+    are rendered by processes, and render_chunk must be defined at the top level of a module. The worker input is then only
+    sent to each process once when it starts, rather than with every chunk, and does not have to be sent at all when
+    processes are forked.
+
+    :param render_chunk: The function that renders one chunk
+    :param worker_input: Everything render_chunk needs apart from the bounds of the chunk
+    :param bounds: The (start, stop) pair of each chunk, such as from chunk_bounds()
+    :param workers: The number of threads or processes to render with
+    """
+    settings = (autoescape_enabled(), compact_html_enabled(), autoexpand_shortcodes_enabled())
+    starts, stops = zip(*bounds)
+
+    if _gil_disabled():
+        with ThreadPoolExecutor(workers) as executor:
+            return list(executor.map(_render_chunk, repeat(render_chunk), repeat(worker_input), repeat(settings), starts,
+                                     stops))
+
+    with ProcessPoolExecutor(workers, initializer=_set_worker_input, initargs=(worker_input,)) as executor:
+        return list(executor.map(_render_chunk_in_process, repeat(render_chunk), repeat(settings), starts, stops))
+
+
+def _render_chunk(render_chunk: RenderChunk, worker_input: Any, settings: Tuple[bool, bool, bool], start: int,
+                  stop: int) -> str:
+    escaping, compact, expanding = settings
+
+    with autoescape(escaping), compact_html(compact), autoexpand_shortcodes(expanding):
+        return render_chunk(worker_input, start, stop)
+
+
+def _render_chunk_in_process(render_chunk: RenderChunk, settings: Tuple[bool, bool, bool], start: int, stop: int) -> str:
+    return _render_chunk(render_chunk, _worker_input, settings, start, stop)
+
+
+def _set_worker_input(worker_input: Any) -> None:
+    global _worker_input
+    _worker_input = worker_input
+
+
+def _gil_disabled() -> bool:
+    # sys._is_gil_enabled() was added in Python 3.13, and only returns False on a free-threaded build.
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+
+    return is_gil_enabled is not None and not is_gil_enabled()
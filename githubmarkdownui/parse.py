@@ -0,0 +1,169 @@
+from __future__ import annotations
+import re
+from typing import Iterator, List, Optional, Tuple
+
+from githubmarkdownui.blocks.table import TableAlignment
+from githubmarkdownui.ci import CIJob, CIJobMetadata, CIStatus, CITask, CITaskMetadata
+from githubmarkdownui.constants import CODE_BLOCK_CLOSING_TAGS, CODE_BLOCK_OPENING_TAGS, TREE_CONTINUE_MARKER, \
+    TREE_END_MARKER, TREE_MORE_JOBS_MARKER
+
+# The longest emojis come first, so an emoji that starts with another one is not cut short.
+_STATUS = '|'.join(re.escape(status.value) for status in sorted(CIStatus, key=lambda status: -len(status.value)))
+_MARKER = f'(?:{TREE_CONTINUE_MARKER}|{TREE_END_MARKER})'
+# The info of a task is separated from the rest of its line by the padding and three more spaces.
+_INFO = r'(?: {3,}(?P<info>[^\n]*?))? *$'
+
+_TASK_LINE_PATTERN = re.compile(
+    rf'(?P<status>{_STATUS})  (?P<name>[^\n]*?)(?: <strong>\((?P<duration>[^\n]*?)\)</strong>)?{_INFO}', re.MULTILINE)
+# A line of a job tree is either a job, or a task of the job above it, which is indented by one more level.
+_TREE_LINE_PATTERN = re.compile(
+    rf'(?P<status>{_STATUS}) (?:(?P<task>[ {TREE_MORE_JOBS_MARKER}]\t){_MARKER} (?P<name>[^\n]*?){_INFO}|'
+    rf'{_MARKER} (?P<job_name>[^\n]*)$)', re.MULTILINE)
+_TABLE_CELL_PATTERN = {
+    tag: re.compile(rf'<{tag}(?: align="(?P<alignment>{"|".join(align.value for align in TableAlignment)})")?>'
+                    rf'(?P<text>.*?)</{tag}>', re.DOTALL)
+    for tag in ('th', 'td')
+}
+
+
+class ParseError(Exception):
+    """Raised when the text given to a parser is not output that it can read back. Only output rendered without a
+    max_length can be parsed, since omitted rows and tasks cannot be recovered.
+    """
+
+
+def parse_ci_task_list(text: str) -> List[CITask]:
+    """Reads the tasks back from a task list created by CIJob.ci_task_list. The status, name, duration and info of each
+    task are recovered as they were displayed, so a name that was escaped when it was rendered is returned escaped, and a
+    duration is returned as the string it was displayed as.
+
+    Names and info cannot be told apart from the padding around them if they contain three spaces in a row, or start or
+    end with a space. A name that contains <strong>( cannot be told apart from a duration either.
+
+    The task list is read in a single pass with a precompiled regular expression, so it takes linear time even for comments
+    that are several megabytes long.
+
+    :param text: The task list
+
+    :raises: ParseError when the text is not a task list
+    """
+    tasks = []
+
+    for match in _iter_code_block_lines(text, _TASK_LINE_PATTERN):
+        duration = match.group('duration')
+        tasks.append(CITask(CITaskMetadata(CIStatus(match.group('status')), match.group('name'),
+                                           duration or None, match.group('info') or None)))
+
+    return tasks
+
+
+def parse_child_ci_job_tree(text: str) -> List[CIJob]:
+    """Reads the child jobs back from a job tree created by CIJob.child_ci_job_tree with the default max_depth of 1. The
+    status and name of each job are recovered, along with the status, name and info of each of its tasks. Durations are
+    not displayed in a job tree, so they cannot be recovered. The same limits on names and info apply as for
+    parse_ci_task_list(), and the job tree is read in a single pass in the same way.
+
+    This allows an existing job tree to be updated without fetching all of its jobs again, for example:
+
+    child_jobs = parse_child_ci_job_tree(previous_tree)
+    child_jobs[0].tasks[2].update(status=CIStatus.FAILED)
+    CIJob(metadata, [], child_jobs).child_ci_job_tree()
+
+    :param text: The job tree
+
+    :raises: ParseError when the text is not a job tree, or it displays more than one level of child jobs
+    """
+    # Each job is only created once all of its tasks have been read, so its status counts are only worked out once.
+    jobs = []
+
+    for match in _iter_code_block_lines(text, _TREE_LINE_PATTERN):
+        status = CIStatus(match.group('status'))
+
+        if not match.group('task'):
+            jobs.append((CIJobMetadata(status, match.group('job_name')), []))
+        elif jobs:
+            jobs[-1][1].append(CITask(CITaskMetadata(status, match.group('name'), info=match.group('info') or None)))
+        else:
+            raise ParseError('The job tree starts with a task instead of a job')
+
+    return [CIJob(metadata, tasks) for metadata, tasks in jobs]
+
+
+def parse_table(text: str) -> Tuple[List[List[str]], Optional[List[Optional[TableAlignment]]]]:
+    """Reads the content and alignment back from a table created by table(), so table(*parse_table(text)) renders the same
+    table again. The first row of the content is the table headers. The alignment is None if no column is aligned. The
+    text of each cell is returned as it was displayed, so a cell that was escaped when it was rendered is returned escaped.
+
+    A cell that contains the closing tag of a cell, such as </td>, cannot be told apart from the end of the cell, and tables
+    rendered with compact HTML cannot be read. The table is read in a single pass, so it takes linear time.
+
+    :param text: The table
+
+    :raises: ParseError when the text is not a table
+    """
+    position = _expect(text, '<table><thead><tr>', 0)
+    header, alignment, position = _parse_table_cells(text, 'th', position)
+    position = _expect(text, '</tr></thead><tbody>', position)
+    content = [header]
+
+    while text.startswith('<tr>', position):
+        row, _, position = _parse_table_cells(text, 'td', position + len('<tr>'))
+        if len(row) != len(header):
+            raise ParseError(f'Row {len(content)} of the table has {len(row)} cells instead of {len(header)}')
+        content.append(row)
+        position = _expect(text, '</tr>', position)
+
+    if _expect(text, '</tbody></table>', position) != len(text):
+        raise ParseError('The text continues after the end of the table')
+
+    return content, alignment if any(alignment) else None
+
+
+def _iter_code_block_lines(text: str, pattern: re.Pattern) -> Iterator[re.Match]:
+    """Matches each line inside a code block with the given pattern, without copying the lines out of the text."""
+    if not text.startswith(CODE_BLOCK_OPENING_TAGS) or not text.endswith(CODE_BLOCK_CLOSING_TAGS):
+        raise ParseError('The text is not a code block')
+
+    position = len(CODE_BLOCK_OPENING_TAGS)
+    end = len(text) - len(CODE_BLOCK_CLOSING_TAGS)
+    line_number = 1
+
+    while position < end:
+        match = pattern.match(text, position, end)
+        if not match:
+            line_end = text.find('\n', position, end)
+            line = text[position:end if line_end == -1 else line_end]
+            raise ParseError(f'Line {line_number} cannot be parsed: {line!r}')
+
+        yield match
+        # Skip past the newline, and make sure the text does not end with one.
+        position = match.end() + 1
+        line_number += 1
+
+        if position == end:
+            raise ParseError(f'Line {line_number} is empty')
+
+
+def _parse_table_cells(text: str, tag: str, position: int) -> Tuple[List[str], List[Optional[TableAlignment]], int]:
+    """Reads the cells of a table row that starts at the given position. Returns the text and alignment of each cell, and
+    the position after the last cell.
+    """
+    cells = []
+    alignment = []
+    pattern = _TABLE_CELL_PATTERN[tag]
+    match = pattern.match(text, position)
+
+    while match:
+        cells.append(match.group('text'))
+        alignment.append(TableAlignment(match.group('alignment')) if match.group('alignment') else None)
+        position = match.end()
+        match = pattern.match(text, position)
+
+    return cells, alignment, position
+
+
+def _expect(text: str, expected: str, position: int) -> int:
+    if not text.startswith(expected, position):
+        raise ParseError(f'Expected {expected} at position {position} of the table')
+
+    return position + len(expected)
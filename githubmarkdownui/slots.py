@@ -0,0 +1,113 @@
+from dataclasses import MISSING, fields
+from functools import wraps
+from typing import Any, Callable, Dict, Tuple, Type, TypeVar
+
+T = TypeVar('T')
+
+
+def slotted(cls: Type[T]) -> Type[T]:
+    """Recreates a dataclass with __slots__ for each of its fields, so its instances do not each carry a __dict__. This
+    does the same as dataclass(slots=True), which is only available from Python 3.10. It must be applied above the
+    dataclass decorator, for example:
+
+    @slotted
+    @dataclass
+    class CITaskMetadata:
+        ...
+
+    The instances can no longer be given attributes that are not fields. Frozen dataclasses can still be copied and
+    pickled. The fields of a frozen dataclass, or of one that defines __setattr__, are set straight through their slots
+    while an instance is created, so __setattr__ only sees assignments made afterwards.
+
+    :param cls: The dataclass to recreate
+    """
+    field_names = tuple(cls_field.name for cls_field in fields(cls))
+    inherited_slots = {name for base in cls.__mro__[1:] for name in getattr(base, '__slots__', ())}
+    cls_dict = dict(cls.__dict__)
+
+    # The defaults of the fields are already part of __init__, so the class attributes holding them would only clash with
+    # the slots.
+    for name in field_names + ('__dict__', '__weakref__'):
+        cls_dict.pop(name, None)
+
+    cls_dict['__slots__'] = tuple(name for name in field_names if name not in inherited_slots)
+
+    # Fields that are not arguments of __init__ are read from the class attribute until they are first set, so they have to
+    # be set in __init__ instead.
+    defaults = tuple((cls_field.name, cls_field.default) for cls_field in fields(cls)
+                     if not cls_field.init and cls_field.default is not MISSING)
+    setting_slots = cls.__dataclass_params__.frozen or '__setattr__' in cls.__dict__
+    if defaults and not setting_slots:
+        cls_dict['__init__'] = _init_with_defaults(cls.__init__, defaults)
+
+    if cls.__dataclass_params__.frozen:
+        # Copying and unpickling set each slot with setattr(), which a frozen dataclass does not allow.
+        cls_dict['__getstate__'] = _get_frozen_state
+        cls_dict['__setstate__'] = _set_frozen_state
+
+    slotted_cls = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+    slotted_cls.__qualname__ = cls.__qualname__
+
+    if setting_slots:
+        # The slots only exist once the class has been recreated.
+        slotted_cls.__init__ = _init_setting_slots(slotted_cls)
+
+    return slotted_cls
+
+
+def _init_with_defaults(init: Callable[..., None], defaults: Tuple[Tuple[str, Any], ...]) -> Callable[..., None]:
+    # The assignments are generated as code, the same way dataclass() generates __init__, since a loop calling setattr()
+    # for each field would make creating the smallest dataclasses several times slower.
+    namespace = {'init': init}
+    lines = []
+    for name, value in defaults:
+        namespace[f'_default_{name}'] = value
+        lines.append(f'    self.{name} = _default_{name}')
+
+    # Set before calling __init__, since __post_init__ may already use them.
+    exec('def __init__(self, *args, **kwargs):\n' + '\n'.join(lines) + '\n    init(self, *args, **kwargs)\n', namespace)
+
+    return wraps(init)(namespace['__init__'])
+
+
+def _init_setting_slots(cls: Type[T]) -> Callable[..., None]:
+    # Like the __init__ dataclass() generates for a frozen dataclass, except each field is set with the __set__ method of its
+    # slot, since calling object.__setattr__() for each one makes creating an instance several times slower.
+    namespace: Dict[str, Any] = {'_MISSING': MISSING}
+    parameters = []
+    keyword_parameters = []
+    lines = []
+    for cls_field in fields(cls):
+        name = cls_field.name
+        namespace[f'_set_{name}'] = next(base.__dict__[name] for base in cls.__mro__ if name in base.__dict__).__set__
+        namespace[f'_default_{name}'] = cls_field.default
+        namespace[f'_factory_{name}'] = cls_field.default_factory
+
+        if cls_field.default_factory is not MISSING:
+            parameter = f'{name}=_MISSING'
+            value = f'_factory_{name}() if {name} is _MISSING else {name}' if cls_field.init else f'_factory_{name}()'
+        else:
+            parameter = name if cls_field.default is MISSING else f'{name}=_default_{name}'
+            value = name if cls_field.init else f'_default_{name}'
+
+        if cls_field.init:
+            (keyword_parameters if getattr(cls_field, 'kw_only', False) else parameters).append(parameter)
+        if cls_field.init or cls_field.default is not MISSING or cls_field.default_factory is not MISSING:
+            lines.append(f'    _set_{name}(self, {value})')
+
+    if hasattr(cls, '__post_init__'):
+        lines.append('    self.__post_init__()')
+
+    signature = ', '.join(['self', *parameters, *(['*', *keyword_parameters] if keyword_parameters else [])])
+    exec(f'def __init__({signature}):\n' + '\n'.join(lines or ['    pass']) + '\n', namespace)
+
+    return wraps(cls.__init__)(namespace['__init__'])
+
+
+def _get_frozen_state(self: Any) -> Dict[str, Any]:
+    return {self_field.name: getattr(self, self_field.name) for self_field in fields(self)}
+
+
+def _set_frozen_state(self: Any, state: Dict[str, Any]) -> None:
+    for name, value in state.items():
+        object.__setattr__(self, name, value)
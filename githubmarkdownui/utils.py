@@ -1,4 +1,8 @@
-def check_description(text: str) -> str:
+from githubmarkdownui.escape import Markup, escape_if_enabled
+from githubmarkdownui.instrumentation import instrumented
+
+
+def check_description(text: str) -> Markup:
     """Creates a collapsible section with the title 'What is this check?'
 
     :param text: The text to be displayed inside this check description
@@ -6,10 +10,12 @@ def check_description(text: str) -> str:
     return collapsible_section('What is this check?', text)
 
 
-def collapsible_section(title: str, text: str) -> str:
+@instrumented('collapsible_section')
+def collapsible_section(title: str, text: str) -> Markup:
     """Creates a collapsible section with the given title, and when expanded will show the given text.
 
     :param title: The title for this collapsible section
-    :param text: The text to be displayed inside this collapsible section
+    :param text: The text to be displayed inside this collapsible section. This is never escaped, since it is usually made
+    up of other blocks
     """
-    return f'<details><summary>{title}</summary>\n{text}</details>'
+    return Markup(f'<details><summary>{escape_if_enabled(title)}</summary>\n{text}</details>')
@@ -0,0 +1,127 @@
+import re
+from functools import lru_cache
+from typing import List, Sequence
+from unicodedata import category, east_asian_width
+
+# Only tags that start with a letter or a slash are treated as markup, so text such as "a < b" is still measured.
+_TAG_PATTERN = re.compile(r'</?[A-Za-z][^<>]*>')
+_ENTITY_PATTERN = re.compile(r'&(?:[A-Za-z][A-Za-z0-9]*|#[0-9]+|#[xX][0-9A-Fa-f]+);')
+# A run of non-ASCII characters, along with the ASCII character before it, since a run can start with characters such as
+# variation selectors that combine with the character before them.
+_NON_ASCII_RUN_PATTERN = re.compile(r'[\x00-\x7f]?[^\x00-\x7f]+')
+
+# Strings up to this length are cached whole, since the same task names and lines are usually measured again and again,
+# such as once to find the widest line and once to pad each line to it. Longer strings are rarely repeated.
+_CACHED_TEXT_LENGTH = 256
+
+_ZERO_WIDTH_JOINER = '\u200d'
+_EMOJI_PRESENTATION_SELECTOR = '\ufe0f'
+_TEXT_PRESENTATION_SELECTOR = '\ufe0e'
+_REGIONAL_INDICATORS = range(0x1F1E6, 0x1F200)
+_EMOJI_MODIFIERS = range(0x1F3FB, 0x1F400)
+
+
+def display_width(text: str) -> int:
+    """Calculates how many columns the given text takes up when displayed in a monospaced font, such as inside a code block.
+    HTML tags are ignored since they are not displayed, and HTML entities such as &lt; count as the single character they
+    display as. Wide characters such as emojis and CJK characters count as two columns, and characters that combine with
+    the character before them, such as accents, zero width joiners and variation selectors, do not add any columns.
+
+    Control characters such as tabs count as a single column, the same as len() would count them.
+
+    :param text: The text to measure
+    """
+    # Most text is plain ASCII without any markup, which is one column per character and needs no lookup at all.
+    if text.isascii() and '<' not in text and '&' not in text:
+        return len(text)
+
+    if len(text) <= _CACHED_TEXT_LENGTH:
+        return _cached_display_width(text)
+
+    return _measure(text)
+
+
+def display_widths(texts: Sequence[str]) -> List[int]:
+    """Calculates the display width of each of the given texts, the same as display_width(). Texts such as the task names of
+    a task list are usually all plain ASCII, which is checked once on all of them joined together, in which case each width
+    is just the length of the text.
+
+    :param texts: The texts to measure
+    """
+    joined_text = ''.join(texts)
+    if joined_text.isascii() and '<' not in joined_text and '&' not in joined_text:
+        return list(map(len, texts))
+
+    return list(map(display_width, texts))
+
+
+def pad_to_width(text: str, width: int) -> str:
+    """Left justifies the given text by adding spaces to the end of it until its display width is the given width. This is
+    the same as f'{text:<{width}}', except the display width of the text is used instead of its length.
+
+    :param text: The text to left justify
+    :param width: The display width to left justify the text to
+    """
+    padding = width - display_width(text)
+
+    return f'{text}{" " * padding}' if padding > 0 else text
+
+
+@lru_cache(maxsize=65536)
+def _cached_display_width(text: str) -> int:
+    return _measure(text)
+
+
+def _measure(text: str) -> int:
+    if '<' in text:
+        text = _TAG_PATTERN.sub('', text)
+    if '&' in text:
+        text = _ENTITY_PATTERN.sub('.', text)
+
+    width = len(text)
+    if text.isascii():
+        return width
+
+    # Only the runs of non-ASCII characters are measured one character at a time. These are usually the same few emojis or
+    # words over and over again, so their widths are cached.
+    for run in _NON_ASCII_RUN_PATTERN.findall(text):
+        width += _unicode_display_width(run) - len(run)
+
+    return width
+
+
+@lru_cache(maxsize=4096)
+def _unicode_display_width(text: str) -> int:
+    width = 0
+    # The width of the grapheme cluster currently being measured, which is already included in width.
+    cluster_width = 0
+    previous_character = ''
+
+    for character in text:
+        code_point = ord(character)
+
+        if previous_character == _ZERO_WIDTH_JOINER or _is_zero_width(character) or \
+                (code_point in _EMOJI_MODIFIERS and cluster_width) or \
+                (code_point in _REGIONAL_INDICATORS and ord(previous_character or ' ') in _REGIONAL_INDICATORS and
+                 cluster_width == 1):
+            # This character joins the current grapheme cluster. An emoji presentation selector, an emoji modifier or a
+            # second regional indicator (which together make a flag) turns the cluster into an emoji, which is wide.
+            if character == _EMOJI_PRESENTATION_SELECTOR or code_point in _EMOJI_MODIFIERS or \
+                    code_point in _REGIONAL_INDICATORS:
+                width += 2 - cluster_width
+                cluster_width = 2
+            elif character == _TEXT_PRESENTATION_SELECTOR and cluster_width == 2:
+                width -= 1
+                cluster_width = 1
+        else:
+            cluster_width = 2 if east_asian_width(character) in ('W', 'F') else 1
+            width += cluster_width
+
+        previous_character = character
+
+    return width
+
+
+def _is_zero_width(character: str) -> bool:
+    # Mn and Me are combining marks, and Cf are format characters such as zero width joiners and spaces.
+    return category(character) in ('Mn', 'Me', 'Cf')
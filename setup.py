@@ -6,4 +6,5 @@ with open("README.md", "r", encoding="utf-8") as fh:
 setuptools.setup(
     name="github-markdown-ui",
     packages=setuptools.find_packages(),
+    package_data={"githubmarkdownui": ["shortcodes.txt"]},
 )
@@ -1,7 +1,12 @@
+import io
+import sys
+from dataclasses import dataclass
+
 import pytest
 
 from githubmarkdownui.blocks import lists
-from test.helpers import remove_whitespace
+from githubmarkdownui.emitter import compact_html
+from test.helpers import html_tree, remove_whitespace
 
 
 def test_unordered_list():
@@ -63,6 +68,69 @@ def test_nested_lists(outer_list_tags, inner_list_tags):
     )
 
 
+def test_deeply_nested_lists():
+    depth = sys.getrecursionlimit() * 2
+    html_list = lists.UnorderedList(['leaf'])
+    for _ in range(depth):
+        html_list = lists.UnorderedList(['item', html_list])
+
+    assert str(html_list) == '<ul><li>item</li>' * depth + '<ul><li>leaf</li></ul>' + '</ul>' * depth
+
+
+def test_list_from_generators():
+    html_list = lists.OrderedList((f'item {index}' if index != 1 else lists.UnorderedList(f'nested {nested_index}'
+                                   for nested_index in range(2)) for index in range(3)), starting_number=5)
+
+    assert str(html_list) == remove_whitespace(
+        """
+        <ol start="5">
+            <li>item 0</li>
+            <ul>
+                <li>nested 0</li>
+                <li>nested 1</li>
+            </ul>
+            <li>item 2</li>
+        </ol>
+        """
+    )
+
+
+def test_list_write():
+    stream = io.StringIO()
+    html_list = lists.UnorderedList(['foo', lists.OrderedList(['bar']), 'baz'])
+    html_list.write(stream)
+
+    assert stream.getvalue() == str(html_list)
+
+
+def test_list_from_generator_render_max_length():
+    assert lists.UnorderedList(f'item {index}' for index in range(100)).render(max_length=60) == (
+        '<ul><li>item 0</li><li>99 more items omitted</li></ul>'
+    )
+    assert lists.OrderedList(f'item {index}' for index in range(3)).pages(max_length=60) == [
+        '<ol><li>item 0</li><li>item 1</li></ol>', '<ol start="3"><li>item 2</li></ol>',
+    ]
+
+
+def test_list_fingerprint():
+    html_list = lists.UnorderedList(['foo', lists.OrderedList(['bar']), 'baz'])
+
+    assert html_list.fingerprint() == lists.UnorderedList(['foo', lists.OrderedList(['bar']), 'baz']).fingerprint()
+    assert html_list.fingerprint() == lists.UnorderedList(iter(['foo', lists.OrderedList(['bar']), 'baz'])).fingerprint()
+    assert html_list.fingerprint() != lists.UnorderedList(['foo', lists.OrderedList(['bar', 'baz'])]).fingerprint()
+    assert html_list.fingerprint() != lists.UnorderedList(['foo', lists.UnorderedList(['bar']), 'baz']).fingerprint()
+    assert html_list.fingerprint() != lists.OrderedList(['foo', lists.OrderedList(['bar']), 'baz']).fingerprint()
+    assert lists.OrderedList(['foo']).fingerprint() != lists.OrderedList(['foo'], starting_number=2).fingerprint()
+
+
+def test_deeply_nested_list_fingerprint():
+    html_list = lists.UnorderedList(['leaf'])
+    for _ in range(sys.getrecursionlimit() + 100):
+        html_list = lists.UnorderedList([html_list])
+
+    assert len(html_list.fingerprint()) == 32
+
+
 def test_task_list():
     assert lists.task_list(['foo', 'bar', 'baz']) == '- [ ] foo\n- [ ] bar\n- [ ] baz'
 
@@ -71,7 +139,128 @@ def test_task_list_check_items():
     assert lists.task_list(['foo', 'bar', 'baz'], [0, 1]) == '- [x] foo\n- [x] bar\n- [ ] baz'
 
 
+def test_task_list_pairs():
+    assert lists.task_list([('foo', True), ('bar', False), ('baz', True)]) == '- [x] foo\n- [ ] bar\n- [x] baz'
+
+
+def test_task_list_from_generator():
+    items = (f'item {index}' for index in range(20000))
+    task_list = lists.task_list(items, range(0, 20000, 2))
+
+    assert task_list.count('- [x] ') == 10000
+    assert task_list.endswith('- [x] item 19998\n- [ ] item 19999')
+
+
+def test_write_task_list():
+    stream = io.StringIO()
+    lists.write_task_list(stream, ['foo', 'bar', 'baz'], [2])
+
+    assert stream.getvalue() == '- [ ] foo\n- [ ] bar\n- [x] baz'
+
+
+def test_task_list_empty():
+    assert lists.task_list([]) == ''
+
+
 @pytest.mark.parametrize('index', [-1, 3, 8])
 def test_task_list_check_invalid_index(index):
     with pytest.raises(Exception):
         lists.task_list(['foo', 'bar', 'baz'], [index])
+
+
+def test_list_render_max_length():
+    html_list = lists.UnorderedList(['foo', 'bar', lists.OrderedList(['hello', 'world']), 'baz'])
+
+    assert html_list.render() == str(html_list)
+    assert html_list.render(max_length=62) == '<ul><li>foo</li><li>bar</li><li>2 more items omitted</li></ul>'
+    assert html_list.render(max_length=61) == '<ul><li>foo</li><li>3 more items omitted</li></ul>'
+
+
+def test_list_pages():
+    html_list = lists.UnorderedList(['foo', 'bar', lists.OrderedList(['hello', 'world']), 'baz'])
+
+    assert html_list.pages(max_length=50) == [
+        '<ul><li>foo</li><li>bar</li></ul>',
+        '<ul><ol><li>hello</li><li>world</li></ol></ul>',
+        '<ul><li>baz</li></ul>',
+    ]
+
+
+def test_ordered_list_pages_continue_counting():
+    html_list = lists.OrderedList(['foo', 'bar', 'baz', lists.UnorderedList(['hello']), 'qux'], starting_number=5)
+
+    assert html_list.pages(max_length=45) == [
+        '<ol start="5"><li>foo</li><li>bar</li></ol>',
+        '<ol start="7"><li>baz</li></ol>',
+        '<ol start="8"><ul><li>hello</li></ul></ol>',
+        '<ol start="8"><li>qux</li></ol>',
+    ]
+
+
+def test_ordered_list_pages_count_items_not_fragments():
+    # A nested list that outputs itself can start with anything, even an <li> tag, but is still not numbered.
+    html_list = lists.OrderedList(['foo', LegacyList(['hello']), 'bar', 'baz'], starting_number=5)
+
+    assert html_list.pages(max_length=55, compact=True) == [
+        '<ol start="5"><li>foo</li><li><dl>hello</dl></li></ol>',
+        '<ol start="6"><li>bar<li>baz</ol>',
+    ]
+
+
+@dataclass
+class LegacyList(lists.HtmlList):
+    # Before opening_tag and closing_tag were added, child classes only overrode __str__.
+    def __str__(self) -> str:
+        return f'<li><dl>{"".join(self.items)}</dl></li>'
+
+
+def test_html_list_subclass_overriding_str():
+    html_list = lists.UnorderedList(['foo', LegacyList(['hello']), lists.OrderedList([LegacyList(['world'])])])
+
+    assert str(LegacyList(['hello'])) == '<li><dl>hello</dl></li>'
+    assert str(html_list) == '<ul><li>foo</li><li><dl>hello</dl></li><ol><li><dl>world</dl></li></ol></ul>'
+    assert html_list.build_list_contents() == '<li>foo</li><li><dl>hello</dl></li><ol><li><dl>world</dl></li></ol>'
+
+
+def test_html_list_subclass_default_tags():
+    @dataclass
+    class PlainList(lists.HtmlList):
+        pass
+
+    assert str(PlainList(['foo'])) == '<ul><li>foo</li></ul>'
+
+
+def test_compact_list():
+    html_list = lists.UnorderedList(['foo', 'bar', lists.OrderedList(['hello', 'world']), 'baz'])
+
+    # The item before a nested list is still closed, otherwise the nested list would be displayed inside of it.
+    assert html_list.render(compact=True) == '<ul><li>foo<li>bar</li><ol><li>hello<li>world</ol><li>baz</ul>'
+    assert html_list.build_list_contents(compact=True) == '<li>foo<li>bar</li><ol><li>hello<li>world</ol><li>baz'
+    assert html_list.render(max_length=47, compact=True) == '<ul><li>foo<li>bar<li>2 more items omitted</ul>'
+
+    with compact_html():
+        assert str(html_list) == html_list.render(compact=True)
+        assert html_list.render(compact=False) == \
+            '<ul><li>foo</li><li>bar</li><ol><li>hello</li><li>world</li></ol><li>baz</li></ul>'
+
+
+@pytest.mark.parametrize('items', [
+    ['foo', 'bar', 'baz'],
+    ['foo', lists.UnorderedList(['hello', lists.OrderedList(['world'])]), 'bar', lists.OrderedList(['baz'])],
+    [lists.UnorderedList(['hello']), lists.UnorderedList(['world']), 'foo'],
+])
+def test_compact_list_is_displayed_the_same(items):
+    html_list = lists.OrderedList(items, starting_number=3)
+    (_, _, children), = html_tree(html_list.render())
+
+    assert html_tree(html_list.render(compact=True)) == html_tree(html_list.render())
+
+    (_, _, compact_children), = html_tree(html_list.render(max_length=50, compact=True))
+    assert compact_children[:-1] == children[:len(compact_children) - 1]
+
+    pages = [html_tree(page)[0][2] for page in html_list.pages(max_length=100, compact=True)]
+    assert [child for page_children in pages for child in page_children] == children
+
+    stream = io.StringIO()
+    html_list.write(stream, compact=True)
+    assert stream.getvalue() == html_list.render(compact=True)
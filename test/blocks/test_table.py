@@ -1,8 +1,14 @@
+import io
+import random
+import re
+
 import pytest
 
 from githubmarkdownui.blocks import table
+from githubmarkdownui.emitter import compact_html
+from githubmarkdownui.escape import autoescape, escape
 
-from test.helpers import remove_whitespace
+from test.helpers import html_tree, remove_whitespace
 
 
 def test_table():
@@ -81,3 +87,406 @@ def test_table_alignment_error():
 def test_table_dimension_error():
     with pytest.raises(table.TableDimensionError):
         table.table([['col1', 'col2'], ['hello']])
+
+
+@pytest.mark.parametrize('content', [
+    [['col1', 'col2'], 'ab'],
+    [['col1', 'col2'], b'ab'],
+    [['col1', 'col2'], 'a<'],
+    ['ab', ['hello', 'world']],
+])
+@pytest.mark.parametrize('escaping', [False, True])
+def test_table_string_row(content, escaping):
+    with autoescape(escaping):
+        with pytest.raises(table.TableDimensionError):
+            table.table(content)
+        with pytest.raises(table.TableDimensionError):
+            table.table(content, table_format=table.TableFormat.MARKDOWN)
+
+
+def test_iter_table():
+    rows = (['hello', 'world'] for _ in range(2))
+
+    assert list(table.iter_table(['col1', 'col2'], rows, [table.TableAlignment.LEFT, None])) == [
+        '<table><thead><tr><th align="left">col1</th><th>col2</th></tr></thead><tbody>',
+        '<tr><td align="left">hello</td><td>world</td></tr>',
+        '<tr><td align="left">hello</td><td>world</td></tr>',
+        '</tbody></table>',
+    ]
+
+
+def test_iter_table_dimension_error():
+    fragments = table.iter_table(['col1', 'col2'], iter([['hello', 'world'], ['foo']]))
+
+    assert next(fragments).startswith('<table>')
+    assert next(fragments) == '<tr><td>hello</td><td>world</td></tr>'
+    with pytest.raises(table.TableDimensionError):
+        next(fragments)
+
+
+def test_table_writer():
+    stream = io.StringIO()
+
+    with table.TableWriter(stream, ['col1', 'col2']) as writer:
+        writer.write_row(['hello', 'world'])
+        writer.write_rows(iter([['foo', 'bar']]))
+
+    assert stream.getvalue() == table.table([['col1', 'col2'], ['hello', 'world'], ['foo', 'bar']])
+
+
+def test_table_writer_not_closed_after_exception():
+    stream = io.StringIO()
+
+    with pytest.raises(RuntimeError):
+        with table.TableWriter(stream, ['col1', 'col2']) as writer:
+            writer.write_row(['hello', 'world'])
+            raise RuntimeError
+
+    assert stream.getvalue() == '<table><thead><tr><th>col1</th><th>col2</th></tr></thead><tbody>' \
+        '<tr><td>hello</td><td>world</td></tr>'
+
+
+def test_table_writer_alignment_error():
+    with pytest.raises(table.TableAlignmentError):
+        table.TableWriter(io.StringIO(), ['col1', 'col2'], [table.TableAlignment.CENTER])
+
+
+def test_table_writer_closed():
+    writer = table.TableWriter(io.StringIO(), ['col1'])
+    writer.close()
+
+    with pytest.raises(ValueError):
+        writer.write_row(['hello'])
+
+
+@pytest.mark.parametrize('alignment', [None, [table.TableAlignment.RIGHT, None]])
+def test_table_from_columns(alignment):
+    content = [['col1', 'col2'], ['hello', 'world'], ['foo', 'bar']]
+
+    assert table.table_from_columns({'col1': ['hello', 'foo'], 'col2': ['world', 'bar']}, alignment=alignment) == \
+        table.table(content, alignment)
+    assert table.table_from_columns([['hello', 'foo'], ['world', 'bar']], ['col1', 'col2'], alignment) == \
+        table.table(content, alignment)
+
+
+def test_table_from_columns_select_headers():
+    assert table.table_from_columns({'col1': [1, 2], 'col2': [3, 4]}, ['col2']) == table.table([['col2'], ['3'], ['4']])
+
+
+def test_table_from_columns_missing_headers():
+    with pytest.raises(Exception):
+        table.table_from_columns([['hello'], ['world']])
+
+
+@pytest.mark.parametrize('columns, headers', [
+    [[['hello', 'foo'], ['world']], ['col1', 'col2']],
+    [[['hello'], ['world']], ['col1']],
+])
+def test_table_from_columns_dimension_error(columns, headers):
+    with pytest.raises(table.TableDimensionError):
+        table.table_from_columns(columns, headers)
+
+
+def test_table_from_columns_alignment_error():
+    with pytest.raises(table.TableAlignmentError):
+        table.table_from_columns({'col1': ['hello'], 'col2': ['world']}, alignment=[table.TableAlignment.CENTER])
+
+
+def reference_table(content, alignment):
+    """Builds a table one cell at a time, the way table() originally did."""
+    def cell(tag, index, item):
+        align = alignment[index] if alignment else None
+        return f'<{tag} align="{align.value}">{item}</{tag}>' if align else f'<{tag}>{item}</{tag}>'
+
+    header = ''.join(cell('th', index, item) for index, item in enumerate(content[0]))
+    rows = ''.join('<tr>' + ''.join(cell('td', index, item) for index, item in enumerate(row)) + '</tr>'
+                   for row in content[1:])
+
+    return f'<table><thead><tr>{header}</tr></thead><tbody>{rows}</tbody></table>'
+
+
+def test_table_template_matches_table():
+    generator = random.Random(13)
+    alignments = [None, *table.TableAlignment]
+
+    for _ in range(100):
+        columns = generator.randint(1, 5)
+        alignment = [generator.choice(alignments) for _ in range(columns)] if generator.random() < 0.5 else None
+        content = [[generator.choice(['✅', 'N/A', '100%', '%s', 'foo', '']) for _ in range(columns)]
+                   for _ in range(generator.randint(1, 6))]
+        template = table.compile_table(alignment, columns)
+
+        assert template.render(content) == table.table(content, alignment) == reference_table(content, alignment)
+
+
+def test_compile_table_is_cached():
+    alignment = [table.TableAlignment.LEFT, None]
+
+    assert table.compile_table(alignment, 2) is table.compile_table(list(alignment), 2)
+    assert table.compile_table(None, 2) is not table.compile_table(alignment, 2)
+
+
+def test_table_template_errors():
+    with pytest.raises(table.TableAlignmentError):
+        table.compile_table([table.TableAlignment.LEFT], 2)
+
+    template = table.compile_table(None, 2)
+    with pytest.raises(table.TableDimensionError):
+        template.render([['col1', 'col2'], ['hello', 'world', 'foo']])
+    with pytest.raises(table.TableDimensionError):
+        template.render([['col1'], ['hello', 'world']])
+
+
+def test_table_template_interns_escaped_cells():
+    template = table.TableTemplate(2)
+    content = [['status', 'test']] + [['<N/A>', f'test {index}'] for index in range(10)]
+
+    with autoescape():
+        assert template.render(content) == table.table([[escape(cell) for cell in row] for row in content])
+
+    # The repeated <N/A> cell is only escaped once.
+    assert template._interned_escape.cache_info().hits == 9
+
+
+def test_table_fingerprint():
+    content = [['col1', 'col2'], ['hello', 'world'], ['foo', 'bar']]
+
+    assert table.table_fingerprint(content) == table.table_fingerprint(iter([list(row) for row in content]))
+    assert table.table_fingerprint(content) == table.table_fingerprint(content, [None, None])
+    assert table.table_fingerprint(content) != table.table_fingerprint(content, [table.TableAlignment.LEFT, None])
+    assert table.table_fingerprint(content) != table.table_fingerprint(content[:2])
+    # The same cells split into rows differently do not run together.
+    assert table.table_fingerprint([['a', 'b', 'c', 'd']]) != table.table_fingerprint([['a', 'b'], ['c', 'd']])
+    # Cells that are rendered the same way have the same fingerprint, whatever their type.
+    assert table.table_fingerprint([['count', 'ratio'], [1, 0.5]]) == \
+        table.table_fingerprint([['count', 'ratio'], ['1', '0.5']])
+    assert table.table_fingerprint([['count'], [1]]) != table.table_fingerprint([['count'], ['1.0']])
+
+
+def test_table_max_length():
+    content = [['col1']] + [[f'row {index}'] for index in range(10)]
+
+    result = table.table(content, max_length=150)
+
+    assert len(result) <= 150
+    assert result == remove_whitespace(
+        """
+        <table>
+            <thead>
+                <tr>
+                    <th>col1</th>
+                </tr>
+            </thead>
+            <tbody>
+                <tr>
+                    <td>row 0</td>
+                </tr>
+                <tr>
+                    <td colspan="1">9 more rows omitted</td>
+                </tr>
+            </tbody>
+        </table>
+        """
+    )
+
+
+def test_table_max_length_fits():
+    content = [['col1', 'col2'], ['hello', 'world']]
+
+    assert table.table(content, max_length=1000) == table.table(content)
+
+
+def test_table_pages():
+    content = [['col1']] + [[f'row {index}'] for index in range(10)]
+
+    pages = table.table_pages(content, max_length=120)
+
+    assert pages == [table.table([content[0]] + content[index:index + 2]) for index in range(1, 11, 2)]
+    assert all(len(page) <= 120 for page in pages)
+
+
+def test_markdown_table():
+    content = [['col1', 'col2'], ['hello', 'world'], ['foo', 'bar']]
+
+    assert table.table(content, table_format=table.TableFormat.MARKDOWN) == '|col1|col2|\n|-|-|\n|hello|world|\n|foo|bar|'
+    assert table.table(content, [table.TableAlignment.LEFT, table.TableAlignment.RIGHT],
+                       table_format=table.TableFormat.MARKDOWN) == '|col1|col2|\n|:-|-:|\n|hello|world|\n|foo|bar|'
+    assert table.table(content[:1], [table.TableAlignment.CENTER, None],
+                       table_format=table.TableFormat.MARKDOWN) == '|col1|col2|\n|:-:|-|'
+
+
+def test_markdown_table_escaping():
+    content = [['a|b', 'c'], ['first\nsecond', 5]]
+
+    assert table.table(content, table_format=table.TableFormat.MARKDOWN) == \
+        '|a\\|b|c|\n|-|-|\n|first<br>second|5|'
+
+    with autoescape():
+        assert table.table([['<a|b>'], ['x\ny']], table_format=table.TableFormat.MARKDOWN) == \
+            '|&lt;a&#124;b&gt;|\n|-|\n|x<br>y|'
+
+
+def read_markdown_row(row):
+    """Reads the cells of a row of a Markdown table the way markdown-it does, where a | after a backslash is part of the
+    cell, and then unescapes the text of each cell as inline Markdown.
+    """
+    cells = []
+    cell = ''
+    for previous, character in zip(' ' + row, row):
+        if character != '|':
+            cell += character
+        elif previous == '\\':
+            cell = cell[:-1] + character
+        else:
+            cells.append(cell)
+            cell = ''
+
+    return [re.sub(r'\\(.)', r'\1', cell.strip()) for cell in cells[1:]]
+
+
+@pytest.mark.parametrize('cell, expected', [
+    ['C:\\dir\\', '|C:\\\\dir\\\\ |next|'],
+    ['a\\|b', '|a\\\\\\|b|next|'],
+    ['\\', '|\\\\ |next|'],
+])
+def test_markdown_table_escapes_backslashes(cell, expected):
+    markdown_table = table.table([['col1', 'col2'], [cell, 'next']], table_format=table.TableFormat.MARKDOWN)
+
+    assert markdown_table == f'|col1|col2|\n|-|-|\n{expected}'
+    assert read_markdown_row(expected) == [cell, 'next']
+
+
+def test_markdown_table_max_length_and_pages():
+    content = [['col1']] + [[f'row {index}'] for index in range(10)]
+
+    result = table.table(content, max_length=40, table_format=table.TableFormat.MARKDOWN)
+    pages = table.table_pages(content, max_length=30, table_format=table.TableFormat.MARKDOWN)
+
+    assert result == '|col1|\n|-|\n|row 0|\n|9 more rows omitted|'
+    assert pages == [table.table([content[0]] + content[index:index + 2], table_format=table.TableFormat.MARKDOWN)
+                     for index in range(1, 11, 2)]
+    assert all(len(page) <= 30 for page in pages)
+
+
+def test_markdown_table_writer():
+    stream = io.StringIO()
+
+    with table.TableWriter(stream, ['col1', 'col2'], table_format=table.TableFormat.MARKDOWN) as writer:
+        writer.write_row(['a|b', 'c'])
+
+    assert stream.getvalue() == '|col1|col2|\n|-|-|\n|a\\|b|c|'
+
+
+def test_table_auto_format():
+    content = [['col1', 'col2'], ['hello', 'world']]
+    markdown_table = table.table(content, table_format=table.TableFormat.MARKDOWN)
+
+    assert table.table(content, table_format=table.TableFormat.AUTO) == markdown_table
+    assert table.table_pages(content, table_format=table.TableFormat.AUTO) == [markdown_table]
+    # A newline cannot be displayed in a Markdown table.
+    assert table.choose_table_format([['col1'], ['first\nsecond']]) == table.TableFormat.HTML
+    # Escaping every | would take more characters than the tags of an HTML table.
+    assert table.choose_table_format([['col1'], ['|' * 100]]) == table.TableFormat.HTML
+    with autoescape():
+        assert table.choose_table_format([['col1'], ['|' * 100]]) == table.TableFormat.MARKDOWN
+
+    with table.inside_html_block():
+        assert table.table(content, table_format=table.TableFormat.AUTO) == table.table(content)
+    assert table.choose_table_format(content) == table.TableFormat.MARKDOWN
+
+
+def test_table_auto_format_picks_shorter_table():
+    generator = random.Random(21)
+    alignments = [None, *table.TableAlignment]
+    cells = ['', 'a', '|', '||||', '|' * 30, 'foo|bar', 7, '\\', 'C:\\dir\\', '\\' * 30]
+
+    for _ in range(200):
+        columns = generator.randint(1, 4)
+        alignment = [generator.choice(alignments) for _ in range(columns)] if generator.random() < 0.5 else None
+        content = [[generator.choice(cells) for _ in range(columns)]
+                   for _ in range(generator.randint(1, 4))]
+        html_table = table.table(content, alignment)
+        markdown_table = table.table(content, alignment, table_format=table.TableFormat.MARKDOWN)
+
+        expected = table.TableFormat.MARKDOWN if len(markdown_table) < len(html_table) else table.TableFormat.HTML
+        assert table.choose_table_format(content, alignment) == expected
+
+
+def test_table_format_auto_errors():
+    with pytest.raises(ValueError):
+        table.compile_table(None, 2, table.TableFormat.AUTO)
+    with pytest.raises(ValueError):
+        list(table.iter_table(['col1'], [], table_format=table.TableFormat.AUTO))
+    with pytest.raises(table.TableDimensionError):
+        table.table([['col1', 'col2'], ['a|b']], table_format=table.TableFormat.MARKDOWN)
+
+
+def test_compact_table():
+    content = [['col1', 'col2'], ['hello', 'world']]
+
+    assert table.table(content, compact=True) == \
+        '<table><thead><tr><th>col1<th>col2</thead><tbody><tr><td>hello<td>world</tbody></table>'
+    # When every column has the same alignment, it is set once on each row.
+    assert table.table(content, [table.TableAlignment.RIGHT] * 2, compact=True) == \
+        '<table><thead><tr align="right"><th>col1<th>col2</thead><tbody><tr align="right"><td>hello<td>world</tbody>' \
+        '</table>'
+    assert table.table(content, [table.TableAlignment.RIGHT, None], compact=True) == \
+        '<table><thead><tr><th align="right">col1<th>col2</thead><tbody><tr><td align="right">hello<td>world</tbody>' \
+        '</table>'
+    # Markdown tables have no closing tags to leave out.
+    assert table.table(content, table_format=table.TableFormat.MARKDOWN, compact=True) == \
+        table.table(content, table_format=table.TableFormat.MARKDOWN)
+
+
+def table_rows(text):
+    """Returns the header row and the body rows of a table parsed with html_tree()."""
+    (_, _, (thead, tbody)), = html_tree(text)
+    return thead[2], tbody[2]
+
+
+def test_compact_table_is_displayed_the_same():
+    generator = random.Random(22)
+    alignments = [None, *table.TableAlignment]
+
+    for _ in range(100):
+        columns = generator.randint(1, 4)
+        alignment = generator.choice([None, [generator.choice(alignments)] * columns,
+                                      [generator.choice(alignments) for _ in range(columns)]])
+        content = [[generator.choice(['', 'a', '<b>bold</b>', 'x y']) for _ in range(columns)]
+                   for _ in range(generator.randint(1, 6))]
+        header, rows = table_rows(table.table(content, alignment))
+
+        compact_table = table.table(content, alignment, compact=True)
+        assert len(compact_table) < len(table.table(content, alignment))
+        assert html_tree(compact_table) == html_tree(table.table(content, alignment))
+
+        # A compact table fits at least as many rows in the same length.
+        compact_header, compact_rows = table_rows(table.table(content, alignment, max_length=400, compact=True))
+        _, budget_rows = table_rows(table.table(content, alignment, max_length=400))
+        assert compact_header == header
+        assert compact_rows[:-1] == rows[:len(compact_rows) - 1]
+        assert len(compact_rows) >= len(budget_rows)
+
+        pages = [table_rows(page) for page in table.table_pages(content, alignment, max_length=400, compact=True)]
+        assert all(page_header == header for page_header, _ in pages)
+        assert [row for _, page_rows in pages for row in page_rows] == rows
+
+
+def test_compact_html_setting():
+    content = [['col1'], ['hello']]
+
+    with compact_html():
+        compact_table = table.table(content)
+        assert table.table(content, compact=False) == '<table><thead><tr><th>col1</th></tr></thead><tbody><tr>' \
+            '<td>hello</td></tr></tbody></table>'
+        with compact_html(False):
+            assert table.table(content) == table.table(content, compact=False)
+
+        stream = io.StringIO()
+        with table.TableWriter(stream, ['col1']) as writer:
+            writer.write_row(['hello'])
+
+    assert compact_table == '<table><thead><tr><th>col1</thead><tbody><tr><td>hello</tbody></table>'
+    assert stream.getvalue() == compact_table
+    assert table.table(content) != compact_table
+    assert table.table(content, compact=True) == compact_table
@@ -1,3 +1,4 @@
+from html.parser import HTMLParser
 from re import sub
 
 
@@ -8,3 +9,77 @@ def remove_whitespace(text: str) -> str:
     we don't put whitespace around < or > characters within HTML tags.
     """
     return sub(r'(?<=>)\s+|\s+(?=<)', '', text)
+
+
+# The elements that a new element closes if it is open, when its closing tag was left out, such as a <td> closing the
+# previous cell. Each new element stops at the first element in its stopping set, such as the list or table that contains it.
+_IMPLIED_CLOSINGS = {
+    'li': ({'li'}, {'ul', 'ol'}),
+    'td': ({'td', 'th'}, {'tr', 'table'}),
+    'th': ({'td', 'th'}, {'tr', 'table'}),
+    'tr': ({'td', 'th', 'tr'}, {'thead', 'tbody', 'table'}),
+}
+
+
+class _HtmlTreeBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.root = ('root', {}, [])
+        self.open_elements = [self.root]
+
+    def handle_starttag(self, tag, attrs):
+        closed_tags, stopping_tags = _IMPLIED_CLOSINGS.get(tag, (set(), set()))
+        closed_index = len(self.open_elements)
+        for index in range(len(self.open_elements) - 1, 0, -1):
+            open_tag = self.open_elements[index][0]
+            if open_tag in stopping_tags:
+                break
+            if open_tag in closed_tags:
+                closed_index = index
+        del self.open_elements[closed_index:]
+
+        element = (tag, dict(attrs), [])
+        self.open_elements[-1][2].append(element)
+        self.open_elements.append(element)
+
+    def handle_endtag(self, tag):
+        for index in range(len(self.open_elements) - 1, 0, -1):
+            if self.open_elements[index][0] == tag:
+                del self.open_elements[index:]
+                return
+
+    def handle_data(self, data):
+        self.open_elements[-1][2].append(data)
+
+    def handle_entityref(self, name):
+        self.handle_data(f'&{name};')
+
+    def handle_charref(self, name):
+        self.handle_data(f'&#{name};')
+
+
+def html_tree(text: str) -> list:
+    """Parses HTML into a tree of (tag, attributes, children) tuples, filling in the closing tags that HTML lets be left
+    out the same way a browser does. An alignment set on a table row is moved to each of its cells that has none, since the
+    cells are displayed with the alignment of their row.
+
+    This allows compact HTML to be compared with the HTML it is displayed the same as.
+    """
+    builder = _HtmlTreeBuilder()
+    builder.feed(text)
+    builder.close()
+
+    return [_inherit_row_alignment(child) for child in builder.root[2]]
+
+
+def _inherit_row_alignment(node, alignment=None):
+    if isinstance(node, str):
+        return node
+
+    tag, attributes, children = node
+    if tag in ('td', 'th') and alignment and 'align' not in attributes:
+        attributes = {**attributes, 'align': alignment}
+    elif tag == 'tr':
+        alignment = attributes.pop('align', None)
+
+    return tag, attributes, [_inherit_row_alignment(child, alignment) for child in children]
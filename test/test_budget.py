@@ -0,0 +1,57 @@
+import pytest
+
+from githubmarkdownui import budget
+
+
+def omission_marker(omitted_count):
+    return f'[{omitted_count} omitted]'
+
+
+def test_render_within_budget_fits():
+    assert budget.render_within_budget('<', ['a', 'b', 'c'], '>', 7, omission_marker, ',') == '<a,b,c>'
+
+
+def test_render_within_budget_omits_items():
+    items = ['aaaa', 'bbbb', 'cccc', 'dddd']
+
+    result = budget.render_within_budget('<', iter(items), '>', 20, omission_marker, ',', len(items))
+
+    assert result == '<aaaa,[3 omitted]>'
+    assert len(result) <= 20
+
+
+def test_render_within_budget_counts_remaining_items():
+    assert budget.render_within_budget('', iter(['aaaa'] * 5), '', 22, omission_marker, ',') == 'aaaa,aaaa,[3 omitted]'
+
+
+def test_render_within_budget_does_not_render_omitted_items():
+    rendered = []
+
+    def items():
+        for item in ['aaaa', 'bbbb', 'cccc', 'dddd']:
+            rendered.append(item)
+            yield item
+
+    result = budget.render_within_budget('', items(), '', 10, lambda omitted_count: f'+{omitted_count}', item_count=4)
+
+    assert result == 'aaaabbbb+2'
+    # Only the first item that does not fit gets rendered, the rest are never consumed.
+    assert rendered == ['aaaa', 'bbbb', 'cccc']
+
+
+def test_render_within_budget_error():
+    with pytest.raises(budget.BudgetError):
+        budget.render_within_budget('<', ['aaaa'], '>', 5, omission_marker)
+
+
+def test_render_pages():
+    assert budget.render_pages('<', ['aa', 'bb', 'cc', 'dd', 'e'], '>', 7, ',') == ['<aa,bb>', '<cc,dd>', '<e>']
+
+
+def test_render_pages_no_items():
+    assert budget.render_pages('<', [], '>', 7) == ['<>']
+
+
+def test_render_pages_error():
+    with pytest.raises(budget.BudgetError):
+        budget.render_pages('<', ['aaaaaaa'], '>', 7)
@@ -1,7 +1,16 @@
+import copy
+import pickle
+import random
+import sys
+from dataclasses import replace
+
 import pytest
 
 from githubmarkdownui import ci
 from githubmarkdownui.constants import TREE_CONTINUE_MARKER, TREE_END_MARKER, TREE_MORE_JOBS_MARKER
+from githubmarkdownui.duration import Duration
+from githubmarkdownui.emoji import autoexpand_shortcodes
+from githubmarkdownui.escape import autoescape
 from githubmarkdownui.inline import bold
 
 
@@ -22,10 +31,9 @@ sample_job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.SUCCEEDED, 'my job'), [
 
 
 def test_get_left_justified_task_string_length():
-    assert sample_job.tasks[0].get_left_justified_task_string_length() == len(
-        f'{ci.CIStatus.SUCCEEDED.value}  first task (15s)')
-    assert sample_job.tasks[1].get_left_justified_task_string_length() == len(
-        f'{ci.CIStatus.SUCCEEDED.value}  second task (1m 29s)')
+    # The emoji is displayed two columns wide.
+    assert sample_job.tasks[0].get_left_justified_task_string_length() == len('xx  first task (15s)')
+    assert sample_job.tasks[1].get_left_justified_task_string_length() == len('xx  second task (1m 29s)')
 
 
 @pytest.mark.parametrize('task, expected', [
@@ -51,7 +59,7 @@ def test_build_task_string(task, expected):
         sample_job.tasks[0],
         70,
         f'{ci.CIStatus.SUCCEEDED.value}  first task <strong>(15s)</strong>'
-        '                                                      additional info',
+        '                                                     additional info',
     ],
     [
         sample_job.tasks[0],
@@ -119,3 +127,826 @@ def test_ci_task_list(job, status, expected):
 ])
 def test_child_ci_job_tree(status, expected):
     assert sample_job.child_ci_job_tree(status) == expected
+
+
+def test_ci_task_list_max_length():
+    assert sample_job.child_jobs[1].ci_task_list(max_length=150) == (
+        f'<pre><code>{ci.CIStatus.SUCCEEDED.value}  another task <strong>(10s)</strong>             additional info\n'
+        '3 more tasks omitted</code></pre>'
+    )
+    assert sample_job.ci_task_list(max_length=1000) == sample_job.ci_task_list()
+
+
+def test_ci_task_list_pages():
+    assert sample_job.ci_task_list_pages(max_length=100) == [
+        f'<pre><code>{ci.CIStatus.SUCCEEDED.value}  first task <strong>(15s)</strong>       additional info</code></pre>',
+        f'<pre><code>{ci.CIStatus.SUCCEEDED.value}  second task <strong>(1m 29s)</strong>   additional info</code></pre>',
+    ]
+
+
+def test_child_ci_job_tree_max_length():
+    assert sample_job.child_ci_job_tree(max_length=150) == (
+        f'<pre><code>{ci.CIStatus.SUCCEEDED.value} {TREE_CONTINUE_MARKER} first child job\n{ci.CIStatus.SUCCEEDED.value} '
+        f'{TREE_MORE_JOBS_MARKER}\t{TREE_END_MARKER} my first task   additional info\n{ci.CIStatus.FAILED.value} '
+        f'{TREE_END_MARKER} second child job\n4 more jobs and tasks omitted</code></pre>'
+    )
+    assert sample_job.child_ci_job_tree(ci.CIStatus.FAILED, max_length=1000) == \
+        sample_job.child_ci_job_tree(ci.CIStatus.FAILED)
+
+
+def test_child_ci_job_tree_pages():
+    pages = sample_job.child_ci_job_tree_pages(max_length=150)
+
+    assert all(len(page) <= 150 for page in pages)
+    assert '\n'.join(page[len('<pre><code>'):-len('</code></pre>')] for page in pages) == \
+        sample_job.child_ci_job_tree()[len('<pre><code>'):-len('</code></pre>')]
+
+
+def build_sample_job():
+    return ci.CIJob(ci.CIJobMetadata(ci.CIStatus.SUCCEEDED, 'my job'), [
+        ci.CITask(ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'first task', '15s', 'additional info')),
+    ], [
+        ci.CIJob(ci.CIJobMetadata(ci.CIStatus.SUCCEEDED, 'first child job'), [
+            ci.CITask(ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'my first task', '10s', 'additional info')),
+        ]),
+        ci.CIJob(ci.CIJobMetadata(ci.CIStatus.SUCCEEDED, 'second child job'), [
+            ci.CITask(ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'another task', '10s', 'additional info')),
+            ci.CITask(ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'third task', '1m 8s')),
+        ]),
+    ])
+
+
+def assert_matches_fresh_render(job):
+    fresh_job = ci.CIJob(job.metadata, [ci.CITask(task.metadata) for task in job.tasks], [
+        ci.CIJob(child_job.metadata, [ci.CITask(task.metadata) for task in child_job.tasks]) for child_job in job.child_jobs
+    ])
+
+    for status in [None, ci.CIStatus.SUCCEEDED, ci.CIStatus.FAILED]:
+        assert job.ci_task_list(status) == fresh_job.ci_task_list(status)
+        assert job.child_ci_job_tree(status) == fresh_job.child_ci_job_tree(status)
+        for child_job, fresh_child_job in zip(job.child_jobs, fresh_job.child_jobs):
+            assert child_job.ci_task_list(status) == fresh_child_job.ci_task_list(status)
+
+
+def test_task_update_rerenders_only_its_job():
+    job = build_sample_job()
+    job.child_ci_job_tree()
+    first_child_lines = job.child_jobs[0]._unprefixed_tree_lines(None, False, True, False)
+
+    job.child_jobs[1].tasks[1].update(status=ci.CIStatus.FAILED, name='a task with a much longer name')
+
+    assert_matches_fresh_render(job)
+    assert job.child_jobs[0]._unprefixed_tree_lines(None, False, True, False) is first_child_lines
+    assert f'{ci.CIStatus.FAILED.value}  \t{TREE_END_MARKER} a task with a much longer name' in job.child_ci_job_tree()
+
+
+def test_task_update_changes_width():
+    job = build_sample_job()
+    job.child_jobs[1].ci_task_list()
+
+    job.child_jobs[1].tasks[1].update(duration='1h 10m 10s')
+    assert_matches_fresh_render(job)
+
+    job.child_jobs[1].tasks[1].update(duration=None)
+    assert_matches_fresh_render(job)
+
+
+def test_job_changes_rerender():
+    job = build_sample_job()
+    job.child_ci_job_tree()
+    job.ci_task_list()
+
+    job.child_jobs[0].update(status=ci.CIStatus.FAILED)
+    assert_matches_fresh_render(job)
+
+    job.add_task(ci.CITask(ci.CITaskMetadata(ci.CIStatus.FAILED, 'new task', '1s')))
+    job.child_jobs[0].add_task(ci.CITask(ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'new child task')))
+    job.add_child_job(ci.CIJob(ci.CIJobMetadata(ci.CIStatus.FAILED, 'third child job'), []))
+    assert_matches_fresh_render(job)
+
+
+def test_mark_dirty_after_in_place_change():
+    job = build_sample_job()
+    job.child_ci_job_tree()
+
+    # Replacing a task keeps the length of the list the same, so it cannot be found without mark_dirty().
+    job.child_jobs[0].tasks[0] = ci.CITask(replace(job.child_jobs[0].tasks[0].metadata, info='changed info'))
+    job.child_jobs[0].mark_dirty()
+
+    assert_matches_fresh_render(job)
+
+
+def test_in_place_changes_are_found():
+    job = build_sample_job()
+    job.child_ci_job_tree()
+    job.ci_task_list()
+    fingerprint = job.fingerprint()
+
+    job.tasks.append(ci.CITask(ci.CITaskMetadata(ci.CIStatus.FAILED, 'appended task', '1s')))
+    job.child_jobs[1].tasks.pop()
+    job.child_jobs.append(ci.CIJob(ci.CIJobMetadata(ci.CIStatus.FAILED, 'appended job'), []))
+    assert_matches_fresh_render(job)
+    assert job.fingerprint() != fingerprint
+    assert job.task_status_counts(include_child_jobs=True) == count_statuses(job)[0]
+
+    job.child_jobs[0].tasks = [ci.CITask(ci.CITaskMetadata(ci.CIStatus.FAILED, 'assigned task'))]
+    job.child_jobs[0].tasks[0].metadata = ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'assigned metadata', '2s')
+    job.child_jobs[1].metadata = ci.CIJobMetadata(ci.CIStatus.FAILED, 'assigned job metadata')
+    assert_matches_fresh_render(job)
+    assert (job.task_status_counts(include_child_jobs=True), job.job_status_counts(include_child_jobs=True)) == \
+        count_statuses(job)
+
+
+def test_removed_task_no_longer_changes_its_job():
+    job = build_sample_job()
+    job.child_ci_job_tree()
+    task = job.child_jobs[1].tasks[0]
+    job.child_jobs[1].tasks.remove(task)
+
+    # The first update reaches the job before the removal was found, and the second one no longer reaches it.
+    task.update(status=ci.CIStatus.FAILED)
+    task.update(status=ci.CIStatus.RUNNING)
+    assert_matches_fresh_render(job)
+    assert job.task_status_counts(include_child_jobs=True) == count_statuses(job)[0]
+
+
+def test_metadata_fields_changed_in_place():
+    job = build_sample_job()
+    job.fingerprint()
+    task = job.child_jobs[0].tasks[0]
+    shared_metadata = ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'shared metadata')
+    job.child_jobs[1].add_task(ci.CITask(shared_metadata))
+    job.child_jobs[1].add_task(ci.CITask(shared_metadata))
+    revision = job.revision()
+
+    task.metadata.status = ci.CIStatus.FAILED
+    task.metadata.duration = '11s'
+    job.child_jobs[0].metadata.name = 'renamed job'
+    shared_metadata.info = 'changed info'
+
+    assert job.revision() > revision
+    assert_matches_fresh_render(job)
+    assert (job.task_status_counts(include_child_jobs=True), job.job_status_counts(include_child_jobs=True)) == \
+        count_statuses(job)
+    assert job.fingerprint() == copy.deepcopy(job).fingerprint()
+
+
+@pytest.mark.parametrize('copy_job', [copy.deepcopy, lambda job: pickle.loads(pickle.dumps(job))])
+def test_copied_metadata_changes_only_the_copy(copy_job):
+    job = build_sample_job()
+    task_list, tree = job.child_jobs[0].ci_task_list(), job.child_ci_job_tree()
+    copied_job = copy_job(job)
+    copied_job.child_ci_job_tree()
+
+    copied_job.child_jobs[0].tasks[0].metadata.status = ci.CIStatus.FAILED
+    copied_job.child_jobs[1].metadata.status = ci.CIStatus.FAILED
+
+    assert_matches_fresh_render(copied_job)
+    assert copied_job.task_status_counts(include_child_jobs=True) == count_statuses(copied_job)[0]
+    assert (job.child_jobs[0].ci_task_list(), job.child_ci_job_tree()) == (task_list, tree)
+
+
+@pytest.mark.parametrize('copy_job', [copy.deepcopy, lambda job: pickle.loads(pickle.dumps(job))])
+def test_copied_job_leaves_out_the_jobs_above_it(copy_job):
+    job = build_sample_job()
+    tree = job.child_ci_job_tree()
+    copied_job = copy_job(job.child_jobs[1])
+
+    copied_job.tasks[0].metadata.status = ci.CIStatus.FAILED
+
+    assert not list(copied_job._iter_ancestors())
+    assert copied_job.task_status_counts() == {ci.CIStatus.FAILED: 1, ci.CIStatus.SUCCEEDED: 1}
+    assert copied_job.ci_task_list() == ci.CIJob(copied_job.metadata, [ci.CITask(task.metadata)
+                                                                       for task in copied_job.tasks]).ci_task_list()
+    assert job.child_ci_job_tree() == tree
+
+
+def test_replaced_metadata_no_longer_changes_task():
+    task = ci.CITask(ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'task'))
+    job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.SUCCEEDED, 'job'), [task])
+    old_metadata = task.metadata
+    task.update(status=ci.CIStatus.FAILED)
+    task_list = job.ci_task_list()
+
+    old_metadata.name = 'renamed task'
+
+    assert job.ci_task_list() == task_list
+    assert job.task_status_counts() == {ci.CIStatus.FAILED: 1}
+
+
+def test_task_and_job_in_two_jobs():
+    task = ci.CITask(ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'shared task'))
+    shared_job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.SUCCEEDED, 'shared job'), [task])
+    first_job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.SUCCEEDED, 'first job'), [task], [shared_job])
+    second_job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.SUCCEEDED, 'second job'), [], [shared_job])
+    first_tree, second_tree = first_job.child_ci_job_tree(), second_job.child_ci_job_tree()
+    first_task_list = first_job.ci_task_list()
+
+    task.update(status=ci.CIStatus.FAILED)
+    shared_job.update(status=ci.CIStatus.FAILED)
+
+    assert first_job.ci_task_list() == first_task_list.replace(ci.CIStatus.SUCCEEDED.value, ci.CIStatus.FAILED.value)
+    assert first_job.child_ci_job_tree() == first_tree.replace(ci.CIStatus.SUCCEEDED.value, ci.CIStatus.FAILED.value)
+    assert second_job.child_ci_job_tree() == second_tree.replace(ci.CIStatus.SUCCEEDED.value, ci.CIStatus.FAILED.value)
+    for job in (first_job, second_job):
+        assert (job.task_status_counts(include_child_jobs=True), job.job_status_counts(include_child_jobs=True)) == \
+            count_statuses(job)
+
+
+nested_job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.FAILED, 'pipeline'), [], [
+    ci.CIJob(ci.CIJobMetadata(ci.CIStatus.FAILED, 'build'), [
+        ci.CITask(ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'compile', info='additional info')),
+    ], [
+        ci.CIJob(ci.CIJobMetadata(ci.CIStatus.SUCCEEDED, 'linux'), [
+            ci.CITask(ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'gcc', info='additional info')),
+        ]),
+        ci.CIJob(ci.CIJobMetadata(ci.CIStatus.FAILED, 'windows'), [
+            ci.CITask(ci.CITaskMetadata(ci.CIStatus.FAILED, 'msvc', info='additional info')),
+        ]),
+    ]),
+    ci.CIJob(ci.CIJobMetadata(ci.CIStatus.SUCCEEDED, 'docs'), [
+        ci.CITask(ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'sphinx')),
+    ]),
+])
+
+
+@pytest.mark.parametrize('status, collapse_succeeded, expected', [
+    [
+        None,
+        False,
+        f'<pre><code>{ci.CIStatus.FAILED.value} {TREE_CONTINUE_MARKER} build\n'
+        f'{ci.CIStatus.SUCCEEDED.value} {TREE_MORE_JOBS_MARKER}\t{TREE_CONTINUE_MARKER} compile   additional info\n'
+        f'{ci.CIStatus.SUCCEEDED.value} {TREE_MORE_JOBS_MARKER}\t{TREE_CONTINUE_MARKER} linux\n'
+        f'{ci.CIStatus.SUCCEEDED.value} {TREE_MORE_JOBS_MARKER}\t{TREE_MORE_JOBS_MARKER}\t{TREE_END_MARKER} gcc   '
+        'additional info\n'
+        f'{ci.CIStatus.FAILED.value} {TREE_MORE_JOBS_MARKER}\t{TREE_END_MARKER} windows\n'
+        f'{ci.CIStatus.FAILED.value} {TREE_MORE_JOBS_MARKER}\t \t{TREE_END_MARKER} msvc   additional info\n'
+        f'{ci.CIStatus.SUCCEEDED.value} {TREE_END_MARKER} docs\n'
+        f'{ci.CIStatus.SUCCEEDED.value}  \t{TREE_END_MARKER} sphinx</code></pre>'
+    ],
+    [
+        None,
+        True,
+        f'<pre><code>{ci.CIStatus.FAILED.value} {TREE_CONTINUE_MARKER} build\n'
+        f'{ci.CIStatus.SUCCEEDED.value} {TREE_MORE_JOBS_MARKER}\t{TREE_CONTINUE_MARKER} compile   additional info\n'
+        f'{ci.CIStatus.SUCCEEDED.value} {TREE_MORE_JOBS_MARKER}\t{TREE_CONTINUE_MARKER} linux\n'
+        f'{ci.CIStatus.FAILED.value} {TREE_MORE_JOBS_MARKER}\t{TREE_END_MARKER} windows\n'
+        f'{ci.CIStatus.FAILED.value} {TREE_MORE_JOBS_MARKER}\t \t{TREE_END_MARKER} msvc   additional info\n'
+        f'{ci.CIStatus.SUCCEEDED.value} {TREE_END_MARKER} docs</code></pre>'
+    ],
+    [
+        ci.CIStatus.FAILED,
+        False,
+        f'<pre><code>{ci.CIStatus.FAILED.value} {TREE_END_MARKER} build\n'
+        f'{ci.CIStatus.FAILED.value}  \t{TREE_END_MARKER} windows\n'
+        f'{ci.CIStatus.FAILED.value}  \t \t{TREE_END_MARKER} msvc   additional info</code></pre>'
+    ],
+])
+def test_child_ci_job_tree_full_depth(status, collapse_succeeded, expected):
+    assert nested_job.child_ci_job_tree(status, max_depth=None, collapse_succeeded=collapse_succeeded) == expected
+
+
+def test_child_ci_job_tree_max_depth():
+    assert nested_job.child_ci_job_tree() == (
+        f'<pre><code>{ci.CIStatus.FAILED.value} {TREE_CONTINUE_MARKER} build\n'
+        f'{ci.CIStatus.SUCCEEDED.value} {TREE_MORE_JOBS_MARKER}\t{TREE_END_MARKER} compile   additional info\n'
+        f'{ci.CIStatus.SUCCEEDED.value} {TREE_END_MARKER} docs\n'
+        f'{ci.CIStatus.SUCCEEDED.value}  \t{TREE_END_MARKER} sphinx</code></pre>'
+    )
+
+
+def test_child_ci_job_tree_deep_hierarchy():
+    # Build the hierarchy from the bottom up, so each job is created with its only child job.
+    job = None
+    for depth in reversed(range(sys.getrecursionlimit() + 100)):
+        job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.SUCCEEDED, f'job {depth}'), [], [job] if job else None)
+    job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.SUCCEEDED, 'root'), [], [job])
+
+    lines = job.child_ci_job_tree(max_depth=None).split('\n')
+
+    assert len(lines) == sys.getrecursionlimit() + 100
+    assert lines[-1].endswith(f'{TREE_END_MARKER} job {sys.getrecursionlimit() + 99}</code></pre>')
+    # The tree prefix of the deepest job is thousands of characters long, but it is not stored in the cached lines.
+    deepest_job = job
+    while deepest_job.child_jobs:
+        deepest_job = deepest_job.child_jobs[0]
+    assert deepest_job._unprefixed_tree_lines(None, True, True, False) == \
+        [f'{ci.CIStatus.SUCCEEDED.value} {TREE_END_MARKER} job {sys.getrecursionlimit() + 99}']
+    assert job.child_ci_job_tree(max_depth=None, collapse_succeeded=True) == \
+        f'<pre><code>{ci.CIStatus.SUCCEEDED.value} {TREE_END_MARKER} job 0</code></pre>'
+
+
+def count_statuses(job):
+    task_counts, job_counts = {}, {}
+    stack = [(job, True)]
+    while stack:
+        current_job, is_root = stack.pop()
+        if not is_root:
+            job_counts[current_job.metadata.status] = job_counts.get(current_job.metadata.status, 0) + 1
+        for task in current_job.tasks:
+            task_counts[task.metadata.status] = task_counts.get(task.metadata.status, 0) + 1
+        stack.extend((child_job, False) for child_job in current_job.child_jobs or [])
+
+    return task_counts, job_counts
+
+
+def test_status_counts():
+    assert sample_job.task_status_counts() == {ci.CIStatus.SUCCEEDED: 2}
+    assert sample_job.task_status_counts(include_child_jobs=True) == {ci.CIStatus.SUCCEEDED: 5, ci.CIStatus.FAILED: 2}
+    assert sample_job.job_status_counts() == {ci.CIStatus.SUCCEEDED: 1, ci.CIStatus.FAILED: 1}
+    assert sample_job.child_jobs[1].tasks_with_status(ci.CIStatus.FAILED) == [
+        sample_job.child_jobs[1].tasks[1], sample_job.child_jobs[1].tasks[3]
+    ]
+    assert sample_job.child_jobs_with_status(ci.CIStatus.SUCCEEDED) == [sample_job.child_jobs[0]]
+
+
+def test_status_summary():
+    assert sample_job.status_summary() == f'{ci.CIStatus.SUCCEEDED.value} 5 succeeded, {ci.CIStatus.FAILED.value} 2 failed'
+    assert sample_job.status_summary(include_child_jobs=False) == f'{ci.CIStatus.SUCCEEDED.value} 2 succeeded'
+
+
+def test_in_progress_statuses():
+    tasks = [ci.CITaskMetadata(ci.CIStatus.RUNNING, 'build', 90),
+             ci.CITaskMetadata(ci.CIStatus.PENDING, 'test', info='queued'),
+             ci.CITaskMetadata(ci.CIStatus.SKIPPED, 'deploy', info='not on main')]
+    job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.RUNNING, 'pipeline'), [ci.CITask(metadata) for metadata in tasks])
+
+    assert job.ci_task_list() == '<pre><code>⏳  build <strong>(1m 30s)</strong>\n' \
+        f'⬜  test{" " * 13}queued\n' \
+        f'⏭️  deploy{" " * 11}not on main</code></pre>'
+    assert job.status_summary() == '⏳ 1 running, ⬜ 1 pending, ⏭️ 1 skipped'
+    assert ci.CIJob(job.metadata, ci.CITaskBatch(tasks)).ci_task_list() == job.ci_task_list()
+
+
+def test_status_counts_kept_up_to_date():
+    job = ci.CIJob(nested_job.metadata, [], [build_sample_job(), build_sample_job()])
+
+    job.child_jobs[0].child_jobs[1].tasks[0].update(status=ci.CIStatus.FAILED)
+    job.child_jobs[1].child_jobs[0].update(status=ci.CIStatus.FAILED)
+    job.child_jobs[1].add_task(ci.CITask(ci.CITaskMetadata(ci.CIStatus.FAILED, 'new task')))
+    job.child_jobs[0].add_child_job(build_sample_job())
+    task = job.child_jobs[0].child_jobs[0].tasks[0]
+    task.metadata = replace(task.metadata, status=ci.CIStatus.FAILED)
+
+    task_counts, job_counts = count_statuses(job)
+    assert job.task_status_counts(include_child_jobs=True) == task_counts
+    assert job.job_status_counts(include_child_jobs=True) == job_counts
+    assert job.child_jobs[1].tasks_with_status(ci.CIStatus.FAILED) == [job.child_jobs[1].tasks[1]]
+    assert job.child_jobs[1].child_jobs_with_status(ci.CIStatus.FAILED) == [job.child_jobs[1].child_jobs[0]]
+    assert job.child_jobs[1].child_ci_job_tree(ci.CIStatus.FAILED) == (
+        f'<pre><code>{ci.CIStatus.FAILED.value} {TREE_END_MARKER} first child job</code></pre>'
+    )
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_status_counts_after_mixed_adds_and_updates(seed):
+    rng = random.Random(seed)
+    job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.RUNNING, 'pipeline'), [])
+    jobs = [job]
+    link = job._link
+
+    for index in range(200):
+        target = rng.choice(jobs)
+        action = rng.random()
+        if action < 0.4:
+            target.add_task(ci.CITask(ci.CITaskMetadata(rng.choice(list(ci.CIStatus)), f'task {index}')))
+        elif action < 0.6:
+            child_job = ci.CIJob(ci.CIJobMetadata(rng.choice(list(ci.CIStatus)), f'job {index}'),
+                                 [ci.CITask(ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, f'first task {index}'))])
+            target.add_child_job(child_job)
+            jobs.append(child_job)
+        elif action < 0.8 and target.tasks:
+            rng.choice(target.tasks).update(status=rng.choice(list(ci.CIStatus)))
+        else:
+            target.update(status=rng.choice(list(ci.CIStatus)))
+
+        # Read the counts, indexes and output now and then, so later adds have to keep them up to date.
+        if rng.random() < 0.2:
+            target.task_status_counts()
+            target.job_status_counts()
+            job.task_status_counts(include_child_jobs=True)
+            job.child_ci_job_tree()
+
+    # Adding tasks and jobs does not link and count every task again.
+    assert job._link is link
+    task_counts, job_counts = count_statuses(job)
+    assert job.task_status_counts(include_child_jobs=True) == task_counts
+    assert job.job_status_counts(include_child_jobs=True) == job_counts
+    for current_job in jobs:
+        for status in ci.CIStatus:
+            assert current_job.tasks_with_status(status) == \
+                [task for task in current_job.tasks if task.metadata.status == status]
+            assert current_job.child_jobs_with_status(status) == \
+                [child_job for child_job in current_job.child_jobs or [] if child_job.metadata.status == status]
+    assert_matches_fresh_render(job)
+
+
+def test_added_tasks_keep_output_cut_short_aligned():
+    job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.RUNNING, 'job'), [])
+    batch_job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.RUNNING, 'batch job'), ci.CITaskBatch())
+    pipeline = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.RUNNING, 'pipeline'), [], [job, batch_job])
+
+    for index, name in enumerate(['a', 'a much longer name', ':x: <b>', 'b']):
+        for current_job in [job, batch_job]:
+            current_job.add_task(ci.CITask(ci.CITaskMetadata([ci.CIStatus.SUCCEEDED, ci.CIStatus.FAILED][index % 2], name, 5,
+                                                             'info')))
+
+        fresh_pipeline = ci.CIJob(pipeline.metadata, [], [
+            ci.CIJob(child_job.metadata, [ci.CITask(task.metadata) for task in child_job.tasks])
+            for child_job in pipeline.child_jobs
+        ])
+        # The width of the widest task is kept for each status and display setting as tasks are added.
+        for display_setting in [autoescape(False), autoescape(), autoexpand_shortcodes()]:
+            with display_setting:
+                for status in [None, ci.CIStatus.SUCCEEDED]:
+                    assert pipeline.child_ci_job_tree(status, max_length=300) == \
+                        fresh_pipeline.child_ci_job_tree(status, max_length=300)
+                    for child_job, fresh_child_job in zip(pipeline.child_jobs, fresh_pipeline.child_jobs):
+                        assert child_job.ci_task_list(status, max_length=300) == \
+                            fresh_child_job.ci_task_list(status, max_length=300)
+
+
+def test_metadata_duration_is_kept_as_given():
+    metadata = ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'task', 90)
+
+    assert sample_job.tasks[1].metadata.duration == '1m 29s'
+    assert sample_job.tasks[1].metadata.duration_value == Duration(89)
+    assert metadata.duration == 90
+    assert metadata.duration_value == Duration.parse('1m 30s')
+    assert ci.CITask(metadata).build_task_string() == f'{ci.CIStatus.SUCCEEDED.value}  task {bold("(1m 30s)")}'
+    assert ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'task', '').duration_value is None
+    assert ci.CIJobMetadata(ci.CIStatus.SUCCEEDED, 'job', '25m').duration == '25m'
+
+
+@pytest.mark.parametrize('text', ['2 min', '00:25:37', 'N/A', 'a while'])
+def test_metadata_duration_that_is_not_a_duration(text):
+    task = ci.CITask(ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'task', text))
+
+    assert task.metadata.duration == text
+    assert task.metadata.duration_value == Duration(None, text)
+    assert task.build_task_string() == f'{ci.CIStatus.SUCCEEDED.value}  task {bold(f"({text})")}'
+    assert ci.CITaskBatch([task.metadata]).metadata(0).duration is None
+
+
+def test_total_duration():
+    assert sample_job.total_duration() == Duration.parse('1h 23m 12s')
+
+
+def test_durations_that_are_not_known_are_left_out():
+    job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.SUCCEEDED, 'pipeline', 'N/A'), [
+        ci.CITask(ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'build', '2 min')),
+        ci.CITask(ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'test', '30s')),
+    ], [
+        ci.CIJob(ci.CIJobMetadata(ci.CIStatus.SUCCEEDED, 'deploy', '00:05:00'), [
+            ci.CITask(ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'upload', '10s')),
+        ]),
+    ])
+
+    assert job.total_duration() == Duration(40)
+    assert job.critical_path() == (Duration(40), [job, job.child_jobs[0]])
+    assert [task.metadata.name for task in job.slowest_tasks(5)] == ['test', 'upload']
+
+
+def test_critical_path():
+    job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.SUCCEEDED, 'pipeline', '1m'), [], [
+        ci.CIJob(ci.CIJobMetadata(ci.CIStatus.SUCCEEDED, 'build'), [
+            ci.CITask(ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'compile', '2m')),
+            ci.CITask(ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'link', '1m')),
+        ], [
+            ci.CIJob(ci.CIJobMetadata(ci.CIStatus.SUCCEEDED, 'unit tests', '5m'), []),
+        ]),
+        ci.CIJob(ci.CIJobMetadata(ci.CIStatus.SUCCEEDED, 'docs', '7m'), []),
+    ])
+
+    duration, jobs = job.critical_path()
+
+    assert duration == Duration.parse('9m')
+    assert jobs == [job, job.child_jobs[0], job.child_jobs[0].child_jobs[0]]
+
+
+def test_slowest_tasks():
+    slowest_tasks = sample_job.slowest_tasks(3)
+
+    assert [task.metadata.name for task in slowest_tasks] == ['another failed task', 'second task', 'third task']
+    assert [task.metadata.name for task in sample_job.slowest_tasks(5, ci.CIStatus.FAILED)] == ['another failed task']
+
+
+def test_slowest_task_list():
+    assert sample_job.slowest_task_list(2) == (
+        f'<pre><code>{ci.CIStatus.FAILED.value}  another failed task <strong>(1h 20m)</strong>   additional info\n'
+        f'{ci.CIStatus.SUCCEEDED.value}  second task <strong>(1m 29s)</strong>           additional info</code></pre>'
+    )
+
+
+def test_ci_task_list_aligns_wide_characters():
+    # Each CJK character is displayed two columns wide, so both task names take up four columns.
+    job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.FAILED, 'job'), [
+        ci.CITask(ci.CITaskMetadata(ci.CIStatus.FAILED, '测试', '5s', 'additional info')),
+        ci.CITask(ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'test', '5s', 'additional info')),
+    ])
+
+    assert job.ci_task_list() == (
+        f'<pre><code>{ci.CIStatus.FAILED.value}  测试 <strong>(5s)</strong>   additional info\n'
+        f'{ci.CIStatus.SUCCEEDED.value}  test <strong>(5s)</strong>   additional info</code></pre>'
+    )
+
+
+def test_ci_task_list_expands_shortcodes():
+    job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.FAILED, ':package: job'), [
+        ci.CITask(ci.CITaskMetadata(ci.CIStatus.FAILED, ':lock: test', '5s', ':warning: flaky')),
+        ci.CITask(ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'test', '5s', 'additional info')),
+    ])
+    parent_job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.FAILED, 'pipeline'), [], [job])
+
+    assert ':lock: test' in job.ci_task_list()
+
+    # The emoji is displayed two columns wide, so the first task name takes up seven columns instead of eleven.
+    with autoexpand_shortcodes():
+        assert job.ci_task_list() == (
+            f'<pre><code>{ci.CIStatus.FAILED.value}  🔒 test <strong>(5s)</strong>   ⚠️ flaky\n'
+            f'{ci.CIStatus.SUCCEEDED.value}  test <strong>(5s)</strong>      additional info</code></pre>'
+        )
+        assert parent_job.child_ci_job_tree() == (
+            f'<pre><code>{ci.CIStatus.FAILED.value} {TREE_END_MARKER} 📦 job\n'
+            f'{ci.CIStatus.FAILED.value}  \t{TREE_CONTINUE_MARKER} 🔒 test   ⚠️ flaky\n'
+            f'{ci.CIStatus.SUCCEEDED.value}  \t{TREE_END_MARKER} test      additional info</code></pre>'
+        )
+
+    assert ':lock: test' in job.ci_task_list()
+
+
+def test_fingerprint_matches_fresh_job():
+    job = build_sample_job()
+
+    assert job.fingerprint() == build_sample_job().fingerprint()
+    assert job.tasks[0].fingerprint() == build_sample_job().tasks[0].fingerprint()
+    assert job.child_jobs[1].tasks[0].fingerprint() != job.child_jobs[1].tasks[1].fingerprint()
+    assert job.fingerprint() != job.child_jobs[0].fingerprint()
+
+
+def test_fingerprint_changes_along_path():
+    job = build_sample_job()
+    job.fingerprint()
+    first_child_fingerprint = job.child_jobs[0]._fingerprint
+
+    job.child_jobs[1].tasks[1].update(info='changed info')
+
+    assert job._fingerprint is None
+    assert job.child_jobs[1]._fingerprint is None
+    assert job.child_jobs[0]._fingerprint is first_child_fingerprint
+    assert job.fingerprint() != build_sample_job().fingerprint()
+
+    job.child_jobs[1].tasks[1].update(info=None)
+
+    assert job.fingerprint() == build_sample_job().fingerprint()
+
+
+def test_fingerprint_after_job_changes():
+    job = build_sample_job()
+    fingerprint = job.fingerprint()
+
+    job.child_jobs[0].add_task(ci.CITask(ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'new child task')))
+    assert job.fingerprint() != fingerprint
+
+    fingerprint = job.fingerprint()
+    job.child_jobs[0].tasks[0].metadata = replace(job.child_jobs[0].tasks[0].metadata, duration='11s')
+    assert job.fingerprint() != fingerprint
+
+    fingerprint = job.fingerprint()
+    job.add_child_job(ci.CIJob(ci.CIJobMetadata(ci.CIStatus.FAILED, 'third child job'), []))
+    assert job.fingerprint() != fingerprint
+
+
+def test_fingerprint_moving_a_task_between_jobs():
+    # The same tasks split differently between jobs should not have the same fingerprint.
+    task = ci.CITask(ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'task'))
+    first_job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.SUCCEEDED, 'job'), [task], [
+        ci.CIJob(ci.CIJobMetadata(ci.CIStatus.SUCCEEDED, 'child job'), []),
+    ])
+    second_job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.SUCCEEDED, 'job'), [], [
+        ci.CIJob(ci.CIJobMetadata(ci.CIStatus.SUCCEEDED, 'child job'), [ci.CITask(task.metadata)]),
+    ])
+
+    assert first_job.fingerprint() != second_job.fingerprint()
+
+
+def test_fingerprint_deep_hierarchy():
+    job = None
+    for depth in reversed(range(sys.getrecursionlimit() + 100)):
+        job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.SUCCEEDED, f'job {depth}'), [], [job] if job else None)
+
+    assert len(job.fingerprint()) == 32
+
+
+def test_revision():
+    job = build_sample_job()
+    revisions = [job.revision()]
+
+    job.child_jobs[1].tasks[1].update(info='changed info')
+    revisions.append(job.revision())
+    job.child_jobs[0].add_task(ci.CITask(ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'new child task')))
+    revisions.append(job.revision())
+    job.add_child_job(ci.CIJob(ci.CIJobMetadata(ci.CIStatus.FAILED, 'third child job'), []))
+    revisions.append(job.revision())
+    job.child_jobs[0].update(status=ci.CIStatus.FAILED)
+    revisions.append(job.revision())
+    # Changes made to the lists in place are found as well.
+    job.child_jobs[2].tasks.append(ci.CITask(ci.CITaskMetadata(ci.CIStatus.FAILED, 'appended task')))
+    revisions.append(job.revision())
+
+    assert revisions == sorted(set(revisions))
+    assert job.revision() == revisions[-1]
+    assert job.child_jobs[1].revision() < job.revision()
+
+
+def build_batch_and_list_jobs(seed, task_count=40):
+    rng = random.Random(seed)
+    metadata = [
+        ci.CITaskMetadata(rng.choice(list(ci.CIStatus)),
+                          rng.choice(['test_a', 'test <b>', '测试', 'a & b', 'x', ':lock: test']) + str(index),
+                          rng.choice([None, 5, 90, 0.25, 3725]), rng.choice([None, '', 'see logs', 'a<b>', ':warning: flaky']))
+        for index in range(task_count)
+    ]
+    child_jobs = [ci.CIJob(ci.CIJobMetadata(ci.CIStatus.FAILED, 'child job'), [ci.CITask(metadata[0])])]
+
+    return (ci.CIJob(ci.CIJobMetadata(ci.CIStatus.FAILED, 'job'), ci.CITaskBatch(metadata), [
+        ci.CIJob(ci.CIJobMetadata(ci.CIStatus.FAILED, 'batch job'), ci.CITaskBatch(metadata)),
+    ] + child_jobs), ci.CIJob(ci.CIJobMetadata(ci.CIStatus.FAILED, 'job'), [ci.CITask(task) for task in metadata], [
+        ci.CIJob(ci.CIJobMetadata(ci.CIStatus.FAILED, 'batch job'), [ci.CITask(task) for task in metadata]),
+    ] + child_jobs))
+
+
+def assert_batch_matches_list(batch_job, list_job):
+    for escaping, expanding in [(False, False), (True, False), (False, True), (True, True)]:
+        with autoescape(escaping), autoexpand_shortcodes(expanding):
+            for status in [None, *ci.CIStatus]:
+                assert batch_job.ci_task_list(status) == list_job.ci_task_list(status)
+                assert batch_job.ci_task_list_pages(status, max_length=300) == \
+                    list_job.ci_task_list_pages(status, max_length=300)
+                assert batch_job.child_ci_job_tree(status) == list_job.child_ci_job_tree(status)
+
+            assert batch_job.ci_task_list(max_length=500) == list_job.ci_task_list(max_length=500)
+
+    assert batch_job.task_status_counts() == list_job.task_status_counts()
+    assert batch_job.task_status_counts(include_child_jobs=True) == list_job.task_status_counts(include_child_jobs=True)
+    assert batch_job.total_duration() == list_job.total_duration()
+    assert batch_job.slowest_tasks(5) == list_job.slowest_tasks(5)
+    assert batch_job.tasks_with_status(ci.CIStatus.FAILED) == list_job.tasks_with_status(ci.CIStatus.FAILED)
+    assert batch_job.fingerprint() == list_job.fingerprint()
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_task_batch_matches_task_list(seed):
+    assert_batch_matches_list(*build_batch_and_list_jobs(seed))
+
+
+def test_task_batch_ascii_names():
+    metadata = [ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, f'test_{index}', index, 'info') for index in range(20)]
+    batch_job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.SUCCEEDED, 'job'), ci.CITaskBatch(metadata))
+    list_job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.SUCCEEDED, 'job'), [ci.CITask(task) for task in metadata])
+
+    assert_batch_matches_list(batch_job, list_job)
+
+
+def test_task_batch_ascii_names_with_shortcodes():
+    metadata = [ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, f':lock: test_{index}', index, 'info') for index in range(20)]
+    batch_job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.SUCCEEDED, 'job'), ci.CITaskBatch(metadata))
+    list_job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.SUCCEEDED, 'job'), [ci.CITask(task) for task in metadata])
+
+    assert_batch_matches_list(batch_job, list_job)
+
+
+def test_task_batch_changes():
+    batch_job, list_job = build_batch_and_list_jobs(0)
+    batch_job.child_ci_job_tree()
+    batch_job.ci_task_list(ci.CIStatus.FAILED)
+
+    batch_job.tasks.update(3, status=ci.CIStatus.FAILED, name='a much longer name 测试', duration=None)
+    list_job.tasks[3].update(status=ci.CIStatus.FAILED, name='a much longer name 测试', duration=None)
+    batch_job.child_jobs[0].tasks.update(-1, info='changed info', duration=12)
+    list_job.child_jobs[0].tasks[-1].update(info='changed info', duration=12)
+    batch_job.add_task(ci.CITask(ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'new task', 7)))
+    list_job.add_task(ci.CITask(ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'new task', 7)))
+    batch_job.child_jobs[0].tasks.add(ci.CIStatus.FAILED, 'added task', '1m 5s', 'see logs')
+    list_job.child_jobs[0].add_task(ci.CITask(ci.CITaskMetadata(ci.CIStatus.FAILED, 'added task', '1m 5s', 'see logs')))
+
+    assert_batch_matches_list(batch_job, list_job)
+
+
+def test_task_batch_sequence():
+    metadata = [
+        ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'first', 5, 'info'),
+        ci.CITaskMetadata(ci.CIStatus.FAILED, '测试'),
+    ]
+    batch = ci.CITaskBatch(metadata)
+
+    assert len(batch) == 2
+    assert batch.metadata(-1) == metadata[1]
+    assert batch[0] == ci.CITask(metadata[0])
+    assert list(batch) == [ci.CITask(task) for task in metadata]
+    assert batch.status_counts() == {ci.CIStatus.SUCCEEDED: 1, ci.CIStatus.FAILED: 1}
+    assert batch.total_seconds() == 5
+    assert repr(batch) == 'CITaskBatch(2 tasks)'
+
+    with pytest.raises(IndexError):
+        batch.metadata(2)
+
+
+def test_task_batch_failures():
+    failed = ci.CITaskMetadata(ci.CIStatus.FAILED, 'failed', failure_type='AssertionError', failure_message='1 != 2')
+    batch = ci.CITaskBatch([ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'succeeded'), failed])
+
+    assert batch.metadata(1) == failed
+    assert batch.metadata(0).failure_type is None
+
+    batch.update(1, failure_message=None)
+    batch.update(0, failure_type='TimeoutError')
+
+    assert batch.metadata(1).failure_type == 'AssertionError'
+    assert batch.metadata(1).failure_message is None
+    assert batch.metadata(0).failure_type == 'TimeoutError'
+
+
+def test_task_batch_formats_durations_from_seconds():
+    job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.SUCCEEDED, 'job'), ci.CITaskBatch())
+    job.tasks.add(ci.CIStatus.SUCCEEDED, 'task', '90s')
+
+    assert job.ci_task_list() == f'<pre><code>{ci.CIStatus.SUCCEEDED.value}  task {bold("(1m 30s)")}</code></pre>'
+
+
+def test_models_are_slotted():
+    task = ci.CITask(ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'task', 5))
+
+    for instance in (task, task.metadata, task.metadata.duration, sample_job, sample_job.metadata):
+        assert not hasattr(instance, '__dict__')
+
+    with pytest.raises(AttributeError):
+        task.unknown_attribute = True
+
+
+def test_slotted_models_can_be_pickled():
+    job = pickle.loads(pickle.dumps(sample_job))
+
+    assert job == sample_job
+    assert job.child_ci_job_tree() == sample_job.child_ci_job_tree()
+    assert copy.deepcopy(Duration.parse('1m 5s')).text == '1m 5s'
+
+
+def failed_task(name, failure_type='ConnectionError', failure_message='connection refused'):
+    return ci.CITask(ci.CITaskMetadata(ci.CIStatus.FAILED, name, failure_type=failure_type, failure_message=failure_message))
+
+
+def test_failure_report():
+    job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.FAILED, 'pipeline', failure_type='Infrastructure Failure'), [], [
+        ci.CIJob(ci.CIJobMetadata(ci.CIStatus.FAILED, 'unit'), [
+            failed_task('test_a', 'AssertionError', 'assert <object at 0x7f3a2c1d9e80> == 1'),
+            ci.CITask(ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'test_b')),
+            failed_task('test_c'),
+        ]),
+        ci.CIJob(ci.CIJobMetadata(ci.CIStatus.FAILED, 'integration'), [
+            failed_task('test_d', failure_message='connection  refused\n'),
+            failed_task('test_e', 'AssertionError', 'assert <object at 0x55d1e2f0a4b0> == 1'),
+            failed_task('test_f'),
+        ]),
+    ])
+
+    assert job.failure_report(max_names=2) == (
+        '<details><summary>ConnectionError (3 failures)</summary>\n'
+        '<pre><code>connection refused</code></pre>'
+        '<ul><li>unit: test_c</li><li>integration: test_d</li><li>and 1 more</li></ul></details>\n'
+        '<details><summary>AssertionError (2 failures)</summary>\n'
+        '<pre><code>assert &lt;object at 0x7f3a2c1d9e80&gt; == 1</code></pre>'
+        '<ul><li>unit: test_a</li><li>integration: test_e</li></ul></details>\n'
+        '<details><summary>Infrastructure Failure (1 failure)</summary>\n'
+        '<ul><li>pipeline</li></ul></details>'
+    )
+
+
+def test_failure_report_expands_shortcodes():
+    job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.FAILED, 'job'), [failed_task('test_a', failure_message=':x: <failed>')])
+
+    with autoexpand_shortcodes():
+        assert '<pre><code>❌ &lt;failed&gt;</code></pre>' in job.failure_report()
+
+
+def test_failure_report_with_task_batch():
+    metadata = [task.metadata for task in [failed_task(f'test_{index}') for index in range(3000)]]
+    batch_job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.FAILED, 'job'), ci.CITaskBatch(metadata))
+    list_job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.FAILED, 'job'), [ci.CITask(task) for task in metadata])
+
+    assert batch_job.failure_report() == list_job.failure_report()
+    assert batch_job.failure_report().count('connection refused') == 1
+    assert 'and 2990 more' in batch_job.failure_report()
+
+
+def test_failure_report_max_length():
+    job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.FAILED, 'job'), [
+        failed_task(f'test_{index}', failure_message=f'error {index}') for index in range(20)
+    ])
+
+    report = job.failure_report(max_length=1000)
+
+    assert len(report) <= 1000
+    assert report.endswith(' more failures omitted')
+    assert job.failure_report(max_length=100000) == job.failure_report()
+    assert sample_job.failure_report() == ''
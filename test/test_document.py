@@ -0,0 +1,92 @@
+import io
+
+from githubmarkdownui import ci
+from githubmarkdownui.blocks import leaf, lists, table
+from githubmarkdownui.document import MarkdownDocument
+from githubmarkdownui.emitter import compact_html
+from githubmarkdownui.inline import bold
+from githubmarkdownui.utils import collapsible_section
+from test.test_ci import nested_job, sample_job
+
+
+def test_document_matches_nested_calls():
+    content = [['col1', 'col2'], ['hello', 'world']]
+    html_list = lists.OrderedList(['foo', lists.UnorderedList(['bar'])])
+
+    document = MarkdownDocument().heading('CI Results', 2).add(bold('All done')).table(content)
+    with document.collapsible_section('Jobs'):
+        document.child_ci_job_tree(sample_job, ci.CIStatus.FAILED)
+        with document.collapsible_section('Tasks'):
+            document.ci_task_list(sample_job)
+    document.html_list(html_list).task_list(['foo', 'bar'], [1]).thematic_break()
+
+    assert document.render() == '\n'.join([
+        leaf.heading('CI Results', 2),
+        bold('All done'),
+        table.table(content),
+        collapsible_section('Jobs', '\n'.join([
+            sample_job.child_ci_job_tree(ci.CIStatus.FAILED),
+            collapsible_section('Tasks', sample_job.ci_task_list()),
+        ])),
+        str(html_list),
+        lists.task_list(['foo', 'bar'], [1]),
+        leaf.thematic_break(),
+    ])
+
+
+def test_document_code_block():
+    document = MarkdownDocument().code_block('x = 5', 'python').code_block(iter(['first line', 'second line']))
+
+    assert document.render() == '\n'.join([
+        leaf.code_block('x = 5', 'python'),
+        leaf.code_block('first line\nsecond line'),
+    ])
+
+
+def test_document_ci_job_tree_options():
+    document = MarkdownDocument().child_ci_job_tree(nested_job, max_depth=None, collapse_succeeded=True)
+
+    assert str(document) == nested_job.child_ci_job_tree(max_depth=None, collapse_succeeded=True)
+
+
+def test_document_write():
+    document = MarkdownDocument().heading('hello', 1)
+    with document.collapsible_section('world'):
+        document.add(lambda: iter(['foo', 'bar']))
+    stream = io.StringIO()
+
+    document.write(stream)
+
+    assert stream.getvalue() == '<h1>hello</h1>\n<details><summary>world</summary>\nfoobar</details>'
+
+
+def test_empty_document():
+    assert MarkdownDocument().render() == ''
+
+
+def test_document_table_format():
+    content = [['col1', 'col2'], ['hello', 'world']]
+
+    document = MarkdownDocument().heading('CI Results', 2).table(content, table_format=table.TableFormat.AUTO)
+    with document.collapsible_section('Details'):
+        document.table(content, table_format=table.TableFormat.AUTO)
+
+    assert document.render() == '\n'.join([
+        leaf.heading('CI Results', 2),
+        '',
+        table.table(content, table_format=table.TableFormat.MARKDOWN),
+        '',
+        collapsible_section('Details', table.table(content)),
+    ])
+
+
+def test_document_compact_html():
+    content = [['col1', 'col2'], ['hello', 'world']]
+    html_list = lists.OrderedList(['foo', lists.UnorderedList(['bar'])])
+
+    document = MarkdownDocument().table(content).html_list(html_list)
+    with compact_html():
+        compact_document = document.render()
+
+    assert compact_document == '\n'.join([table.table(content, compact=True), html_list.render(compact=True)])
+    assert document.render() == '\n'.join([table.table(content), str(html_list)])
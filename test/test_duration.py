@@ -0,0 +1,68 @@
+import pytest
+
+from githubmarkdownui.duration import Duration, format_duration
+
+
+@pytest.mark.parametrize('text, seconds', [
+    ['8s', 8],
+    ['1.5s', 1.5],
+    ['250ms', 0.25],
+    ['25m 37s', 25 * 60 + 37],
+    ['1h 20m', 80 * 60],
+    ['1h20m5s', 80 * 60 + 5],
+])
+def test_parse(text, seconds):
+    duration = Duration.parse(text)
+
+    assert duration.seconds == pytest.approx(seconds)
+    assert str(duration) == text
+
+
+@pytest.mark.parametrize('text', ['', 'soon', '5 minutes', '5s later', 'm5s'])
+def test_parse_invalid(text):
+    with pytest.raises(ValueError):
+        Duration.parse(text)
+
+
+@pytest.mark.parametrize('seconds, expected', [
+    [0, '0s'],
+    [0.25, '250ms'],
+    [8, '8s'],
+    [1.234, '1.23s'],
+    [68, '1m 8s'],
+    [80 * 60, '1h 20m'],
+    [3661, '1h 1m 1s'],
+    [0.9999, '1s'],
+    [59.999, '1m'],
+    [3599.999, '1h'],
+])
+def test_format_duration(seconds, expected):
+    assert format_duration(seconds) == expected
+    assert str(Duration(seconds)) == expected
+
+
+def test_duration_ordering_and_sum():
+    assert Duration.parse('1m 8s') > Duration.parse('59s')
+    assert Duration.parse('1m') == Duration(60)
+    assert Duration.parse('1m') + Duration.parse('30s') == Duration(90)
+    assert sorted([Duration(5), Duration.parse('1s'), Duration(3)]) == [Duration(1), Duration(3), Duration(5)]
+    assert sum([Duration(5), Duration.parse('1m')]) == Duration(65)
+    assert sum([], Duration(0)) == Duration(0)
+
+
+def test_from_value():
+    duration = Duration(5)
+
+    assert Duration.from_value(duration) is duration
+    assert Duration.from_value(5) == duration
+    assert Duration.from_value('5s') == duration
+
+
+@pytest.mark.parametrize('text', ['2 min', '00:25:37', 'N/A', ''])
+def test_from_value_that_is_not_a_duration(text):
+    duration = Duration.from_value(text)
+
+    assert duration.seconds is None
+    assert str(duration) == text
+    assert Duration(5) + duration == Duration(5)
+    assert sum([duration, Duration(3)]) == Duration(3)
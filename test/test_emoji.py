@@ -0,0 +1,81 @@
+import subprocess
+import sys
+
+import pytest
+
+from githubmarkdownui.emoji import Emoji, autoexpand_shortcodes, autoexpand_shortcodes_enabled, expand_shortcodes, \
+    shortcode_emoji
+from githubmarkdownui.escape import Markup
+
+
+@pytest.mark.parametrize('text, expected', [
+    ['test_case', 'test_case'],
+    [':x: test_case', '❌ test_case'],
+    [':white_check_mark::warning:', '✅⚠️'],
+    [':+1: :-1:', '👍 👎'],
+    [':one: :us: :t-rex:', '1️⃣ 🇺🇸 🦖'],
+    [':man_technologist: :pirate_flag:', '👨\u200d💻 🏴\u200d☠️'],
+    # Only the shortcodes used by GitHub are expanded, not the Unicode names of emojis.
+    [':cross_mark:', ':cross_mark:'],
+    [':not_a_shortcode: :X:', ':not_a_shortcode: :X:'],
+    ['started at 12:30:45', 'started at 12:30:45'],
+    ['::x::', ':❌:'],
+    # The closing colon of an unknown shortcode can open the next one, but that of a known shortcode cannot.
+    [':foo:x:', ':foo❌'],
+    [':12:30:x: :x:x:', ':12:30❌ ❌x:'],
+    [':x::x::x:', '❌❌❌'],
+])
+def test_expand_shortcodes(text, expected):
+    assert expand_shortcodes(text) == expected
+
+
+def test_expand_shortcodes_markup():
+    expanded = expand_shortcodes(Markup('<strong>:x:</strong>'))
+
+    assert expanded == '<strong>❌</strong>'
+    assert isinstance(expanded, Markup)
+
+
+def test_shortcode_emoji():
+    assert shortcode_emoji('hourglass_flowing_sand') == Emoji.HOURGLASS.value
+    assert shortcode_emoji('lock') == Emoji.LOCK.value
+    assert shortcode_emoji('hash') == '#️⃣'
+    assert shortcode_emoji(':lock:') is None
+
+
+def test_every_emoji_has_a_shortcode():
+    shortcodes = {
+        Emoji.X: 'x',
+        Emoji.WARNING: 'warning',
+        Emoji.CHECK_MARK: 'white_check_mark',
+        Emoji.SQUARE: 'white_large_square',
+        Emoji.HOURGLASS: 'hourglass_flowing_sand',
+        Emoji.NEXT_TRACK: 'next_track_button',
+        Emoji.INFORMATION: 'information_source',
+        Emoji.PAGE: 'page_facing_up',
+        Emoji.LOCK: 'lock',
+        Emoji.KEY: 'key',
+    }
+
+    assert {emoji: shortcode_emoji(shortcode) for emoji, shortcode in shortcodes.items()} == \
+        {emoji: emoji.value for emoji in Emoji}
+
+
+def test_shortcodes_are_loaded_lazily():
+    code = 'import githubmarkdownui.ci, githubmarkdownui.emoji as emoji; print(emoji._shortcodes.cache_info().currsize)'
+
+    assert subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout == '0\n'
+
+
+def test_autoexpand_shortcodes():
+    assert not autoexpand_shortcodes_enabled()
+
+    with autoexpand_shortcodes():
+        assert autoexpand_shortcodes_enabled()
+
+        with autoexpand_shortcodes(False):
+            assert not autoexpand_shortcodes_enabled()
+
+        assert autoexpand_shortcodes_enabled()
+
+    assert not autoexpand_shortcodes_enabled()
@@ -0,0 +1,172 @@
+import io
+
+import pytest
+
+from githubmarkdownui import ci, inline, utils
+from githubmarkdownui.blocks import leaf, lists, table
+from githubmarkdownui.escape import Markup, autoescape, autoescape_enabled, escape, escape_if_enabled, escape_rows
+
+
+class HtmlObject:
+    def __html__(self):
+        return '<b>trusted</b>'
+
+
+@pytest.mark.parametrize('text, expected', [
+    ['test_case', 'test_case'],
+    ['a < b & c > d', 'a &lt; b &amp; c &gt; d'],
+    ['"quoted" \'text\'', '&quot;quoted&quot; &#39;text&#39;'],
+    ['a | b', 'a &#124; b'],
+    [42, '42'],
+    [Markup('<strong>bold</strong>'), '<strong>bold</strong>'],
+    [HtmlObject(), '<b>trusted</b>'],
+])
+def test_escape(text, expected):
+    escaped = escape(text)
+
+    assert escaped == expected
+    assert isinstance(escaped, Markup)
+
+
+def test_escape_does_not_escape_twice():
+    assert escape(escape('<tag>')) == '&lt;tag&gt;'
+
+
+@pytest.mark.parametrize('combined, expected', [
+    [lambda: Markup('<b>a</b>') + ' <i>', '<b>a</b> &lt;i&gt;'],
+    [lambda: '<i> ' + Markup('<b>a</b>'), '&lt;i&gt; <b>a</b>'],
+    [lambda: Markup('<b>a</b>') + Markup('<i>b</i>'), '<b>a</b><i>b</i>'],
+    [lambda: Markup('<b>a</b>') + HtmlObject(), '<b>a</b><b>trusted</b>'],
+    [lambda: Markup('<br>').join(['a&b', Markup('<i>c</i>')]), 'a&amp;b<br><i>c</i>'],
+    [lambda: Markup('<td>{}</td><td>{name}</td>').format('a<b', name=Markup('<i>c</i>')), '<td>a&lt;b</td><td><i>c</i></td>'],
+    [lambda: Markup('<td>{:>4}|{:.1f}</td>').format('<', 1.25), '<td>   &lt;|1.2</td>'],
+])
+def test_markup_operations_escape_strings(combined, expected):
+    with autoescape():
+        result = combined()
+
+    assert result == expected
+    assert isinstance(result, Markup)
+
+
+def test_markup_operations_leave_html_when_autoescape_is_off():
+    assert inline.bold('a') + '<br>' == '<strong>a</strong><br>'
+    assert '<hr>\n' + inline.bold('a') == '<hr>\n<strong>a</strong>'
+    assert table.table([['a', 'b'], ['1', '2']]) + '\n<hr>' == \
+        '<table><thead><tr><th>a</th><th>b</th></tr></thead><tbody><tr><td>1</td><td>2</td></tr></tbody></table>\n<hr>'
+    assert Markup('<br>').join(['<i>a</i>', 'b']) == '<i>a</i><br>b'
+    assert Markup('<td>{}</td>').format('<i>a</i>') == '<td><i>a</i></td>'
+    assert isinstance(inline.bold('a') + '<br>', Markup)
+
+
+def test_markup_operations_with_other_types():
+    with pytest.raises(TypeError):
+        Markup('a') + 1
+
+    assert ['a'] + [Markup('b')] == ['a', 'b']
+
+
+def test_autoescape():
+    assert not autoescape_enabled()
+    assert escape_if_enabled('<tag>') == '<tag>'
+
+    with autoescape():
+        assert escape_if_enabled('<tag>') == '&lt;tag&gt;'
+
+        with autoescape(False):
+            assert not autoescape_enabled()
+
+        assert autoescape_enabled()
+
+    assert not autoescape_enabled()
+
+
+def test_escape_rows():
+    rows = [['test', 'passed']] * 2000 + [['a<b', 1]] + [['test', 'passed']] * 10
+
+    escaped_rows = list(escape_rows(iter(rows)))
+
+    assert escaped_rows == [[escape(cell) for cell in row] for row in rows]
+    # Batches with nothing to escape are passed through as is.
+    assert escaped_rows[0] is rows[0]
+
+
+def test_escape_rows_finds_each_dirty_row_in_a_batch():
+    rows = [['a', 'b'], [], ['c&', '>d'], ['e', 'f'], 'g|h', ['', '"'], ['i', 'j', "'"], ['k', 'l']]
+
+    assert list(escape_rows(rows)) == [['a', 'b'], [], ['c&amp;', '&gt;d'], ['e', 'f'], 'g|h', ['', '&quot;'],
+                                       ['i', 'j', '&#39;'], ['k', 'l']]
+
+
+def test_escape_rows_leaves_string_rows():
+    rows = [['a<b', 'c'], 'd<e', b'f<g', [1, '<']]
+
+    assert list(escape_rows(rows)) == [['a&lt;b', 'c'], 'd<e', b'f<g', ['1', '&lt;']]
+
+
+def test_inline_functions_return_markup():
+    assert isinstance(inline.bold('text'), Markup)
+
+    with autoescape():
+        assert inline.bold('a<b') == '<strong>a&lt;b</strong>'
+        assert inline.link('a<b', 'https://example.com/?a=1&b=2') == \
+            '<a href="https://example.com/?a=1&amp;b=2">a&lt;b</a>'
+        assert inline.bold(inline.italics('a<b')) == '<strong><em>a&lt;b</em></strong>'
+        assert leaf.heading('a<b', 1) == '<h1>a&lt;b</h1>'
+        assert utils.collapsible_section('a<b', inline.bold('text')) == \
+            '<details><summary>a&lt;b</summary>\n<strong>text</strong></details>'
+
+
+def test_table_autoescape():
+    content = [['test', 'result'], ['test_a<b>', inline.bold('passed')], ['a | b', 'failed']]
+    expected = (
+        '<table><thead><tr><th>test</th><th>result</th></tr></thead><tbody><tr><td>test_a&lt;b&gt;</td>'
+        '<td><strong>passed</strong></td></tr><tr><td>a &#124; b</td><td>failed</td></tr></tbody></table>'
+    )
+
+    with autoescape():
+        assert table.table(content) == expected
+        assert table.table_from_columns({'test': ['test_a<b>', 'a | b'], 'result': [inline.bold('passed'), 'failed']}) == \
+            expected
+
+        stream = io.StringIO()
+        with table.TableWriter(stream, content[0]) as writer:
+            writer.write_rows(content[1:])
+
+        assert stream.getvalue() == expected
+
+    assert '<td>test_a<b></td>' in table.table(content)
+
+
+def test_lists_autoescape():
+    with autoescape():
+        assert str(lists.UnorderedList(['a<b', lists.OrderedList(['c&d'])])) == \
+            '<ul><li>a&lt;b</li><ol><li>c&amp;d</li></ol></ul>'
+        assert lists.task_list([('a<b', True)]) == '- [x] a&lt;b'
+        # The output is not escaped again when it is combined with other markup.
+        assert lists.task_list([('a<b', True)]) + Markup('<br>') == '- [x] a&lt;b<br>'
+        assert leaf.heading('tasks', 2) + lists.task_list(['c&d']) == '<h2>tasks</h2>- [ ] c&amp;d'
+        assert lists.UnorderedList(['a<b']).render(max_length=100) + Markup('<br>') == '<ul><li>a&lt;b</li></ul><br>'
+        assert [page + Markup('<br>') for page in lists.OrderedList(['a<b', 'c']).pages(40)] == \
+            ['<ol><li>a&lt;b</li></ol><br>', '<ol start="2"><li>c</li></ol><br>']
+
+
+def test_ci_autoescape():
+    job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.FAILED, 'job'), [], [
+        ci.CIJob(ci.CIJobMetadata(ci.CIStatus.FAILED, 'child <job>'), [
+            ci.CITask(ci.CITaskMetadata(ci.CIStatus.FAILED, 'test_a<b>', '5s', 'expected <1>')),
+            ci.CITask(ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'test_c', '5s')),
+        ]),
+    ])
+    task_list = job.child_jobs[0].ci_task_list()
+
+    with autoescape():
+        assert job.child_jobs[0].ci_task_list() == (
+            f'<pre><code>{ci.CIStatus.FAILED.value}  test_a&lt;b&gt; <strong>(5s)</strong>   expected &lt;1&gt;\n'
+            f'{ci.CIStatus.SUCCEEDED.value}  test_c <strong>(5s)</strong>   </code></pre>'
+        )
+        assert 'child &lt;job&gt;' in job.child_ci_job_tree()
+
+    # The output cached without autoescaping is not replaced by the escaped output.
+    assert job.child_jobs[0].ci_task_list() == task_list
+    assert 'child <job>' in job.child_ci_job_tree()
@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from githubmarkdownui.ci import CIStatus, CITaskMetadata
+from githubmarkdownui.duration import Duration
+from githubmarkdownui.fingerprint import fingerprint, fingerprint_values, iter_dataclass_values
+
+
+def test_fingerprint_is_hex():
+    assert len(fingerprint('hello')) == 32
+    assert int(fingerprint('hello'), 16) >= 0
+
+
+def test_fingerprint_is_stable():
+    # The fingerprint must never change between releases or Python versions, or bots would post every comment again.
+    assert fingerprint('hello', 1, 1.5, None, True, CIStatus.FAILED, Duration.parse('25m 37s')) == \
+        '9f50f4dadd21457017614985b171fe0c'
+
+
+def test_fingerprint_is_the_same_in_every_process():
+    script = 'from githubmarkdownui.fingerprint import fingerprint; print(fingerprint("hello", 1.5, None))'
+    outputs = {
+        subprocess.run([sys.executable, '-c', script], env={**os.environ, 'PYTHONHASHSEED': seed}, check=True,
+                       stdout=subprocess.PIPE, universal_newlines=True).stdout.strip()
+        for seed in ('1', '2')
+    }
+
+    assert outputs == {fingerprint('hello', 1.5, None)}
+
+
+@pytest.mark.parametrize('first, second', [
+    [('ab', 'c'), ('a', 'bc')],
+    [('1',), (1,)],
+    [(1,), (1.0,)],
+    [(1,), (True,)],
+    [(None,), ('None',)],
+    [('',), ()],
+    [(CIStatus.FAILED,), ('CIStatus.FAILED',)],
+    [(Duration(90),), (Duration.parse('90s'),)],
+])
+def test_fingerprint_tells_values_apart(first, second):
+    assert fingerprint(*first) != fingerprint(*second)
+
+
+def test_fingerprint_values_from_generator():
+    assert fingerprint_values(str(index) for index in range(5000)) == fingerprint(*[str(index) for index in range(5000)])
+
+
+def test_iter_dataclass_values_leaves_out_unset_fields():
+    assert list(iter_dataclass_values(CITaskMetadata(CIStatus.FAILED, 'task', info='info'))) == \
+        ['status', CIStatus.FAILED, 'name', 'task', 'info', 'info']
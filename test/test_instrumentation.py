@@ -0,0 +1,117 @@
+import sys
+
+import pytest
+
+from githubmarkdownui.blocks import leaf, lists, table
+from githubmarkdownui.document import MarkdownDocument
+from githubmarkdownui.instrumentation import BlockStats, current_label, instrument, label
+from githubmarkdownui.utils import collapsible_section
+from test.test_ci import sample_job
+
+content = [['col1', 'col2'], ['hello', 'world']]
+
+
+def test_nothing_recorded_outside_instrument():
+    table.table(content)
+
+    with instrument() as stats:
+        pass
+
+    table.table(content)
+    assert stats.blocks == {}
+
+
+def test_instrument_records_blocks():
+    with instrument() as stats:
+        rendered_table = table.table(content)
+        table.table(content)
+        rendered_code_block = leaf.code_block('print()')
+        rendered_list = str(lists.UnorderedList(['foo', 'bar']))
+
+    assert set(stats.blocks) == {('table', ''), ('code_block', ''), ('html_list', '')}
+    assert stats.blocks['table', ''].calls == 2
+    assert stats.blocks['table', ''].characters == 2 * len(rendered_table)
+    assert stats.blocks['code_block', ''].characters == len(rendered_code_block)
+    assert stats.blocks['html_list', ''].characters == len(rendered_list)
+    assert stats.blocks['table', ''].seconds > 0
+    assert stats.blocks['table', ''].peak_bytes == 0
+
+
+def test_instrument_records_pages():
+    with instrument() as stats:
+        pages = table.table_pages(content, max_length=1000)
+
+    assert stats.blocks['table_pages', ''].characters == sum(map(len, pages))
+
+
+def test_nested_renderers_recorded_once():
+    with instrument() as stats:
+        task_list = sample_job.ci_task_list()
+        collapsible_section('Tasks', task_list)
+
+    assert set(stats.blocks) == {('ci_task_list', ''), ('collapsible_section', '')}
+    assert stats.blocks['ci_task_list', ''].characters == len(task_list)
+
+
+def test_label():
+    assert current_label() == ''
+
+    with instrument() as stats:
+        with label('results'):
+            assert current_label() == 'results'
+            table.table(content)
+        table.table(content)
+
+    assert stats.blocks['table', 'results'].calls == 1
+    assert stats.blocks['table', ''].calls == 1
+    assert current_label() == ''
+
+
+def test_callback_and_as_dict():
+    calls = []
+
+    with instrument(callback=lambda block_type, name, block_stats: calls.append((block_type, name, block_stats))) as stats:
+        with label('results'):
+            rendered_table = table.table(content)
+
+    assert len(calls) == 1
+    assert calls[0][:2] == ('table', 'results')
+    assert calls[0][2].calls == 1
+    assert calls[0][2].characters == len(rendered_table)
+    assert stats.as_dict() == {'table': {'results': {
+        'calls': 1,
+        'seconds': stats.blocks['table', 'results'].seconds,
+        'characters': len(rendered_table),
+        'peak_bytes': 0,
+    }}}
+
+
+def test_document_blocks_recorded():
+    document = MarkdownDocument().heading('CI Results', 2).table(content)
+    with label('jobs'):
+        with document.collapsible_section('Jobs'):
+            document.ci_task_list(sample_job)
+
+    with instrument() as stats:
+        rendered = document.render()
+
+    assert set(stats.blocks) == {('heading', ''), ('table', ''), ('collapsible_section', 'jobs'),
+                                 ('ci_task_list', 'jobs')}
+    assert stats.blocks['table', ''].characters == len(table.table(content))
+    assert stats.blocks['ci_task_list', 'jobs'].characters == len(sample_job.ci_task_list())
+    assert sum(block_stats.characters for (block_type, _), block_stats in stats.blocks.items()
+               if block_type != 'ci_task_list') == len(rendered) - 2
+
+
+@pytest.mark.skipif(sys.version_info < (3, 9), reason='Tracing memory requires Python 3.9 or later')
+def test_trace_memory():
+    rows = [content[0]] + [[f'row {index}', 'value'] for index in range(1000)]
+
+    with instrument(trace_memory=True) as stats:
+        rendered_table = table.table(rows)
+
+    assert stats.blocks['table', ''].peak_bytes >= len(rendered_table)
+
+
+def test_block_stats_defaults():
+    assert BlockStats() == BlockStats(0, 0, 0, 0)
@@ -0,0 +1,145 @@
+from io import BytesIO
+
+import pytest
+
+from githubmarkdownui import ci
+from githubmarkdownui.duration import Duration
+from githubmarkdownui.junit import parse_junit_xml
+
+report = b'''<?xml version="1.0" encoding="utf-8"?>
+<testsuites name="pytest" time="12.5">
+    <testsuite name="unit" time="2.5">
+        <properties><property name="python" value="3.11"/></properties>
+        <testcase classname="test.test_ci" name="test_add_task" time="0.5"/>
+        <testcase classname="test.test_ci" name="test_update" time="1.5">
+            <failure type="AssertionError" message="assert 1 == 2">stack trace</failure>
+        </testcase>
+        <testcase classname="test.test_ci" name="test_skipped" time="0">
+            <skipped message="not supported"/>
+        </testcase>
+        <system-out>output</system-out>
+    </testsuite>
+    <testsuite name="integration" time="10">
+        <testsuite name="database" time="1,234.5">
+            <testcase name="test_connect" time="3"/>
+            <testcase name="test_query" time="7">
+                <error>connection refused
+                </error>
+            </testcase>
+        </testsuite>
+        <testsuite name="api">
+            <testcase name="test_get" time="2"/>
+            <testcase name="test_post"/>
+        </testsuite>
+    </testsuite>
+</testsuites>'''
+
+
+def parse(xml=report, **kwargs):
+    return parse_junit_xml(BytesIO(xml), **kwargs)
+
+
+def task_names(job):
+    return [task.metadata.name for task in job.tasks]
+
+
+def test_parse_junit_xml():
+    job = parse()
+
+    assert job.metadata == ci.CIJobMetadata(ci.CIStatus.FAILED, 'pytest', 12.5)
+    assert [child_job.metadata.name for child_job in job.child_jobs] == ['unit', 'integration']
+    assert job.tasks == []
+
+    unit = job.child_jobs[0]
+    assert unit.metadata == ci.CIJobMetadata(ci.CIStatus.FAILED, 'unit', 2.5)
+    assert [task.metadata for task in unit.tasks] == [
+        ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'test.test_ci.test_add_task', 0.5),
+        ci.CITaskMetadata(ci.CIStatus.FAILED, 'test.test_ci.test_update', 1.5, failure_type='AssertionError',
+                          failure_message='assert 1 == 2'),
+        ci.CITaskMetadata(ci.CIStatus.SKIPPED, 'test.test_ci.test_skipped', 0),
+    ]
+
+    database, api = job.child_jobs[1].child_jobs
+    assert job.child_jobs[1].metadata.status == ci.CIStatus.FAILED
+    assert database.metadata.duration_value == Duration(1234.5)
+    assert database.tasks[1].metadata == ci.CITaskMetadata(ci.CIStatus.FAILED, 'test_query', 7,
+                                                           failure_message='connection refused')
+    assert api.metadata == ci.CIJobMetadata(ci.CIStatus.SUCCEEDED, 'api')
+    assert api.tasks[1].metadata == ci.CITaskMetadata(ci.CIStatus.SUCCEEDED, 'test_post')
+
+
+def test_parse_junit_xml_single_testsuite():
+    job = parse(b'<testsuite name="suite"><testcase name="a" time="1"/></testsuite>')
+
+    assert job.metadata == ci.CIJobMetadata(ci.CIStatus.SUCCEEDED, 'suite')
+    assert task_names(job) == ['a']
+    assert job.child_jobs is None
+
+
+def test_parse_junit_xml_only_failures():
+    job = parse(only_failures=True)
+
+    assert task_names(job.child_jobs[0]) == ['test.test_ci.test_update']
+    assert task_names(job.child_jobs[1].child_jobs[1]) == []
+    # The status of each job still reflects the testcases that were left out.
+    assert job.child_jobs[1].child_jobs[1].metadata.status == ci.CIStatus.SUCCEEDED
+    assert job.child_jobs[1].metadata.status == ci.CIStatus.FAILED
+
+
+@pytest.mark.parametrize('max_tasks, expected', [
+    [0, [[], [], []]],
+    [2, [[], ['test_connect', 'test_query'], []]],
+    [4, [['test.test_ci.test_update'], ['test_connect', 'test_query'], ['test_get']]],
+    [10, [['test.test_ci.test_add_task', 'test.test_ci.test_update', 'test.test_ci.test_skipped'],
+          ['test_connect', 'test_query'], ['test_get', 'test_post']]],
+])
+def test_parse_junit_xml_max_tasks(max_tasks, expected):
+    job = parse(max_tasks=max_tasks)
+
+    assert [task_names(job.child_jobs[0])] + [task_names(child_job) for child_job in job.child_jobs[1].child_jobs] == \
+        expected
+
+
+def test_parse_junit_xml_max_tasks_keeps_earlier_ties():
+    job = parse(b'<testsuite name="suite">' + b''.join(b'<testcase name="%d" time="1"/>' % index for index in range(5)) +
+                b'</testsuite>', max_tasks=3)
+
+    assert task_names(job) == ['0', '1', '2']
+
+
+@pytest.mark.parametrize('kwargs', [{}, {'only_failures': True}, {'max_tasks': 3}])
+def test_parse_junit_xml_batch(kwargs):
+    job = parse(**kwargs)
+    batch_job = parse(batch=True, **kwargs)
+
+    assert isinstance(batch_job.child_jobs[0].tasks, ci.CITaskBatch)
+    assert batch_job.child_ci_job_tree(max_depth=None) == job.child_ci_job_tree(max_depth=None)
+    assert list(batch_job.child_jobs[0].tasks) == job.child_jobs[0].tasks
+
+
+def test_parse_junit_xml_large_report(tmp_path):
+    path = tmp_path / 'report.xml'
+    with path.open('wb') as file:
+        file.write(b'<testsuites>')
+        for suite in range(10):
+            file.write(b'<testsuite name="suite %d">' % suite)
+            for index in range(1000):
+                file.write(b'<testcase name="test_%d" time="%d"><system-out>%s</system-out></testcase>' %
+                           (index, index % 7, b'x' * 100))
+            file.write(b'</testsuite>')
+        file.write(b'</testsuites>')
+
+    job = parse_junit_xml(str(path), max_tasks=5, batch=True)
+
+    assert job.metadata.status == ci.CIStatus.SUCCEEDED
+    assert sum(len(child_job.tasks) for child_job in job.child_jobs) == 5
+    assert job.task_status_counts(include_child_jobs=True) == {ci.CIStatus.SUCCEEDED: 5}
+
+
+@pytest.mark.parametrize('xml', [
+    b'<testcase name="a"/>',
+    b'<report></report>',
+])
+def test_parse_junit_xml_error(xml):
+    with pytest.raises(ValueError):
+        parse(xml)
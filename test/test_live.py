@@ -0,0 +1,105 @@
+from githubmarkdownui import ci
+from githubmarkdownui.escape import autoescape
+from githubmarkdownui.live import LiveReport
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def build_job():
+    tasks = [ci.CITask(ci.CITaskMetadata(ci.CIStatus.PENDING, f'test_{index}')) for index in range(3)]
+    return ci.CIJob(ci.CIJobMetadata(ci.CIStatus.RUNNING, 'pipeline'), tasks)
+
+
+def build_report(job, **kwargs):
+    bodies = []
+    clock = FakeClock()
+    report = LiveReport(job, bodies.append, interval=10, clock=clock, **kwargs)
+
+    return report, bodies, clock
+
+
+def test_live_report_coalesces_bursts():
+    job = build_job()
+    report, bodies, clock = build_report(job, render=lambda job: job.ci_task_list())
+
+    assert report.update_task(job.tasks[0], status=ci.CIStatus.RUNNING)
+    assert bodies == [job.ci_task_list()]
+
+    clock.now = 4
+    assert not report.update_task(job.tasks[0], status=ci.CIStatus.SUCCEEDED)
+    assert not report.update_task(job.tasks[1], status=ci.CIStatus.RUNNING)
+    assert not report.poll()
+    assert len(bodies) == 1
+
+    clock.now = 10
+    assert report.poll()
+    assert bodies[1] == job.ci_task_list()
+    assert not report.poll()
+
+    # Nothing changed, so nothing is emitted once the interval passes either.
+    clock.now = 30
+    assert not report.poll()
+    assert len(bodies) == 2
+
+
+def test_live_report_only_emits_visible_changes():
+    job = build_job()
+    renders = []
+    report, bodies, clock = build_report(job, render=lambda job: renders.append(job) or job.ci_task_list())
+
+    report.flush()
+    clock.now = 100
+    # The failure message is not displayed in a task list.
+    assert not report.update_task(job.tasks[0], failure_message='boom')
+    assert not report.poll()
+
+    assert len(bodies) == 1
+    assert len(renders) == 2
+
+
+def test_live_report_flush():
+    job = build_job()
+    report, bodies, clock = build_report(job)
+
+    assert report.flush()
+    assert not report.flush()
+
+    clock.now = 1
+    report.update_job(job, status=ci.CIStatus.SUCCEEDED)
+    assert len(bodies) == 1
+    assert report.flush()
+    assert bodies[1].startswith(f'{ci.CIStatus.SUCCEEDED.value} pipeline: ')
+
+
+def test_live_report_default_render():
+    job = build_job()
+    report, bodies, clock = build_report(job)
+
+    report.add_task(job, ci.CITask(ci.CITaskMetadata(ci.CIStatus.SKIPPED, 'test_<skipped>')))
+    assert bodies == [f'⏳ pipeline: ⬜ 3 pending, ⏭️ 1 skipped\n{job.ci_task_list()}']
+
+    clock.now = 10
+    assert report.add_child_job(job, build_job())
+    assert bodies[1] == f'⏳ pipeline: ⬜ 6 pending, ⏭️ 1 skipped\n{job.child_ci_job_tree()}'
+
+    clock.now = 20
+    with autoescape():
+        assert report.update_job(job, name='<pipeline>')
+        assert bodies[2] == f'⏳ &lt;pipeline&gt;: ⬜ 6 pending, ⏭️ 1 skipped\n{job.child_ci_job_tree()}'
+
+
+def test_live_report_picks_up_batch_changes():
+    batch = ci.CITaskBatch([ci.CITaskMetadata(ci.CIStatus.PENDING, 'test_a')])
+    job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.RUNNING, 'pipeline'), batch)
+    report, bodies, clock = build_report(job)
+
+    report.flush()
+    batch.update(0, status=ci.CIStatus.FAILED)
+    assert report.flush()
+    assert ci.CIStatus.FAILED.value in bodies[1]
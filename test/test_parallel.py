@@ -0,0 +1,106 @@
+import random
+
+import pytest
+
+from githubmarkdownui import ci, parallel
+from githubmarkdownui.blocks import table
+from githubmarkdownui.emoji import autoexpand_shortcodes
+from githubmarkdownui.escape import autoescape
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    # Split even the small inputs of these tests into several chunks.
+    monkeypatch.setattr(parallel, '_MIN_CHUNK_SIZE', 5)
+    monkeypatch.setattr(parallel, '_MIN_PARALLEL_SIZE', 5)
+
+
+@pytest.fixture(params=['processes', 'threads'])
+def executor(request, monkeypatch):
+    if request.param == 'threads':
+        monkeypatch.setattr(parallel, '_gil_disabled', lambda: True)
+
+    return request.param
+
+
+def random_name(generator):
+    return generator.choice(['test_a', 'test_<b>', '测试', 'a|b', ':lock: test', 'x' * generator.randint(1, 30)])
+
+
+def random_job(generator, depth=0):
+    tasks = [ci.CITask(ci.CITaskMetadata(generator.choice(list(ci.CIStatus)), random_name(generator),
+                                         generator.choice([None, generator.randint(1, 5000)]),
+                                         generator.choice([None, 'info', '<i>info</i>'])))
+             for _ in range(generator.randint(0, 8))]
+    child_jobs = [random_job(generator, depth + 1) for _ in range(generator.randint(0, 6 - depth * 2))] or None
+
+    return ci.CIJob(ci.CIJobMetadata(generator.choice(list(ci.CIStatus)), random_name(generator)), tasks, child_jobs)
+
+
+def test_chunk_bounds():
+    assert parallel.chunk_bounds(0, 4) == []
+    assert parallel.chunk_bounds(4, 4) == [(0, 4)]
+    assert parallel.chunk_bounds(1000, 1) == [(0, 1000)]
+    assert parallel.chunk_bounds(12, 4) == [(0, 5), (5, 10), (10, 12)]
+    assert parallel.chunk_bounds(1000, 2) == [(0, 125), (125, 250), (250, 375), (375, 500), (500, 625), (625, 750),
+                                              (750, 875), (875, 1000)]
+    assert parallel.chunk_bounds(5, 2, [1, 10, 2, 2, 1]) == [(0, 2), (2, 5)]
+    assert parallel.chunk_bounds(3, 2, [100, 100, 100]) == [(0, 1), (1, 2), (2, 3)]
+
+
+def test_chunk_bounds_of_small_output(monkeypatch):
+    monkeypatch.setattr(parallel, '_MIN_PARALLEL_SIZE', 100)
+
+    assert parallel.chunk_bounds(99, 4) == [(0, 99)]
+    assert parallel.chunk_bounds(3, 4, [30, 30, 30]) == [(0, 3)]
+    assert len(parallel.chunk_bounds(100, 4)) == 15
+
+
+@pytest.mark.parametrize('table_format', [table.TableFormat.HTML, table.TableFormat.MARKDOWN, table.TableFormat.AUTO])
+@pytest.mark.parametrize('escaping', [False, True])
+def test_table_workers(executor, table_format, escaping):
+    generator = random.Random(23)
+    content = [['test', 'status', 'info']] + [[random_name(generator), generator.choice(['passed', 'failed']), index]
+                                              for index in range(100)]
+    alignment = [table.TableAlignment.LEFT, None, table.TableAlignment.RIGHT]
+
+    with autoescape(escaping):
+        for compact in (False, True):
+            assert table.table(content, alignment, table_format=table_format, compact=compact, workers=3) == \
+                table.table(content, alignment, table_format=table_format, compact=compact)
+
+
+def test_table_workers_dimension_error(executor):
+    content = [['col1', 'col2']] + [['a', 'b']] * 20 + [['c']]
+
+    with pytest.raises(table.TableDimensionError):
+        table.table(content, workers=2)
+
+
+@pytest.mark.parametrize('batch', [False, True])
+@pytest.mark.parametrize('status', [None, ci.CIStatus.FAILED])
+def test_ci_task_list_workers(executor, batch, status):
+    generator = random.Random(24)
+    tasks = random_job(generator).tasks + [ci.CITask(ci.CITaskMetadata(generator.choice(list(ci.CIStatus)),
+                                                                       random_name(generator), index, 'info'))
+                                           for index in range(100)]
+    job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.FAILED, 'job'),
+                   ci.CITaskBatch(task.metadata for task in tasks) if batch else tasks)
+
+    for escaping, expanding in [(False, False), (True, False), (True, True)]:
+        with autoescape(escaping), autoexpand_shortcodes(expanding):
+            expected = job.ci_task_list(status)
+            job.mark_dirty()
+            assert job.ci_task_list(status, workers=3) == expected
+
+
+@pytest.mark.parametrize('status', [None, ci.CIStatus.FAILED])
+@pytest.mark.parametrize('max_depth', [1, None])
+def test_child_ci_job_tree_workers(executor, status, max_depth):
+    job = random_job(random.Random(25))
+
+    for collapse_succeeded in (False, True):
+        expected = job.child_ci_job_tree(status, max_depth=max_depth, collapse_succeeded=collapse_succeeded)
+        job.mark_dirty()
+        assert job.child_ci_job_tree(status, max_depth=max_depth, collapse_succeeded=collapse_succeeded,
+                                     workers=3) == expected
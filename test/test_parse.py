@@ -0,0 +1,145 @@
+import random
+
+import pytest
+
+from githubmarkdownui import ci
+from githubmarkdownui.blocks.table import TableAlignment, table
+from githubmarkdownui.duration import format_duration
+from githubmarkdownui.escape import autoescape
+from githubmarkdownui.parse import ParseError, parse_child_ci_job_tree, parse_ci_task_list, parse_table
+from test.test_ci import nested_job, sample_job
+
+# Names never start or end with a space or contain three in a row, since those cannot be told apart from the padding.
+NAME_ALPHABET = 'abc xyz-_.<>&|测试✅'
+
+
+def random_text(rng, alphabet=NAME_ALPHABET, max_length=12):
+    while True:
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(1, max_length)))
+        if text == text.strip() and '   ' not in text:
+            return text
+
+
+def random_task(rng, with_duration=True):
+    return ci.CITask(ci.CITaskMetadata(
+        rng.choice(list(ci.CIStatus)),
+        random_text(rng),
+        format_duration(rng.randint(1, 10000)) if with_duration and rng.random() < 0.7 else None,
+        random_text(rng) if rng.random() < 0.5 else None,
+    ))
+
+
+def random_job(rng):
+    return ci.CIJob(ci.CIJobMetadata(rng.choice(list(ci.CIStatus)), 'root'), [], [
+        ci.CIJob(ci.CIJobMetadata(rng.choice(list(ci.CIStatus)), random_text(rng)),
+                 [random_task(rng, with_duration=False) for _ in range(rng.randint(0, 5))])
+        for _ in range(rng.randint(0, 6))
+    ])
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_parse_ci_task_list_round_trip(seed):
+    rng = random.Random(seed)
+    job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.FAILED, 'job'), [random_task(rng) for _ in range(rng.randint(0, 20))])
+    rendered = job.ci_task_list()
+
+    tasks = parse_ci_task_list(rendered)
+
+    assert tasks == job.tasks
+    assert ci.CIJob(job.metadata, tasks).ci_task_list() == rendered
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_parse_child_ci_job_tree_round_trip(seed):
+    rng = random.Random(seed)
+    job = random_job(rng)
+    rendered = job.child_ci_job_tree()
+
+    child_jobs = parse_child_ci_job_tree(rendered)
+
+    assert child_jobs == job.child_jobs
+    assert ci.CIJob(job.metadata, [], child_jobs).child_ci_job_tree() == rendered
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_parse_table_round_trip(seed):
+    rng = random.Random(seed)
+    columns = rng.randint(1, 5)
+    content = [[random_text(rng, NAME_ALPHABET + '\n', 20) for _ in range(columns)] for _ in range(rng.randint(1, 20))]
+    alignment = [rng.choice([None, *TableAlignment]) for _ in range(columns)] if rng.random() < 0.5 else None
+    rendered = table(content, alignment)
+
+    parsed_content, parsed_alignment = parse_table(rendered)
+
+    assert parsed_content == content
+    assert table(parsed_content, parsed_alignment) == rendered
+
+
+def test_parse_sample_job():
+    child_jobs = parse_child_ci_job_tree(sample_job.child_ci_job_tree())
+
+    assert [job.metadata.name for job in child_jobs] == ['first child job', 'second child job']
+    assert child_jobs[1].tasks[1].metadata == ci.CITaskMetadata(ci.CIStatus.FAILED, 'task 2 foobarbaz', info='additional info')
+    assert parse_ci_task_list(sample_job.ci_task_list()) == sample_job.tasks
+
+
+def test_parse_escaped_output():
+    job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.FAILED, 'job'), [
+        ci.CITask(ci.CITaskMetadata(ci.CIStatus.FAILED, 'test_a<b>', '5s')),
+    ])
+    with autoescape():
+        rendered = job.ci_task_list()
+
+    assert parse_ci_task_list(rendered)[0].metadata.name == 'test_a&lt;b&gt;'
+
+
+def test_parse_empty_output():
+    empty_job = ci.CIJob(ci.CIJobMetadata(ci.CIStatus.SUCCEEDED, 'job'), [])
+
+    assert parse_ci_task_list(empty_job.ci_task_list()) == []
+    assert parse_child_ci_job_tree(empty_job.child_ci_job_tree()) == []
+    assert parse_table(table([['col1', 'col2']])) == ([['col1', 'col2']], None)
+
+
+def test_parse_update_and_render_again():
+    child_jobs = parse_child_ci_job_tree(sample_job.child_ci_job_tree())
+    child_jobs[1].tasks[0].update(status=ci.CIStatus.FAILED)
+    job = ci.CIJob(sample_job.metadata, [], child_jobs)
+
+    assert job.child_ci_job_tree().count(ci.CIStatus.FAILED.value) == 4
+
+
+@pytest.mark.parametrize('text', [
+    'not a code block',
+    '<pre><code>not a task</code></pre>',
+    f'<pre><code>{ci.CIStatus.FAILED.value}  task\n</code></pre>',
+    f'<pre><code>{ci.CIStatus.FAILED.value}  task\n\n{ci.CIStatus.FAILED.value}  task</code></pre>',
+])
+def test_parse_ci_task_list_error(text):
+    with pytest.raises(ParseError):
+        parse_ci_task_list(text)
+
+
+def test_parse_child_ci_job_tree_error():
+    with pytest.raises(ParseError):
+        parse_child_ci_job_tree(nested_job.child_ci_job_tree(max_depth=None))
+
+    # The job tree starts with a task.
+    first_job_line = sample_job.child_ci_job_tree().split('\n')[0][len('<pre><code>'):]
+    with pytest.raises(ParseError):
+        parse_child_ci_job_tree(sample_job.child_ci_job_tree().replace(f'{first_job_line}\n', ''))
+
+    # Omitted jobs and tasks cannot be recovered.
+    with pytest.raises(ParseError):
+        parse_child_ci_job_tree(sample_job.child_ci_job_tree(max_length=200))
+
+
+@pytest.mark.parametrize('text', [
+    '<table><thead><tr><th>a</th></tr></thead><tbody>',
+    '<table><thead><tr><th>a</th></tr></thead><tbody><tr><td>1</td><td>2</td></tr></tbody></table>',
+    '<table><thead><tr><th>a</th></tr></thead><tbody></tbody></table>trailing text',
+    '<ul><li>a</li></ul>',
+])
+def test_parse_table_error(text):
+    with pytest.raises(ParseError):
+        parse_table(text)
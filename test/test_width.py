@@ -0,0 +1,57 @@
+import pytest
+
+from githubmarkdownui.emoji import Emoji
+from githubmarkdownui.width import display_width, display_widths, pad_to_width
+
+
+@pytest.mark.parametrize('text, expected', [
+    ['', 0],
+    ['first task (15s)', 16],
+    ['a < b & c', 9],
+    ['<strong>(15s)</strong>', 5],
+    ['&lt;tag&gt; &amp; &#124;', 9],
+    ['测试任务', 8],
+    ['ｆｕｌｌ', 8],
+    ['café', 4],
+    ['cafe\u0301', 4],
+    [Emoji.CHECK_MARK.value, 2],
+    [Emoji.WARNING.value, 2],
+    ['⚠', 1],
+    ['\U0001f600\ufe0e', 1],
+    ['\U0001f44d\U0001f3fd', 2],
+    ['\U0001f1fa\U0001f1f8', 2],
+    ['\U0001f1fa\U0001f1f8\U0001f1ec\U0001f1e7', 4],
+    ['\U0001f468\u200d\U0001f469\u200d\U0001f467', 2],
+    ['\u200b', 0],
+    [f'{Emoji.X.value}  测试 <strong>(1m 8s)</strong>', 16],
+])
+def test_display_width(text, expected):
+    assert display_width(text) == expected
+
+
+def test_display_width_of_long_text():
+    # Text too long to be cached whole is measured the same way.
+    line = f'{Emoji.X.value}  测试 <strong>(1m 8s)</strong> &amp; '
+
+    assert display_width(line * 20) == 20 * display_width(line)
+
+
+@pytest.mark.parametrize('texts', [
+    [],
+    ['first task', 'second task', ''],
+    ['first task', '测试'],
+    ['a < b', 'c'],
+    ['<strong>(15s)</strong>', 'task'],
+])
+def test_display_widths(texts):
+    assert display_widths(texts) == [display_width(text) for text in texts]
+
+
+@pytest.mark.parametrize('text, width, expected', [
+    ['task', 6, 'task  '],
+    ['测试', 6, '测试  '],
+    [f'{Emoji.CHECK_MARK.value} <strong>a</strong>', 5, f'{Emoji.CHECK_MARK.value} <strong>a</strong> '],
+    ['long task', 4, 'long task'],
+])
+def test_pad_to_width(text, width, expected):
+    assert pad_to_width(text, width) == expected